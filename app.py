@@ -3,7 +3,9 @@ from flask import request
 from flask_restx import Api, Resource
 from config import DevConfig, ProdConfig
 import os
+import time
 from models.exts import db
+from models.routing import init_replica_routing
 from models.subscription_pack_model import SubscriptionPack, PackFeature
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
@@ -11,52 +13,35 @@ from flask_cors import CORS
 from services.auth.auth import auth_ns
 from services.auth.stripe import stripe_ns
 from services.auth.sync_usages import sync_ns
+from services.auth.credits import credits_ns
 
-from services.crud.tcf_admin import tcf_ns, create_test_subjects
+from services.crud.tcf_admin import tcf_ns
 from services.crud.tcf_admin_oral import tcf_oral_ns
 from services.exam.exam import exam_ns
 from services.exam.attempt import attempt_ns
 from services.exam.synthesis import synthesis_ns
 from services.exam.dashboard import dashboard_ns
-from services.crud.subscription_pack_admin import pack_ns, create_default_packs
+from services.crud.subscription_pack_admin import pack_ns
 from services.crud.order_admin import order_admin_ns
 from services.crud.order_public import order_public_ns
+from services.listing import PAGINATION_HEADERS
 from services.proxy.correction_proxy import proxy_ns
 from services.proxy.translation_proxy import proxy_translation_ns
 from services.proxy.note_moyenne_proxy import proxy_note_moyenne_ns
 from services.proxy.task2_proxy import proxy_task2_ns
 from services.proxy.task1_proxy import proxy_task1_ns
 from services.proxy.oral_proxy import oral_proxy_ns
+from services.monitoring.monitoring import monitoring_ns
+from services.monitoring.pool import init_pool_monitoring
+from services.monitoring.metrics import init_metrics
+from services.monitoring.query_budget import init_query_budget
+from services.monitoring.structured_logging import configure_logging
+from services.auth.principal import init_principal
+from commands import register_commands
 
 
-app = Flask(__name__)
-
-# Configuration basée sur l'environnement
-if os.environ.get('FLASK_ENV') == 'production':
-    app.config.from_object(ProdConfig)
-else:
-    app.config.from_object(DevConfig)
-
-# Configuration CORS adaptée pour la production
-if os.environ.get('FLASK_ENV') == 'production':
-    # Configuration CORS pour la production - domaines spécifiques
-    CORS(app, resources={r"/*": {
-        "origins": ["https://expressiontcf.com", "https://www.expressiontcf.com", "https://api.expressiontcf.com"],
-        "methods": ["GET", "POST", "OPTIONS", "PUT", "PATCH", "DELETE"],
-        "allow_headers": ["Content-Type", "Authorization", "X-Requested-With", "Accept", "Origin"],
-        "supports_credentials": True,
-        "expose_headers": ["Content-Range", "X-Content-Range"]
-    }})
-else:
-    # Configuration CORS pour le développement - permissive
-    CORS(app, resources={r"/*": {
-        "origins": "*",
-        "methods": ["GET", "POST", "OPTIONS", "PUT", "PATCH", "DELETE"],
-        "allow_headers": ["Content-Type", "Authorization", "X-Requested-With"],
-        "supports_credentials": False
-    }})
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = False
-jwt = JWTManager(app)
+jwt = JWTManager()
+migrate = Migrate()
 
 # Gestion des erreurs JWT
 @jwt.invalid_token_loader
@@ -71,14 +56,6 @@ def expired_token_callback(jwt_header, jwt_payload):
 def missing_token_callback(error):
     return {'msg': "Token d'autorisation requis"}, 422
 
-# Gestionnaire d'erreur global pour les erreurs JWT
-@app.errorhandler(422)
-def handle_jwt_exceptions(error):
-    if 'Not enough segments' in str(error):
-        return {'msg': 'Token JWT malformé'}, 422
-    return {'msg': 'Erreur de validation'}, 422
-
-db.init_app(app)
 
 # --- Sécurité CORS supplémentaire (préflight et en-têtes explicites) ---
 # Cette section complète Flask-CORS pour garantir les en-têtes côté proxy.
@@ -88,71 +65,6 @@ ALLOWED_ORIGINS = [
     "https://api.expressiontcf.com",
 ]
 
-@app.after_request
-def add_cors_headers(response):
-    try:
-        origin = request.headers.get("Origin")
-        is_prod = os.environ.get('FLASK_ENV') == 'production'
-
-        if is_prod and origin in ALLOWED_ORIGINS:
-            response.headers["Access-Control-Allow-Origin"] = origin
-            response.headers["Vary"] = "Origin"
-            response.headers["Access-Control-Allow-Credentials"] = "true"
-            response.headers["Access-Control-Allow-Headers"] = (
-                "Content-Type, Authorization, X-Requested-With, Accept, Origin"
-            )
-            response.headers["Access-Control-Allow-Methods"] = (
-                "GET, POST, OPTIONS, PUT, PATCH, DELETE"
-            )
-            response.headers["Access-Control-Expose-Headers"] = (
-                "Content-Range, X-Content-Range"
-            )
-        else:
-            # Mode développement: permissif
-            response.headers["Access-Control-Allow-Origin"] = "*"
-            response.headers["Access-Control-Allow-Headers"] = (
-                "Content-Type, Authorization, X-Requested-With, Accept, Origin"
-            )
-            response.headers["Access-Control-Allow-Methods"] = (
-                "GET, POST, OPTIONS, PUT, PATCH, DELETE"
-            )
-
-        # Référence: les réponses OPTIONS seront gérées ci-dessous
-        return response
-    except Exception:
-        return response
-
-@app.route('/<path:any_path>', methods=['OPTIONS'])
-def cors_preflight(any_path):
-    # Réponse vide pour le préflight; les en-têtes sont ajoutés par after_request
-    return ('', 204)
-
-# --- Initialisation automatique de la base de données au démarrage ---
-# Crée les tables si elles n'existent pas et insère les données par défaut
-try:
-    from sqlalchemy import inspect
-    with app.app_context():
-        # Importer explicitement les modèles pour l'enregistrement des tables
-        from models.model import User
-        from models.tcf_model import TCFSubject, TCFTask, TCFDocument
-        from models.tcf_exam_model import TCFExam
-        from models.tcf_attempt_model import TCFAttempt
-        from models.tcf_model_oral import TCFOralSubject, TCFOralTask
-
-        inspector = inspect(db.engine)
-        # Créer toutes les tables si aucune n'existe ou pour s'assurer que le schéma est prêt
-        if not inspector.get_table_names():
-            db.create_all()
-        else:
-            # Exécuter create_all de manière sûre (idempotent)
-            db.create_all()
-        # Insérer les données par défaut (les fonctions gèrent déjà les doublons)
-        create_test_subjects()
-        create_default_packs()
-except Exception as e:
-    print(f"[WARN] Initialisation DB non effectuée: {e}")
-
-migrate = Migrate(app, db)
 # Désactiver l'authentification par défaut pour tous les endpoints
 authorizations = {
     'apikey': {
@@ -161,51 +73,167 @@ authorizations = {
         'name': 'Authorization'
     }
 }
-api = Api(app, doc='/docs', authorizations=authorizations, security=None)
-
-'''
-    Create Migration repository
-    $ flask db init 
-    Apply Frist Migration
-    $ flask db migrate  -m "add table"  
-    Apply current revision db 'commit'
-    $ flask db upgrade
-'''
-
-
-api.add_namespace(auth_ns)
-api.add_namespace(stripe_ns)
-api.add_namespace(sync_ns)
-api.add_namespace(tcf_ns)
-api.add_namespace(tcf_oral_ns)
-api.add_namespace(exam_ns)
-api.add_namespace(attempt_ns)
-api.add_namespace(synthesis_ns)
-api.add_namespace(dashboard_ns)
-api.add_namespace(pack_ns)
-api.add_namespace(order_admin_ns)
-api.add_namespace(order_public_ns)
-api.add_namespace(proxy_ns)
-api.add_namespace(proxy_translation_ns)
-api.add_namespace(proxy_note_moyenne_ns)
-api.add_namespace(proxy_task2_ns)
-api.add_namespace(proxy_task1_ns)
-api.add_namespace(oral_proxy_ns)
-
-
-@app.before_first_request
-def initialize_data():
-    # Créer les sujets de test TCF
-    create_test_subjects()
-    # Créer les packs d'abonnement par défaut
-    create_default_packs()
+
+NAMESPACES = [
+    auth_ns,
+    stripe_ns,
+    sync_ns,
+    credits_ns,
+    tcf_ns,
+    tcf_oral_ns,
+    exam_ns,
+    attempt_ns,
+    synthesis_ns,
+    dashboard_ns,
+    pack_ns,
+    order_admin_ns,
+    order_public_ns,
+    proxy_ns,
+    proxy_translation_ns,
+    proxy_note_moyenne_ns,
+    proxy_task2_ns,
+    proxy_task1_ns,
+    oral_proxy_ns,
+    monitoring_ns,
+]
+
+
+def create_app(config=None):
+    """Crée et configure l'application Flask.
+
+    Aucune requête SQL n'est exécutée ici : le schéma et les données par défaut
+    sont gérés par la commande `flask bootstrap` (voir commands/bootstrap.py).
+    """
+    started_at = time.perf_counter()
+    app = Flask(__name__)
+
+    # Configuration basée sur l'environnement
+    if config is None:
+        config = ProdConfig if os.environ.get('FLASK_ENV') == 'production' else DevConfig
+    app.config.from_object(config)
+    # Logs structurés non bloquants et identifiant de requête (X-Request-ID)
+    configure_logging(app)
+
+    # Configuration CORS adaptée pour la production
+    if os.environ.get('FLASK_ENV') == 'production':
+        # Configuration CORS pour la production - domaines spécifiques
+        CORS(app, resources={r"/*": {
+            "origins": ["https://expressiontcf.com", "https://www.expressiontcf.com", "https://api.expressiontcf.com"],
+            "methods": ["GET", "POST", "OPTIONS", "PUT", "PATCH", "DELETE"],
+            "allow_headers": ["Content-Type", "Authorization", "X-Requested-With", "Accept", "Origin", "Idempotency-Key"],
+            "supports_credentials": True,
+            "expose_headers": ["Content-Range", "X-Content-Range", *PAGINATION_HEADERS]
+        }})
+    else:
+        # Configuration CORS pour le développement - permissive
+        CORS(app, resources={r"/*": {
+            "origins": "*",
+            "methods": ["GET", "POST", "OPTIONS", "PUT", "PATCH", "DELETE"],
+            "allow_headers": ["Content-Type", "Authorization", "X-Requested-With", "Idempotency-Key"],
+            "expose_headers": list(PAGINATION_HEADERS),
+            "supports_credentials": False
+        }})
+    app.config['JWT_ACCESS_TOKEN_EXPIRES'] = False
+    jwt.init_app(app)
+    init_principal(app)
+
+    # Gestionnaire d'erreur global pour les erreurs JWT
+    @app.errorhandler(422)
+    def handle_jwt_exceptions(error):
+        if 'Not enough segments' in str(error):
+            return {'msg': 'Token JWT malformé'}, 422
+        return {'msg': 'Erreur de validation'}, 422
+
+    # Pool instrumenté (attente, saturation) pour les bases serveur
+    init_pool_monitoring(app)
+    # Réplicas en lecture (binds replica_N), si configurés
+    init_replica_routing(app)
+    db.init_app(app)
+
+    @app.after_request
+    def add_cors_headers(response):
+        try:
+            origin = request.headers.get("Origin")
+            is_prod = os.environ.get('FLASK_ENV') == 'production'
+
+            if is_prod and origin in ALLOWED_ORIGINS:
+                response.headers["Access-Control-Allow-Origin"] = origin
+                response.headers["Vary"] = "Origin"
+                response.headers["Access-Control-Allow-Credentials"] = "true"
+                response.headers["Access-Control-Allow-Headers"] = (
+                    "Content-Type, Authorization, X-Requested-With, Accept, Origin"
+                )
+                response.headers["Access-Control-Allow-Methods"] = (
+                    "GET, POST, OPTIONS, PUT, PATCH, DELETE"
+                )
+                response.headers["Access-Control-Expose-Headers"] = (
+                    "Content-Range, X-Content-Range"
+                )
+            else:
+                # Mode développement: permissif
+                response.headers["Access-Control-Allow-Origin"] = "*"
+                response.headers["Access-Control-Allow-Headers"] = (
+                    "Content-Type, Authorization, X-Requested-With, Accept, Origin"
+                )
+                response.headers["Access-Control-Allow-Methods"] = (
+                    "GET, POST, OPTIONS, PUT, PATCH, DELETE"
+                )
+
+            # Référence: les réponses OPTIONS seront gérées ci-dessous
+            return response
+        except Exception:
+            return response
+
+    @app.route('/<path:any_path>', methods=['OPTIONS'])
+    def cors_preflight(any_path):
+        # Réponse vide pour le préflight; les en-têtes sont ajoutés par after_request
+        return ('', 204)
+
+    # Métriques Prometheus par ressource (GET /metrics)
+    init_metrics(app)
+    # Budgets SQL et détection N+1 (développement et tests)
+    init_query_budget(app)
+
+    migrate.init_app(app, db)
+    api = Api(app, doc='/docs', authorizations=authorizations, security=None)
+
+    '''
+        Create Migration repository
+        $ flask db init
+        Apply Frist Migration
+        $ flask db migrate  -m "add table"
+        Apply current revision db 'commit'
+        $ flask db upgrade
+        Create tables and default data (subjects, packs)
+        $ flask bootstrap
+    '''
+
+    for namespace in NAMESPACES:
+        api.add_namespace(namespace)
+
+    register_commands(app)
+
+    # Temps de démarrage à froid de ce worker (hors imports du module)
+    app.config['STARTUP_TIME_MS'] = round((time.perf_counter() - started_at) * 1000, 1)
+    app.logger.info(
+        f"Application initialisée en {app.config['STARTUP_TIME_MS']} ms (pid {os.getpid()})"
+    )
+    return app
+
+
+app = create_app()
 
 if __name__ == '__main__':
+    # En développement, préparer la base avant de servir (les workers de production utilisent `flask bootstrap`)
+    from commands.bootstrap import bootstrap_database
+    with app.app_context():
+        bootstrap_database()
+
     # Activer le threading pour permettre le traitement concurrent des requêtes
     debug_mode = os.environ.get('FLASK_ENV') != 'production'
     port = int(os.environ.get('PORT', 5001))
     app.run(host='0.0.0.0', debug=debug_mode, port=port, threaded=True)
 else:
     application = app
-#docker build --platform linux/amd64 -f Dockerfile.dev -t reussir-tcf-backend-dev-linux . 
+#docker build --platform linux/amd64 -f Dockerfile.dev -t reussir-tcf-backend-dev-linux .
 #ls -lh reussir-tcf-backend-dev-linux.tar && file reussir-tcf-backend-dev-linux.tar
\ No newline at end of file
@@ -0,0 +1,18 @@
+from models.tcf_exam_model import normalized_score
+from models.user_stats_model import study_streak
+
+
+def _normalize_scores(scores):
+    # Normalisation faite à l'écriture de chaque examen (TCFExam._normalize_score)
+    return [normalized_score(score) for score in scores]
+
+
+def bench_score_normalization(benchmark, exam_scores):
+    normalized = benchmark(_normalize_scores, exam_scores)
+    points = [numeric for numeric, _ in normalized if numeric is not None]
+    assert 45 <= sum(points) / len(points) <= 95 and max(points) == 95
+
+
+def bench_study_streak(benchmark, exam_dates):
+    today, dates = exam_dates
+    assert benchmark(study_streak, dates, today) == 30
@@ -0,0 +1,8 @@
+from services.moderator_permissions import ModeratorPermissions
+
+
+def bench_get_accessible_users(benchmark, users):
+    all_users = [user.to_dict() for user in users]
+    moderator = {'username': 'moderator0', 'role': 'moderator'}
+    accessible = benchmark(ModeratorPermissions.get_accessible_users, moderator, all_users)
+    assert accessible and all(u['created_by'] == 'moderator0' or u['username'] == 'moderator0' for u in accessible)
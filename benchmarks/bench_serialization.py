@@ -0,0 +1,20 @@
+from services.crud.order_admin import write_orders_csv
+
+from conftest import ROWS
+
+
+def _serialize(rows):
+    return [row.to_dict() for row in rows]
+
+
+def bench_user_to_dict(benchmark, users):
+    assert len(benchmark(_serialize, users)) == ROWS
+
+
+def bench_order_to_dict(benchmark, orders):
+    assert len(benchmark(_serialize, orders)) == ROWS
+
+
+def bench_order_export_csv(benchmark, orders):
+    csv_text = benchmark(write_orders_csv, orders)
+    assert csv_text.count('\n') == ROWS + 1
@@ -0,0 +1,44 @@
+import copy
+
+from services.exam.synthesis import markdown_to_plain_text
+from services.proxy.oral_proxy import validate_oral_json_format
+
+# Réponse typique de l'agent vocal (markdown de Groq)
+MARKDOWN_REPLY = """
+## Bonjour !
+
+Merci pour votre **présentation**. Voici quelques *remarques* :
+
+1. Votre prononciation est **claire** et fluide.
+2. Attention à l'accord du participe passé : *« les lettres que j'ai **écrites** »*.
+3. Essayez d'utiliser des connecteurs : `cependant`, `en revanche`, `par ailleurs`.
+
+> Pouvez-vous me parler de votre ville natale et de ce que vous y aimez le plus ?
+
+- Vocabulaire : **riche**
+- Grammaire : *à consolider*
+""" * 4
+
+
+def _oral_task(name):
+    return {'output': {name: {
+        'corrections_taches': [f"Correction {i} de la {name}" for i in range(8)],
+        'pointsForts': ["Bonne prononciation", "Vocabulaire varié", "Discours structuré"],
+        'pointsAmeliorer': ["Accords du participe passé", "Connecteurs logiques"],
+        'NoteExam': 'B2',
+        'NoteExamCorrection': 'C1',
+    }}}
+
+
+ORAL_RESPONSE = [_oral_task('tache1'), _oral_task('tache2'), _oral_task('tache3')]
+
+
+def bench_markdown_to_plain_text(benchmark):
+    markdown_to_plain_text(MARKDOWN_REPLY)  # chargement des modules différés hors mesure
+    text = benchmark(markdown_to_plain_text, MARKDOWN_REPLY)
+    assert '**' not in text and 'présentation' in text
+
+
+def bench_validate_oral_json_format(benchmark):
+    payload = copy.deepcopy(ORAL_RESPONSE)
+    assert benchmark(validate_oral_json_format, payload) is True
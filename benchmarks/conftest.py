@@ -0,0 +1,110 @@
+import os
+import random
+import sys
+from datetime import date, datetime, timedelta
+
+import pytest
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARKS_DIR)
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Tous les modèles déclarés avant la première instanciation : les relations par nom
+# ('TCFSubject'...) se résolvent quel que soit le module de benchmark chargé en premier
+from models import (  # noqa: E402,F401
+    activity_model, credit_model, exam_submission_model, model, order_model, revenue_model,
+    subscription_pack_model, tcf_attempt_model, tcf_exam_model, tcf_model, tcf_model_oral, user_stats_model,
+)
+
+# Résultats JSON (un fichier par exécution, nommé d'après le commit) comparables
+# avec --benchmark-compare, quel que soit le répertoire de lancement
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, 'results')
+
+ROWS = 10000
+SEED = 20240901
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    if config.getoption('benchmark_storage', None) == 'file://./.benchmarks':
+        config.option.benchmark_storage = 'file://' + RESULTS_DIR
+
+
+@pytest.fixture
+def rng():
+    return random.Random(SEED)
+
+
+@pytest.fixture
+def users(rng):
+    """ROWS utilisateurs non persistés: 1 % de modérateurs, le reste des clients"""
+    from models.model import User
+
+    moderators = [f"moderator{i}" for i in range(ROWS // 100)]
+    rows = []
+    for i in range(ROWS):
+        is_moderator = i < len(moderators)
+        rows.append(User(
+            id=i + 1,
+            username=moderators[i] if is_moderator else f"user{i}",
+            email=f"user{i}@example.com",
+            password='x',
+            nom=f"Nom{i}",
+            prenom=f"Prénom{i}",
+            tel=f"+1514555{i:04d}",
+            role='moderator' if is_moderator else 'client',
+            subscription_plan=rng.choice(['standard', 'performance', 'pro', None]),
+            payment_status=rng.choice(['pending', 'paid', 'active']),
+            sold=float(rng.randint(0, 50)),
+            total_sold=float(rng.randint(0, 200)),
+            date_create=datetime(2024, 1, 1) + timedelta(minutes=i),
+            created_by=None if is_moderator else rng.choice(moderators),
+        ))
+    return rows
+
+
+@pytest.fixture
+def orders(rng):
+    """ROWS commandes non persistées (numéro fourni: aucune requête SQL)"""
+    from models.order_model import Order
+
+    created = datetime(2024, 1, 1)
+    rows = []
+    for i in range(ROWS):
+        paid = rng.random() < 0.8
+        rows.append(Order(
+            id=i + 1,
+            order_number=f"Ordre#{1000 + i:07d}",
+            user_id=rng.randint(1, ROWS),
+            subscription_plan=rng.choice(['standard', 'performance', 'pro']),
+            amount=rng.choice([29.99, 49.99, 79.99]),
+            currency='USD',
+            status='paid' if paid else 'pending',
+            payment_status='completed' if paid else 'pending',
+            payment_method='card' if paid else None,
+            stripe_session_id=f"cs_test_{i:024d}",
+            customer_email=f"user{i}@example.com",
+            customer_name=f"Client {i}",
+            created_at=created + timedelta(minutes=i),
+            updated_at=created + timedelta(minutes=i),
+            paid_at=created + timedelta(minutes=i + 1) if paid else None,
+        ))
+    return rows
+
+
+@pytest.fixture
+def exam_scores(rng):
+    """Scores tels que stockés en base: numériques, "Niveau C1", "B2", vides"""
+    choices = ['Niveau C1', 'Niveau B2', 'B1', 'C2', 'Niveau A2', 'A1', '72.5', '15', 'Non évalué', None]
+    weights = [20, 25, 20, 5, 10, 5, 5, 5, 3, 2]
+    return rng.choices(choices, weights=weights, k=ROWS)
+
+
+@pytest.fixture
+def exam_dates(rng):
+    """Dates d'examen distinctes, triées décroissantes: série de 30 jours puis activité éparse"""
+    today = date(2024, 9, 1)
+    streak = [today - timedelta(days=d) for d in range(30)]
+    older = sorted({today - timedelta(days=rng.randint(31, 3650)) for _ in range(2000)}, reverse=True)
+    return today, streak + older
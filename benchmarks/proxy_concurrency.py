@@ -0,0 +1,140 @@
+"""
+Benchmark de concurrence des proxies n8n (voir PERFORMANCE.md).
+
+Lance un faux serveur n8n qui répond après `--delay` secondes, démarre gunicorn
+(gunicorn.conf.py) avec un seul worker de la classe demandée, puis envoie
+`--concurrency` requêtes simultanées sur /proxy-translation/translation.
+
+    python benchmarks/proxy_concurrency.py --worker-class gevent --concurrency 200
+    python benchmarks/proxy_concurrency.py --worker-class sync --concurrency 20
+    python benchmarks/proxy_concurrency.py --worker-class gthread --threads 32 --concurrency 200
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_n8n(delay):
+    """Faux webhook n8n: attend `delay` secondes puis renvoie une réponse JSON"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(delay)
+            body = json.dumps({'output': 'ok'}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer.request_queue_size = 1024
+    server = ThreadingHTTPServer(('127.0.0.1', _free_port()), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_gunicorn(port, n8n_url, worker_class, threads, tmp_dir):
+    env = dict(
+        os.environ,
+        FLASK_ENV='production',
+        DATABASE_URL='sqlite:///' + os.path.join(tmp_dir, 'bench.db'),
+        N8N_BASE_URL=n8n_url,
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        GUNICORN_WORKERS='1',
+        GUNICORN_WORKER_CLASS=worker_class,
+        GUNICORN_THREADS=str(threads),
+        GUNICORN_ACCESSLOG='',
+        GUNICORN_LOGLEVEL='warning',
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/swagger.json', timeout=1)
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn n\'a pas démarré')
+
+
+def _call(url):
+    payload = json.dumps({'pointsForts': ['a'], 'pointsAmeliorer': ['b'], 'targetLanguage': 'en'}).encode()
+    req = urllib.request.Request(url, data=payload, headers={'Content-Type': 'application/json'})
+    started_at = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=600) as response:
+        response.read()
+        status = response.status
+    return status, time.perf_counter() - started_at
+
+
+def run(worker_class, concurrency, delay, threads):
+    fake_n8n = start_fake_n8n(delay)
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        process = start_gunicorn(port, f'http://127.0.0.1:{fake_n8n.server_port}', worker_class, threads, tmp_dir)
+        try:
+            url = f'http://127.0.0.1:{port}/proxy-translation/translation'
+            started_at = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                results = list(pool.map(_call, [url] * concurrency))
+            wall = time.perf_counter() - started_at
+        finally:
+            process.terminate()
+            process.wait()
+    fake_n8n.shutdown()
+
+    latencies = sorted(latency for _, latency in results)
+    return {
+        'worker_class': worker_class,
+        'threads': threads,
+        'concurrency': concurrency,
+        'upstream_delay_s': delay,
+        'ok': sum(1 for status, _ in results if status == 200),
+        'wall_s': round(wall, 2),
+        'throughput_rps': round(concurrency / wall, 1),
+        'p50_s': round(statistics.median(latencies), 2),
+        'p95_s': round(latencies[int(len(latencies) * 0.95) - 1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--worker-class', default='gevent', choices=['gevent', 'sync', 'gthread'])
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--delay', type=float, default=2.0, help="Latence du faux n8n (s)")
+    parser.add_argument('--threads', type=int, default=1, help="Threads par worker (gthread)")
+    args = parser.parse_args()
+    print(json.dumps(run(args.worker_class, args.concurrency, args.delay, args.threads)))
+
+
+if __name__ == '__main__':
+    main()
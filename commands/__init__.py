@@ -0,0 +1,23 @@
+# Commandes CLI Flask (`flask <commande>`)
+# Chaque module expose une commande click enregistrée par register_commands().
+
+from commands.backfill_scores import backfill_exam_scores_command
+from commands.bootstrap import bootstrap_command
+from commands.compress_exam_texts import compress_exam_texts_command
+from commands.import_report import import_report_command
+from commands.rebuild_daily_activity import rebuild_daily_activity_command
+from commands.rebuild_revenue import rebuild_revenue_command
+from commands.rebuild_user_stats import rebuild_user_stats_command
+from commands.seed_synthetic import seed_synthetic_command
+
+
+def register_commands(app):
+    """Enregistre les commandes CLI de maintenance sur l'application"""
+    app.cli.add_command(backfill_exam_scores_command)
+    app.cli.add_command(bootstrap_command)
+    app.cli.add_command(compress_exam_texts_command)
+    app.cli.add_command(import_report_command)
+    app.cli.add_command(rebuild_daily_activity_command)
+    app.cli.add_command(rebuild_revenue_command)
+    app.cli.add_command(rebuild_user_stats_command)
+    app.cli.add_command(seed_synthetic_command)
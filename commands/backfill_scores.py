@@ -0,0 +1,70 @@
+import time
+
+import click
+import sqlalchemy as sa
+from flask.cli import with_appcontext
+
+from models.exts import db
+from models.tcf_exam_model import normalized_score
+
+'''
+Calcul de score_numeric et cefr_level pour les examens enregistrés avant ces colonnes.
+
+Les lignes sont parcourues par plages d'id, un lot (SELECT puis UPDATE groupé) par
+transaction : aucune table n'est verrouillée longtemps et la commande peut être
+relancée sans risque (seuls les scores non encore normalisés sont repris).
+'''
+
+_exams = sa.table(
+    'tcf_exam',
+    sa.column('id'), sa.column('score'), sa.column('score_numeric'), sa.column('cefr_level'),
+)
+
+
+def backfill_batch(connection, after_id, batch_size):
+    """Normalise un lot d'examens d'id > after_id ; retourne (dernier id lu, lignes mises à jour)"""
+    rows = connection.execute(
+        sa.select(_exams.c.id, _exams.c.score)
+        .where(_exams.c.id > after_id, _exams.c.score.isnot(None), _exams.c.score_numeric.is_(None))
+        .order_by(_exams.c.id)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return None, 0
+
+    updates = []
+    for exam_id, score in rows:
+        score_numeric, level = normalized_score(score)
+        if score_numeric is not None:
+            updates.append({'exam_id': exam_id, 'score_numeric': score_numeric, 'level': level})
+    if updates:
+        connection.execute(
+            _exams.update()
+            .where(_exams.c.id == sa.bindparam('exam_id'))
+            .values(score_numeric=sa.bindparam('score_numeric'), cefr_level=sa.bindparam('level')),
+            updates,
+        )
+    return rows[-1][0], len(updates)
+
+
+def backfill_exam_scores(engine, batch_size=5000, echo=None):
+    """Normalise tous les scores manquants, un commit par lot ; retourne le nombre de lignes"""
+    after_id, total = 0, 0
+    while True:
+        with engine.begin() as connection:
+            after_id, updated = backfill_batch(connection, after_id, batch_size)
+        if after_id is None:
+            return total
+        total += updated
+        if echo:
+            echo(f"- {total} examens normalisés (id <= {after_id})")
+
+
+@click.command('backfill-exam-scores')
+@click.option('--batch-size', default=5000, show_default=True, help="Examens par lot (un commit par lot)")
+@with_appcontext
+def backfill_exam_scores_command(batch_size):
+    """Calcule score_numeric et cefr_level des examens qui ne les ont pas encore."""
+    started_at = time.perf_counter()
+    total = backfill_exam_scores(db.engine, batch_size=batch_size, echo=click.echo)
+    click.echo(f"{total} examens normalisés en {time.perf_counter() - started_at:.1f} s")
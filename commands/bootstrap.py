@@ -0,0 +1,43 @@
+import time
+import click
+from flask.cli import with_appcontext
+from models.exts import db
+
+
+def bootstrap_database():
+    """Crée les tables manquantes et insère les données par défaut (idempotent)"""
+    # Importer explicitement les modèles pour l'enregistrement des tables
+    from models.model import User
+    from models.order_model import Order, OrderNumberCounter
+    from models.credit_model import CreditLedger
+    from models.subscription_pack_model import SubscriptionPack, PackFeature
+    from models.tcf_model import TCFSubject, TCFTask, TCFDocument
+    from models.tcf_exam_model import TCFExam
+    from models.exam_submission_model import ExamSubmission
+    from models.user_stats_model import UserStats
+    from models.activity_model import DailyActivity, UserDailyActivity
+    from models.revenue_model import RevenueDaily
+    from models.tcf_attempt_model import TCFAttempt
+    from models.tcf_model_oral import TCFOralSubject, TCFOralTask
+    from services.crud.tcf_admin import create_test_subjects
+    from services.crud.subscription_pack_admin import create_default_packs
+
+    # create_all est idempotent: seules les tables absentes sont créées.
+    # Uniquement sur la base principale: les réplicas (binds replica_N) sont alimentés par réplication.
+    db.create_all(bind_key=None)
+    # Insérer les données par défaut (les fonctions gèrent déjà les doublons)
+    subjects_created = create_test_subjects()
+    packs_created = create_default_packs()
+    return subjects_created, packs_created
+
+
+@click.command('bootstrap')
+@with_appcontext
+def bootstrap_command():
+    """Crée le schéma de la base et insère les sujets et packs par défaut."""
+    started_at = time.perf_counter()
+    subjects_created, packs_created = bootstrap_database()
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+    click.echo(f"Schéma vérifié en {elapsed_ms:.1f} ms")
+    click.echo(f"- Sujets de test: {'créés' if subjects_created else 'déjà présents'}")
+    click.echo(f"- Packs par défaut: {'créés' if packs_created else 'déjà présents'}")
@@ -0,0 +1,127 @@
+import time
+
+import click
+import sqlalchemy as sa
+from flask.cli import with_appcontext
+
+from models.exts import db
+from models.tcf_exam_model import COMPRESSED_TEXT_FIELDS, compress_text, decompress_text
+
+'''
+Compression des textes IA des examens enregistrés en clair (reponse_ia,
+traduction_reponse_ia, points_fort, point_faible -> colonnes <nom>_z).
+
+Comme `flask backfill-exam-scores` : plages d'id, un lot (SELECT puis UPDATE groupé)
+par transaction, relançable sans risque (seules les lignes encore en clair sont
+reprises). La commande affiche le volume avant/après et le débit.
+'''
+
+_exams = sa.table(
+    'tcf_exam',
+    sa.column('id'),
+    *[sa.column(name) for name in COMPRESSED_TEXT_FIELDS],
+    *[sa.column(f'{name}_z') for name in COMPRESSED_TEXT_FIELDS],
+)
+
+
+def _size(value):
+    return len(value.encode('utf-8')) if isinstance(value, str) else len(value or b'')
+
+
+def compress_batch(connection, after_id, batch_size):
+    """Compresse les textes en clair d'un lot d'examens d'id > after_id.
+
+    Retourne (dernier id lu, lignes mises à jour, octets en clair, octets compressés).
+    """
+    plain = [_exams.c[name] for name in COMPRESSED_TEXT_FIELDS]
+    rows = connection.execute(
+        sa.select(_exams.c.id, *plain)
+        .where(_exams.c.id > after_id, sa.or_(*[column.isnot(None) for column in plain]))
+        .order_by(_exams.c.id)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return None, 0, 0, 0
+
+    updates, before, after = [], 0, 0
+    for exam_id, *texts in rows:
+        update = {'exam_id': exam_id}
+        for name, text in zip(COMPRESSED_TEXT_FIELDS, texts):
+            update[f'{name}_z'] = compress_text(text)
+            before += _size(text)
+            after += _size(update[f'{name}_z'])
+        updates.append(update)
+    connection.execute(
+        _exams.update()
+        .where(_exams.c.id == sa.bindparam('exam_id'))
+        .values({
+            **{name: None for name in COMPRESSED_TEXT_FIELDS},
+            # Champ sans texte en clair (ligne en partie compressée, écrite par un ancien
+            # worker pendant un déploiement) : texte compressé existant conservé
+            **{f'{name}_z': sa.func.coalesce(sa.bindparam(f'{name}_z'), _exams.c[f'{name}_z'])
+               for name in COMPRESSED_TEXT_FIELDS},
+        }),
+        updates,
+    )
+    return rows[-1][0], len(updates), before, after
+
+
+def decompress_batch(connection, after_id, batch_size):
+    """Remet en clair les textes compressés d'un lot d'examens d'id > after_id (retour arrière).
+
+    Retourne (dernier id lu, lignes mises à jour).
+    """
+    stored = [_exams.c[f'{name}_z'] for name in COMPRESSED_TEXT_FIELDS]
+    rows = connection.execute(
+        sa.select(_exams.c.id, *stored)
+        .where(_exams.c.id > after_id, sa.or_(*[column.isnot(None) for column in stored]))
+        .order_by(_exams.c.id)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return None, 0
+
+    connection.execute(
+        _exams.update()
+        .where(_exams.c.id == sa.bindparam('exam_id'))
+        .values({
+            **{name: sa.func.coalesce(sa.bindparam(f'plain_{name}'), _exams.c[name])
+               for name in COMPRESSED_TEXT_FIELDS},
+            **{f'{name}_z': None for name in COMPRESSED_TEXT_FIELDS},
+        }),
+        [
+            {'exam_id': exam_id,
+             **{f'plain_{name}': decompress_text(data) for name, data in zip(COMPRESSED_TEXT_FIELDS, blobs)}}
+            for exam_id, *blobs in rows
+        ],
+    )
+    return rows[-1][0], len(rows)
+
+
+def compress_exam_texts(engine, batch_size=2000, echo=None):
+    """Compresse tous les textes en clair, un commit par lot ; retourne (lignes, octets avant, octets après)"""
+    after_id, total, before, after = 0, 0, 0, 0
+    while True:
+        with engine.begin() as connection:
+            after_id, updated, batch_before, batch_after = compress_batch(connection, after_id, batch_size)
+        if after_id is None:
+            return total, before, after
+        total += updated
+        before += batch_before
+        after += batch_after
+        if echo:
+            echo(f"- {total} examens compressés (id <= {after_id})")
+
+
+@click.command('compress-exam-texts')
+@click.option('--batch-size', default=2000, show_default=True, help="Examens par lot (un commit par lot)")
+@with_appcontext
+def compress_exam_texts_command(batch_size):
+    """Compresse les textes IA des examens encore stockés en clair."""
+    started_at = time.perf_counter()
+    total, before, after = compress_exam_texts(db.engine, batch_size=batch_size, echo=click.echo)
+    elapsed = time.perf_counter() - started_at
+    click.echo(f"{total} examens compressés en {elapsed:.1f} s")
+    if before:
+        click.echo(f"- textes : {before / 1e6:.1f} Mo -> {after / 1e6:.1f} Mo ({after / before:.0%})")
+        click.echo(f"- débit : {total / elapsed:.0f} examens/s, {before / 1e6 / elapsed:.1f} Mo/s")
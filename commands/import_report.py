@@ -0,0 +1,86 @@
+import json
+import os
+import subprocess
+import sys
+import click
+
+# Modules dont l'import est volontairement différé (voir services/lazy_imports.py)
+DEFERRED_MODULES = ('edge_tts', 'aiohttp', 'bs4', 'markdown', 'stripe', 'groq')
+
+_PROBE = (
+    "import json, sys, app\n"
+    "from services.lazy_imports import registry_status\n"
+    "print('IMPORT_REPORT ' + json.dumps({'lazy': registry_status(), 'modules': sorted(sys.modules)}))\n"
+)
+
+
+def parse_importtime(stderr):
+    """Agrège la sortie de `python -X importtime` par paquet de premier niveau.
+
+    Retourne {paquet: temps propre cumulé en ms}.
+    """
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        self_us, _, name = parts
+        try:
+            self_us = int(self_us.strip())
+        except ValueError:
+            # Ligne d'en-tête "self [us] | cumulative | imported package"
+            continue
+        package = name.strip().split('.')[0]
+        totals[package] = totals.get(package, 0) + self_us / 1000
+    return totals
+
+
+def run_import_probe(app_dir, env=None):
+    """Importe `app` dans un interpréteur neuf et retourne (temps par paquet, état du probe)"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE],
+        cwd=app_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise click.ClickException(f"Import de l'application impossible:\n{result.stderr[-2000:]}")
+
+    probe = {}
+    for line in result.stdout.splitlines():
+        if line.startswith('IMPORT_REPORT '):
+            probe = json.loads(line[len('IMPORT_REPORT '):])
+    return parse_importtime(result.stderr), probe
+
+
+@click.command('import-report')
+@click.option('--top', default=15, show_default=True, help="Nombre de paquets affichés")
+@click.option('--budget-ms', type=float, default=None,
+              help="Temps d'import total maximal; code de sortie 1 si dépassé")
+def import_report_command(top, budget_ms):
+    """Mesure le coût d'import de l'application par paquet tiers."""
+    app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    totals, probe = run_import_probe(app_dir, env=dict(os.environ))
+    total_ms = sum(totals.values())
+
+    click.echo(f"Import de l'application: {total_ms:.0f} ms (somme des temps propres)")
+    click.echo(f"{'Paquet':<28}{'ms':>10}{'%':>8}")
+    for package, ms in sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]:
+        click.echo(f"{package:<28}{ms:>10.1f}{(ms / total_ms * 100 if total_ms else 0):>7.1f}%")
+
+    loaded = set(probe.get('modules', []))
+    eager = [name for name in DEFERRED_MODULES if name in loaded]
+    click.echo("")
+    click.echo("Modules différés: " + ", ".join(
+        f"{name} ({'chargé' if ms is not None else 'différé'})"
+        for name, ms in probe.get('lazy', {}).items()
+    ))
+    if eager:
+        click.echo(f"Attention: modules chargés dès l'import: {', '.join(eager)}")
+
+    if budget_ms is not None and total_ms > budget_ms:
+        click.echo(f"Budget dépassé: {total_ms:.0f} ms > {budget_ms:.0f} ms", err=True)
+        sys.exit(1)
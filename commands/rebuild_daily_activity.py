@@ -0,0 +1,17 @@
+import time
+
+import click
+from flask.cli import with_appcontext
+
+from models.activity_model import rebuild_daily_activity
+from models.exts import db
+
+
+@click.command('rebuild-daily-activity')
+@click.option('--batch-size', default=1000, show_default=True, help="Utilisateurs par lot (un commit par lot)")
+@with_appcontext
+def rebuild_daily_activity_command(batch_size):
+    """Recalcule daily_activity et user_daily_activity depuis tcf_exam et user."""
+    started_at = time.perf_counter()
+    days = rebuild_daily_activity(db.engine, batch_size=batch_size, echo=click.echo)
+    click.echo(f"{days} jours recalculés en {time.perf_counter() - started_at:.1f} s")
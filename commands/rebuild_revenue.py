@@ -0,0 +1,17 @@
+import time
+
+import click
+from flask.cli import with_appcontext
+
+from models.exts import db
+from models.revenue_model import rebuild_revenue
+
+
+@click.command('rebuild-revenue')
+@with_appcontext
+def rebuild_revenue_command():
+    """Recalcule revenue_daily depuis orders."""
+    started_at = time.perf_counter()
+    with db.engine.begin() as connection:
+        rows = rebuild_revenue(connection)
+    click.echo(f"{rows} lignes de revenus recalculées en {time.perf_counter() - started_at:.1f} s")
@@ -0,0 +1,17 @@
+import time
+
+import click
+from flask.cli import with_appcontext
+
+from models.exts import db
+from models.user_stats_model import rebuild_user_stats
+
+
+@click.command('rebuild-user-stats')
+@click.option('--batch-size', default=1000, show_default=True, help="Utilisateurs par lot (un commit par lot)")
+@with_appcontext
+def rebuild_user_stats_command(batch_size):
+    """Recalcule la table user_stats depuis tcf_exam (réparation d'une dérive)."""
+    started_at = time.perf_counter()
+    total = rebuild_user_stats(db.engine, batch_size=batch_size, echo=click.echo)
+    click.echo(f"{total} utilisateurs recalculés en {time.perf_counter() - started_at:.1f} s")
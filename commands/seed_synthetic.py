@@ -0,0 +1,399 @@
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import event, func
+from werkzeug.security import generate_password_hash
+
+from models.exts import db
+
+'''
+Génération de données synthétiques à l'échelle de la production (tests de charge).
+
+Les lignes sont insérées par lots avec des INSERT multi-lignes (executemany du Core
+SQLAlchemy, sans objets ORM) et des identifiants attribués à l'avance. L'activité est
+asymétrique comme en production : quelques utilisateurs passent la plupart des
+examens (loi de Pareto), certains sujets sont beaucoup plus populaires, les dates sont
+concentrées sur les derniers mois et les scores sont des niveaux CECRL textuels.
+
+    flask seed-synthetic --users 200000 --exams 5000000 --orders 300000
+'''
+
+SYNTHETIC_EMAIL_DOMAIN = 'synthetic.invalid'
+SYNTHETIC_PASSWORD = 'synthetic'
+
+# Scores tels que renvoyés par les agents IA (texte), avec leur fréquence relative
+SCORE_WEIGHTS = (
+    ('Niveau C2', 3), ('Niveau C1', 12), ('Niveau B2', 25), ('Niveau B1', 22),
+    ('Niveau A2', 10), ('Niveau A1', 3), ('C1', 6), ('B2', 8), ('B1', 5),
+    ('NCLC 9', 2), ('NCLC 7', 2), ('14', 1), ('16', 1),
+)
+
+# (plan, montant, poids) d'après les packs par défaut
+PLANS = (('standard', 14.99, 50), ('performance', 29.99, 35), ('pro', 49.99, 15))
+
+# (statut commande, statut paiement, méthode, poids)
+ORDER_STATUSES = (
+    ('paid', 'completed', 'card', 78),
+    ('pending', 'pending', None, 12),
+    ('cancelled', 'cancelled', None, 6),
+    ('refunded', 'refunded', 'card', 4),
+)
+
+FIRST_NAMES = ('Amina', 'Lucas', 'Yasmine', 'Hugo', 'Fatima', 'Louis', 'Sofia', 'Mohamed', 'Chloé', 'Karim')
+LAST_NAMES = ('Martin', 'Benali', 'Tremblay', 'Nguyen', 'Diallo', 'Roy', 'Haddad', 'Gagnon', 'Dubois', 'Mensah')
+
+FILLER = (
+    "Aujourd'hui, la question de l'environnement occupe une place centrale dans le débat public. "
+    "Selon moi, chaque citoyen peut agir à son échelle, par exemple en réduisant ses déplacements "
+    "en voiture ou en consommant des produits locaux. Cependant, les gouvernements doivent aussi "
+    "prendre des mesures ambitieuses. "
+)
+
+
+def _filler(rng, size):
+    if size <= 0:
+        return None
+    start = rng.randrange(len(FILLER))
+    repeated = FILLER * (size // len(FILLER) + 2)
+    return repeated[start:start + size]
+
+
+def _next_id(model):
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+
+def _cum_weights(weights):
+    total, cumulative = 0, []
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    return cumulative
+
+
+def _recent_date(rng, now, days):
+    # Densité croissante vers aujourd'hui: la moitié des lignes sur le dernier quart de la période
+    return now - timedelta(days=days * rng.random() ** 2, seconds=rng.randrange(86400))
+
+
+class SyntheticSeeder:
+    """Insère par lots des utilisateurs, sujets, examens, tentatives et commandes synthétiques"""
+
+    def __init__(self, seed=42, batch_size=10000, days=365, text_bytes=400, echo=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.days = days
+        self.text_bytes = text_bytes
+        self.now = datetime.utcnow()
+        self.echo = echo or (lambda message: None)
+        self.counts = Counter()
+
+    def _insert(self, model, rows):
+        """Insère `rows` (itérable de dicts) par lots de batch_size, un commit par lot"""
+        table = model.__table__
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._flush(table, batch)
+                batch = []
+        if batch:
+            self._flush(table, batch)
+
+    def _flush(self, table, batch):
+        db.session.execute(table.insert(), batch)
+        db.session.commit()
+        self.counts[table.name] += len(batch)
+
+    @contextmanager
+    def _load_tuning(self):
+        """Réglages de chargement sur chaque connexion prise au pool pendant le seed.
+
+        Chaque lot est commité : la connexion retourne au pool et le lot suivant peut en
+        obtenir une autre (une nouvelle connexion par lot avec le NullPool de SQLite). Les
+        réglages sont donc appliqués à chaque sortie du pool et annulés à chaque retour.
+        """
+        engine = db.engine
+        if engine.dialect.name == 'sqlite':
+            # Pas de fsync par commit pendant le chargement (données jetables)
+            tune = ('PRAGMA synchronous = OFF', 'PRAGMA journal_mode = MEMORY')
+            restore = ('PRAGMA synchronous = FULL', 'PRAGMA journal_mode = DELETE')
+        elif engine.dialect.name in ('mysql', 'mariadb'):
+            tune, restore = ('SET SESSION unique_checks = 0',), ('SET SESSION unique_checks = 1',)
+        else:
+            yield
+            return
+
+        def execute(dbapi_connection, statements):
+            cursor = dbapi_connection.cursor()
+            try:
+                for statement in statements:
+                    cursor.execute(statement)
+            finally:
+                cursor.close()
+
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            execute(dbapi_connection, tune)
+
+        def on_checkin(dbapi_connection, connection_record):
+            # Connexion invalidée : rien à rendre au pool
+            if dbapi_connection is not None:
+                execute(dbapi_connection, restore)
+
+        event.listen(engine, 'checkout', on_checkout)
+        event.listen(engine, 'checkin', on_checkin)
+        try:
+            yield
+        finally:
+            event.remove(engine, 'checkout', on_checkout)
+            event.remove(engine, 'checkin', on_checkin)
+
+    def run(self, users, subjects, exams, orders):
+        from models.activity_model import rebuild_daily_activity
+        from models.model import User
+        from models.order_model import Order
+        from models.revenue_model import rebuild_revenue
+        from models.tcf_attempt_model import TCFAttempt
+        from models.tcf_exam_model import TCFExam
+        from models.tcf_model import TCFDocument, TCFSubject, TCFTask
+
+        if (exams or orders) and not users:
+            raise click.ClickException("--users doit être > 0 pour générer des examens ou des commandes")
+        if exams and not subjects:
+            raise click.ClickException("--subjects doit être > 0 pour générer des examens")
+
+        with self._load_tuning():
+            user_ids = self.seed_users(User, users)
+            subject_tasks = self.seed_subjects(TCFSubject, TCFTask, TCFDocument, subjects)
+            if exams:
+                self.seed_exams(TCFExam, TCFAttempt, user_ids, subject_tasks, exams)
+            if orders:
+                self.seed_orders(Order, user_ids, orders)
+                # Commandes insérées hors ORM: cumuls de revenus recalculés
+                with db.engine.begin() as connection:
+                    self.counts['revenue_daily'] += rebuild_revenue(connection)
+            if user_ids:
+                # Utilisateurs et examens insérés hors ORM: activité quotidienne recalculée en lot
+                self.counts['daily_activity'] += rebuild_daily_activity(db.engine, after_user_id=min(user_ids) - 1)
+            # Connexion encore tenue par la session (lecture sans lot à écrire) : rendue au
+            # pool avant de retirer les réglages
+            db.session.commit()
+        return dict(self.counts)
+
+    def seed_users(self, User, count):
+        rng = self.rng
+        first_id = _next_id(User)
+        password = generate_password_hash(SYNTHETIC_PASSWORD)
+        self.echo(f"- {count} utilisateurs à partir de l'id {first_id}")
+
+        def rows():
+            for user_id in range(first_id, first_id + count):
+                plan = rng.choices(PLANS, weights=[w for _, _, w in PLANS])[0][0] if rng.random() < 0.6 else None
+                yield {
+                    'id': user_id,
+                    'username': f"synth_{user_id}",
+                    'email': f"synth_{user_id}@{SYNTHETIC_EMAIL_DOMAIN}",
+                    'password': password,
+                    'nom': rng.choice(LAST_NAMES),
+                    'prenom': rng.choice(FIRST_NAMES),
+                    'tel': f"+1514{rng.randrange(10 ** 7):07d}",
+                    'date_create': _recent_date(rng, self.now, self.days * 2),
+                    'subscription_plan': plan,
+                    'payment_status': 'paid' if plan else 'pending',
+                    'role': 'client',
+                    'sold': float(rng.randrange(0, 30)) if plan else 0.0,
+                    'total_sold': float(rng.randrange(0, 60)) if plan else 0.0,
+                }
+
+        self._insert(User, rows())
+        return list(range(first_id, first_id + count))
+
+    def seed_subjects(self, TCFSubject, TCFTask, TCFDocument, count):
+        """Sujets écrits (3 tâches) et oraux, chaque tâche avec 1 ou 2 documents"""
+        rng = self.rng
+        subject_id, task_id, document_id = _next_id(TCFSubject), _next_id(TCFTask), _next_id(TCFDocument)
+        subjects, tasks, documents = [], [], []
+        subject_tasks = []
+        for index in range(count):
+            subject_type = 'Écrit' if rng.random() < 0.7 else 'Oral'
+            subjects.append({
+                'id': subject_id,
+                'name': f"Sujet synthétique {subject_id}",
+                'date': (self.now - timedelta(days=rng.randrange(self.days))).strftime('%Y-%m-%d'),
+                'status': 'Actif' if rng.random() < 0.9 else 'Inactif',
+                'duration': 60,
+                'subject_type': subject_type,
+                'description': _filler(rng, 120),
+                'combination': f"N{rng.randint(1, 40)}",
+            })
+            task_ids = []
+            for number in range(1, 4):
+                tasks.append({
+                    'id': task_id,
+                    'title': f"Tâche {number}",
+                    'structure': _filler(rng, 80),
+                    'instructions': _filler(rng, 200),
+                    'min_word_count': 60 * number,
+                    'max_word_count': 120 * number,
+                    'duration': 20,
+                    'subject_id': subject_id,
+                })
+                for _ in range(rng.randint(1, 2)):
+                    documents.append({'id': document_id, 'content': _filler(rng, 600), 'task_id': task_id})
+                    document_id += 1
+                task_ids.append(task_id)
+                task_id += 1
+            subject_tasks.append((subject_id, 'oral' if subject_type == 'Oral' else 'écrit', task_ids))
+            subject_id += 1
+
+        self.echo(f"- {count} sujets, {len(tasks)} tâches, {len(documents)} documents")
+        self._insert(TCFSubject, subjects)
+        self._insert(TCFTask, tasks)
+        self._insert(TCFDocument, documents)
+        return subject_tasks
+
+    def seed_exams(self, TCFExam, TCFAttempt, user_ids, subject_tasks, count):
+        from models.tcf_exam_model import compress_text, normalized_score
+        from models.user_stats_model import rebuild_user_stats
+
+        rng = self.rng
+        # Activité par utilisateur (Pareto) et popularité des sujets (Zipf)
+        user_weights = _cum_weights([rng.paretovariate(1.16) for _ in user_ids])
+        subject_weights = _cum_weights([1 / (rank + 1) for rank in range(len(subject_tasks))])
+        scores, score_weights = zip(*SCORE_WEIGHTS)
+        score_weights = _cum_weights(score_weights)
+        normalized = {score: normalized_score(score) for score in scores + (None,)}
+        pairs = Counter()
+        last_attempt = {}
+        first_id = _next_id(TCFExam)
+        self.echo(f"- {count} examens à partir de l'id {first_id}")
+
+        def rows():
+            exam_id = first_id
+            remaining = count
+            while remaining:
+                size = min(self.batch_size, remaining)
+                batch_users = rng.choices(user_ids, cum_weights=user_weights, k=size)
+                batch_subjects = rng.choices(subject_tasks, cum_weights=subject_weights, k=size)
+                batch_scores = rng.choices(scores, cum_weights=score_weights, k=size)
+                for user_id, (subject_id, type_exam, task_ids), score in zip(batch_users, batch_subjects, batch_scores):
+                    date_passage = _recent_date(rng, self.now, self.days)
+                    key = (user_id, subject_id)
+                    pairs[key] += 1
+                    if date_passage > last_attempt.get(key, datetime.min):
+                        last_attempt[key] = date_passage
+                    score = score if rng.random() < 0.97 else None
+                    score_numeric, level = normalized[score]
+                    yield {
+                        'id': exam_id,
+                        'id_user': user_id,
+                        'id_subject': subject_id,
+                        'id_task': rng.choice(task_ids),
+                        'reponse_utilisateur': _filler(rng, self.text_bytes),
+                        'score': score,
+                        'score_numeric': score_numeric,
+                        'cefr_level': level,
+                        # Textes IA stockés compressés (voir models/tcf_exam_model.py)
+                        'reponse_ia_z': compress_text(_filler(rng, self.text_bytes)),
+                        'points_fort_z': compress_text(_filler(rng, self.text_bytes // 4)),
+                        'point_faible_z': compress_text(_filler(rng, self.text_bytes // 4)),
+                        'traduction_reponse_ia_z': None,
+                        'type_exam': type_exam,
+                        'date_passage': date_passage,
+                    }
+                    exam_id += 1
+                remaining -= size
+
+        self._insert(TCFExam, rows())
+
+        # Une tentative par couple (utilisateur, sujet), cohérente avec les examens générés
+        def attempts():
+            for (user_id, subject_id), attempt_count in pairs.items():
+                last = last_attempt[(user_id, subject_id)]
+                yield {
+                    'id_user': user_id,
+                    'id_subject': subject_id,
+                    'attempt_count': attempt_count,
+                    'last_attempt_date': last,
+                    'created_at': last,
+                    'updated_at': last,
+                }
+
+        self.echo(f"- {len(pairs)} tentatives")
+        self._insert(TCFAttempt, attempts())
+
+        # Examens insérés hors ORM: statistiques des nouveaux utilisateurs recalculées en lot
+        self.counts['user_stats'] += rebuild_user_stats(db.engine, after_user_id=min(user_ids) - 1)
+
+    def seed_orders(self, Order, user_ids, count):
+        from models.order_model import allocate_order_numbers
+
+        rng = self.rng
+        user_weights = _cum_weights([rng.paretovariate(1.5) for _ in user_ids])
+        plan_weights = _cum_weights([w for _, _, w in PLANS])
+        status_weights = _cum_weights([w for *_, w in ORDER_STATUSES])
+        first_id = _next_id(Order)
+        # Plage de numéros réservée d'un coup dans le compteur des commandes
+        first_number = allocate_order_numbers(count)
+        self.echo(f"- {count} commandes à partir de Ordre#{first_number:07d}")
+
+        def rows():
+            for offset in range(count):
+                user_id = rng.choices(user_ids, cum_weights=user_weights)[0]
+                plan, amount, _ = rng.choices(PLANS, cum_weights=plan_weights)[0]
+                status, payment_status, method, _ = rng.choices(ORDER_STATUSES, cum_weights=status_weights)[0]
+                created_at = _recent_date(rng, self.now, self.days)
+                paid_at = created_at + timedelta(minutes=rng.randint(1, 10)) if status in ('paid', 'refunded') else None
+                yield {
+                    'id': first_id + offset,
+                    'order_number': f"Ordre#{first_number + offset:07d}",
+                    'user_id': user_id,
+                    'subscription_plan': plan,
+                    'amount': amount,
+                    'currency': 'USD',
+                    'status': status,
+                    'payment_status': payment_status,
+                    'payment_method': method,
+                    'stripe_session_id': f"cs_synth_{first_id + offset}",
+                    'customer_email': f"synth_{user_id}@{SYNTHETIC_EMAIL_DOMAIN}",
+                    'customer_name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    'created_at': created_at,
+                    'updated_at': paid_at or created_at,
+                    'paid_at': paid_at,
+                    'cancelled_at': created_at + timedelta(days=1) if status == 'cancelled' else None,
+                    'refunded_at': paid_at + timedelta(days=3) if status == 'refunded' else None,
+                    'refund_reason': 'Demande du client' if status == 'refunded' else None,
+                }
+
+        self._insert(Order, rows())
+
+
+@click.command('seed-synthetic')
+@click.option('--users', default=1000, show_default=True, help="Utilisateurs (clients) à créer")
+@click.option('--subjects', default=200, show_default=True, help="Sujets à créer (3 tâches chacun)")
+@click.option('--exams', default=20000, show_default=True, help="Examens passés à générer")
+@click.option('--orders', default=1500, show_default=True, help="Commandes à générer")
+@click.option('--days', default=365, show_default=True, help="Période couverte par l'activité (jours)")
+@click.option('--text-bytes', default=400, show_default=True,
+              help="Taille des textes d'examen (réponse, correction IA)")
+@click.option('--batch-size', default=10000, show_default=True, help="Lignes par INSERT multi-lignes et par commit")
+@click.option('--seed', default=42, show_default=True, help="Graine aléatoire (jeu de données reproductible)")
+@click.option('--yes', is_flag=True, help="Ne pas demander de confirmation pour une base serveur")
+@with_appcontext
+def seed_synthetic_command(users, subjects, exams, orders, days, text_bytes, batch_size, seed, yes):
+    """Insère des données synthétiques réalistes pour les tests de charge."""
+    click.echo(f"Base: {db.engine.url.render_as_string(hide_password=True)}")
+    if db.engine.dialect.name != 'sqlite' and not yes:
+        click.confirm("Insérer des données synthétiques dans cette base serveur ?", abort=True)
+    started_at = time.perf_counter()
+    seeder = SyntheticSeeder(seed=seed, batch_size=batch_size, days=days, text_bytes=text_bytes, echo=click.echo)
+    counts = seeder.run(users=users, subjects=subjects, exams=exams, orders=orders)
+    elapsed = time.perf_counter() - started_at
+    total = sum(counts.values())
+    click.echo(f"{total} lignes insérées en {elapsed:.1f} s ({total / max(elapsed, 1e-9):,.0f} lignes/s)")
+    for table, count in sorted(counts.items()):
+        click.echo(f"- {table}: {count}")
@@ -4,6 +4,35 @@ from decouple import config
 BASE_DIR = os.path.dirname(os.path.realpath(__file__))
 
 
+def database_engine_options(database_uri):
+    """Options du moteur SQLAlchemy (pool, pre-ping, timeout des requêtes).
+
+    Chaque valeur peut être surchargée par variable d'environnement. SQLite n'utilise
+    pas de QueuePool : aucune option ne lui est appliquée (réglages par défaut du moteur).
+    """
+    if database_uri.startswith('sqlite'):
+        return {}
+
+    options = {
+        # Connexions permanentes du pool et connexions supplémentaires temporaires
+        'pool_size': config('DB_POOL_SIZE', cast=int, default=10),
+        'max_overflow': config('DB_MAX_OVERFLOW', cast=int, default=20),
+        # Attente maximale (s) d'une connexion libre avant erreur
+        'pool_timeout': config('DB_POOL_TIMEOUT', cast=int, default=10),
+        # Recycler avant le wait_timeout de MariaDB pour éviter "MySQL server has gone away"
+        'pool_recycle': config('DB_POOL_RECYCLE', cast=int, default=280),
+        'pool_pre_ping': config('DB_POOL_PRE_PING', cast=bool, default=True),
+    }
+
+    # Durée maximale d'une requête SQL côté serveur (s, 0 = illimitée)
+    statement_timeout = config('DB_STATEMENT_TIMEOUT', cast=float, default=30)
+    if statement_timeout and database_uri.startswith(('mysql', 'mariadb')):
+        options['connect_args'] = {
+            'init_command': f"SET SESSION max_statement_time={statement_timeout:g}"
+        }
+    return options
+
+
 class Config:
     SECRET_KEY = config('SECRET_KEY', default='dev-secret-key-change-in-production')
     SQLALCHEMY_TRACK_MODIFICATIONS = config(
@@ -35,18 +64,53 @@ class Config:
     SIMULATE_TTS = config('SIMULATE_TTS', cast=bool, default=False)
     URL_BACKEND = config('URL_BACKEND', default='http://localhost:5001')
 
+    # Webhooks des agents IA (n8n) appelés par services/proxy
+    N8N_BASE_URL = config('N8N_BASE_URL', default='https://n8n.expressiontcf.com')
+
+    # Réplicas en lecture (URLs séparées par des virgules, vide = tout sur la principale)
+    DATABASE_REPLICA_URLS = config('DATABASE_REPLICA_URLS', default='')
+    # Durée (s) pendant laquelle un utilisateur qui vient d'écrire lit sur la principale
+    REPLICA_READ_YOUR_WRITES_SECONDS = config('REPLICA_READ_YOUR_WRITES_SECONDS', cast=int, default=10)
+
+    # Jeton Bearer exigé par GET /metrics (vide = accès libre, à restreindre côté proxy)
+    METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+    # Détection N+1 / budgets SQL par ressource: off, warn ou raise (voir services/monitoring/query_budget.py)
+    QUERY_BUDGET_MODE = config('QUERY_BUDGET_MODE', default='off')
+    QUERY_REPEAT_THRESHOLD = config('QUERY_REPEAT_THRESHOLD', cast=int, default=5)
+
+    # Logs structurés (voir services/monitoring/structured_logging.py)
+    LOG_LEVEL = config('LOG_LEVEL', default='INFO')
+    LOG_FORMAT = config('LOG_FORMAT', default='json')
+    # Écriture par un thread dédié: les requêtes ne bloquent pas sur stdout
+    LOG_ASYNC = config('LOG_ASYNC', cast=bool, default=True)
+    LOG_QUEUE_SIZE = config('LOG_QUEUE_SIZE', cast=int, default=10000)
+    # Au plus LOG_RATE_LIMIT_BURST messages identiques par fenêtre de LOG_RATE_LIMIT_WINDOW s (0 = illimité)
+    LOG_RATE_LIMIT_BURST = config('LOG_RATE_LIMIT_BURST', cast=int, default=20)
+    LOG_RATE_LIMIT_WINDOW = config('LOG_RATE_LIMIT_WINDOW', cast=float, default=10.0)
+
+    # Durée (s) du cache par worker de l'utilisateur connecté (voir services/auth/principal.py, 0 = désactivé)
+    PRINCIPAL_CACHE_SECONDS = config('PRINCIPAL_CACHE_SECONDS', cast=int, default=60)
+
+    # Numéros de commande réservés par bloc et par worker (1 = numérotation sans trou entre workers)
+    ORDER_NUMBER_BLOCK_SIZE = config('ORDER_NUMBER_BLOCK_SIZE', cast=int, default=20)
+
 
 class DevConfig(Config):
     # Permet d'utiliser DATABASE_URL si présent, sinon on retombe sur SQLite dev.db
     #SQLALCHEMY_DATABASE_URI = config('DATABASE_URL', default="sqlite:///"+os.path.join(BASE_DIR, 'dev.db'))
     SQLALCHEMY_DATABASE_URI = "sqlite:///"+os.path.join(BASE_DIR, 'dev.db')
     DEBUG = True
-    SQLALCHEMY_ECHO = True
+    # L'écho SQL écrit chaque requête sur stdout de façon synchrone: à activer au besoin
+    SQLALCHEMY_ECHO = config('SQLALCHEMY_ECHO', cast=bool, default=False)
+    QUERY_BUDGET_MODE = config('QUERY_BUDGET_MODE', default='warn')
+    LOG_FORMAT = config('LOG_FORMAT', default='text')
 
 
 class ProdConfig(Config):
     STRIPE_MODE = 'live'
     SQLALCHEMY_DATABASE_URI = config('DATABASE_URL', default="sqlite:///"+os.path.join(BASE_DIR, 'dev.db'))
+    SQLALCHEMY_ENGINE_OPTIONS = database_engine_options(SQLALCHEMY_DATABASE_URI)
     DEBUG = False
     SQLALCHEMY_ECHO = False
 
@@ -56,3 +120,5 @@ class TestConfig(Config):
     #DEBUG = True
     SQLALCHEMY_ECHO = False
     TESTING = True
+    QUERY_BUDGET_MODE = 'raise'
+    LOG_ASYNC = False
@@ -0,0 +1,12 @@
+# Point d'entrée WSGI du mode worker coopératif (gevent).
+#
+# Le monkey-patching doit précéder TOUT autre import : les verrous créés à l'import
+# (rate limiting Groq, registre des imports différés, pool SQLAlchemy) et les sockets
+# (requests, PyMySQL) doivent être les versions coopératives de gevent.
+#
+#   gunicorn -c gunicorn.conf.py gevent_wsgi:application
+from gevent import monkey
+
+monkey.patch_all()
+
+from app import application  # noqa: E402,F401
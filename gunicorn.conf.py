@@ -0,0 +1,34 @@
+# Configuration gunicorn (mode worker coopératif par défaut)
+#
+#   gunicorn -c gunicorn.conf.py
+#
+# Avec le worker gevent, chaque requête est un greenlet : les appels longs aux agents
+# IA (proxies n8n, Groq, EdgeTTS) libèrent le processus pendant l'attente réseau au
+# lieu d'immobiliser un thread système. Un seul worker peut ainsi garder des centaines
+# d'appels amont en vol (limité par GUNICORN_WORKER_CONNECTIONS).
+#
+# GUNICORN_WORKER_CLASS=sync revient au modèle historique (un thread par requête).
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '5001')}")
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+workers = int(os.environ.get('GUNICORN_WORKERS', min(multiprocessing.cpu_count(), 4)))
+# Nombre maximal de greenlets (requêtes simultanées) par worker gevent
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+# Threads par worker (worker_class=gthread uniquement)
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+
+# Le worker gevent signale sa vivacité depuis un greenlet dédié : une correction de
+# plusieurs minutes ne déclenche donc pas ce timeout. En mode sync, il doit couvrir
+# la durée maximale d'un appel amont.
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120 if worker_class == 'gevent' else 6000))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# gevent_wsgi applique le monkey-patching avant d'importer l'application
+wsgi_app = 'gevent_wsgi:application' if worker_class == 'gevent' else 'app:application'
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG', '-') or None
+loglevel = os.environ.get('GUNICORN_LOGLEVEL', 'info')
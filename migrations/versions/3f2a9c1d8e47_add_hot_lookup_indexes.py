@@ -0,0 +1,60 @@
+"""Index des colonnes de recherche fréquentes (examens, commandes, utilisateurs)
+
+Revision ID: 3f2a9c1d8e47
+Revises: add_order_table_manual
+Create Date: 2026-10-16 23:10:00.000000
+
+Le schéma de base est créé par `flask bootstrap`, qui crée aussi ces index sur une base
+neuve : les index déjà présents (même nom) sont ignorés.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d8e47'
+down_revision = 'add_order_table_manual'
+branch_labels = None
+depends_on = None
+
+
+# (table, nom de l'index, colonnes), alignés sur les __table_args__ des modèles
+INDEXES = (
+    ('tcf_exam', 'ix_tcf_exam_user_date', ['id_user', 'date_passage']),
+    ('tcf_exam', 'ix_tcf_exam_subject_date', ['id_subject', 'date_passage']),
+    ('tcf_exam', 'ix_tcf_exam_date_passage', ['date_passage']),
+    ('orders', 'ix_orders_user_created', ['user_id', 'created_at']),
+    ('orders', 'ix_orders_status_created', ['status', 'created_at']),
+    ('orders', 'ix_orders_created_at', ['created_at']),
+    ('orders', 'ix_orders_stripe_session_id', ['stripe_session_id']),
+    ('user', 'ix_user_email', ['email']),
+    ('user', 'ix_user_reset_token', ['reset_token']),
+    ('user', 'ix_user_created_by_role', ['created_by', 'role']),
+    ('user', 'ix_user_payment_status', ['payment_status']),
+)
+
+
+def _existing_indexes(inspector, table):
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    existing = {}
+    for table, name, columns in INDEXES:
+        if table not in tables:
+            continue
+        if table not in existing:
+            existing[table] = _existing_indexes(inspector, table)
+        if name not in existing[table]:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    for table, name, columns in reversed(INDEXES):
+        if table in tables and name in _existing_indexes(inspector, table):
+            op.drop_index(name, table_name=table)
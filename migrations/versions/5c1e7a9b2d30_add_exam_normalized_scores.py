@@ -0,0 +1,104 @@
+"""Scores d'examen normalisés à l'écriture (score_numeric, cefr_level)
+
+Revision ID: 5c1e7a9b2d30
+Revises: 8b5e0d7c4a12
+Create Date: 2026-10-17 00:20:00.000000
+
+Ajoute les colonnes et l'index des statistiques client, puis normalise les examens
+existants par lots (même calcul que commands/backfill_scores.py, relançable avec
+`flask backfill-exam-scores`). Le calcul est figé ici : la révision ne dépend pas du
+code applicatif, qui peut évoluer après elle.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e7a9b2d30'
+down_revision = '8b5e0d7c4a12'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = (
+    ('tcf_exam', 'ix_tcf_exam_user_score', ['id_user', 'score_numeric', 'date_passage']),
+)
+
+# Copie figée de models.tcf_exam_model (CEFR_POINTS, normalized_score) à cette révision
+CEFR_POINTS = (('C2', 95), ('C1', 85), ('B2', 75), ('B1', 65), ('A2', 55), ('A1', 45))
+DEFAULT_SCORE_POINTS = 50
+
+_exams = sa.table(
+    'tcf_exam',
+    sa.column('id'), sa.column('score'), sa.column('score_numeric'), sa.column('cefr_level'),
+)
+
+
+def _normalized_score(score):
+    """(score_numeric, cefr_level) d'un score brut, (None, None) sans score"""
+    if not score:
+        return None, None
+    upper = str(score).upper()
+    level = next((level for level, _ in CEFR_POINTS if level in upper), None)
+    try:
+        return float(score), level
+    except (ValueError, TypeError):
+        return (dict(CEFR_POINTS)[level] if level else DEFAULT_SCORE_POINTS), level
+
+
+def _backfill_batch(connection, after_id, batch_size):
+    """Normalise un lot d'examens d'id > after_id ; retourne le dernier id lu (None à la fin)"""
+    rows = connection.execute(
+        sa.select(_exams.c.id, _exams.c.score)
+        .where(_exams.c.id > after_id, _exams.c.score.isnot(None), _exams.c.score_numeric.is_(None))
+        .order_by(_exams.c.id)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return None
+    updates = []
+    for exam_id, score in rows:
+        score_numeric, level = _normalized_score(score)
+        if score_numeric is not None:
+            updates.append({'exam_id': exam_id, 'score_numeric': score_numeric, 'level': level})
+    if updates:
+        connection.execute(
+            _exams.update()
+            .where(_exams.c.id == sa.bindparam('exam_id'))
+            .values(score_numeric=sa.bindparam('score_numeric'), cefr_level=sa.bindparam('level')),
+            updates,
+        )
+    return rows[-1][0]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'tcf_exam' not in inspector.get_table_names():
+        return
+    columns = {column['name'] for column in inspector.get_columns('tcf_exam')}
+    if 'score_numeric' not in columns:
+        op.add_column('tcf_exam', sa.Column('score_numeric', sa.Float(), nullable=True))
+    if 'cefr_level' not in columns:
+        op.add_column('tcf_exam', sa.Column('cefr_level', sa.String(length=2), nullable=True))
+
+    existing = {index['name'] for index in inspector.get_indexes('tcf_exam')}
+    for table, name, index_columns in INDEXES:
+        if name not in existing:
+            op.create_index(name, table, index_columns)
+
+    after_id = 0
+    while after_id is not None:
+        after_id = _backfill_batch(op.get_bind(), after_id, 5000)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'tcf_exam' not in inspector.get_table_names():
+        return
+    for table, name, _ in reversed(INDEXES):
+        if name in {index['name'] for index in inspector.get_indexes(table)}:
+            op.drop_index(name, table_name=table)
+    with op.batch_alter_table('tcf_exam') as batch_op:
+        batch_op.drop_column('cefr_level')
+        batch_op.drop_column('score_numeric')
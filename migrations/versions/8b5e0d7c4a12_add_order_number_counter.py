@@ -0,0 +1,48 @@
+"""Compteur des numéros de commande (réservation atomique, par blocs)
+
+Revision ID: 8b5e0d7c4a12
+Revises: 3f2a9c1d8e47
+Create Date: 2026-10-16 23:40:00.000000
+
+Le compteur est initialisé au numéro suivant le plus grand Ordre# existant. Sur une base
+neuve créée par `flask bootstrap`, la table existe déjà et n'est pas recréée.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b5e0d7c4a12'
+down_revision = '3f2a9c1d8e47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    tables = set(sa.inspect(bind).get_table_names())
+    if 'order_number_counter' not in tables:
+        op.create_table(
+            'order_number_counter',
+            sa.Column('name', sa.String(length=50), nullable=False),
+            sa.Column('next_value', sa.BigInteger(), nullable=False),
+            sa.PrimaryKeyConstraint('name'),
+        )
+    if 'orders' not in tables:
+        return
+
+    counter = sa.table('order_number_counter', sa.column('name'), sa.column('next_value'))
+    if bind.execute(sa.select(counter.c.name).where(counter.c.name == 'orders')).first():
+        return
+    last_number = bind.execute(sa.text(
+        "SELECT MAX(order_number) FROM orders WHERE order_number LIKE 'Ordre#%'")).scalar()
+    try:
+        next_value = int(last_number.split('#')[1]) + 1 if last_number else 1000
+    except (ValueError, IndexError):
+        next_value = 1000
+    op.bulk_insert(counter, [{'name': 'orders', 'next_value': next_value}])
+
+
+def downgrade():
+    op.drop_table('order_number_counter')
@@ -0,0 +1,134 @@
+"""Statistiques par utilisateur maintenues à l'écriture des examens (user_stats)
+
+Revision ID: 9d4f2b6e1a73
+Revises: 5c1e7a9b2d30
+Create Date: 2026-10-17 01:00:00.000000
+
+La table est remplie depuis tcf_exam par lots d'utilisateurs (même calcul que
+`flask rebuild-user-stats`, figé ici : la révision ne dépend pas du code applicatif).
+
+"""
+from datetime import date, datetime, timedelta
+from itertools import groupby
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4f2b6e1a73'
+down_revision = '5c1e7a9b2d30'
+branch_labels = None
+depends_on = None
+
+# Copie figée de models.user_stats_model (rebuild_batch et ses helpers) à cette révision
+_exams = sa.table('tcf_exam', sa.column('id'), sa.column('id_user'), sa.column('score_numeric'),
+                  sa.column('date_passage'))
+_stats = sa.table(
+    'user_stats',
+    sa.column('user_id'), sa.column('total_exams'), sa.column('scored_exams'), sa.column('score_sum'),
+    sa.column('best_score'), sa.column('last_exam_date', sa.Date()), sa.column('current_streak'),
+    sa.column('updated_at', sa.DateTime()),
+)
+
+
+def _as_date(value):
+    # DATE() renvoie une chaîne 'AAAA-MM-JJ' sous SQLite, une date sous MariaDB
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _study_streak(exam_dates, today):
+    """Jours consécutifs avec un examen jusqu'à `today` (dates distinctes triées décroissantes)"""
+    streak = 0
+    expected = today
+    for exam_date in exam_dates:
+        if exam_date > expected:
+            continue
+        if exam_date < expected:
+            break
+        streak += 1
+        expected -= timedelta(days=1)
+    return streak
+
+
+def _rebuild_batch(connection, after_user_id, batch_size):
+    """Calcule les statistiques des `batch_size` utilisateurs suivants ; retourne le dernier id (None à la fin)"""
+    user_ids = connection.execute(
+        sa.select(_exams.c.id_user).distinct()
+        .where(_exams.c.id_user > after_user_id)
+        .order_by(_exams.c.id_user)
+        .limit(batch_size)
+    ).scalars().all()
+    if not user_ids:
+        return None
+
+    totals = connection.execute(
+        sa.select(
+            _exams.c.id_user,
+            sa.func.count(_exams.c.id),
+            sa.func.count(_exams.c.score_numeric),
+            sa.func.coalesce(sa.func.sum(_exams.c.score_numeric), 0),
+            sa.func.max(_exams.c.score_numeric),
+        ).where(_exams.c.id_user.in_(user_ids)).group_by(_exams.c.id_user)
+    ).all()
+    exam_day = sa.func.date(_exams.c.date_passage)
+    days = connection.execute(
+        sa.select(_exams.c.id_user, exam_day).distinct()
+        .where(_exams.c.id_user.in_(user_ids))
+        .order_by(_exams.c.id_user, exam_day.desc())
+    ).all()
+    days_by_user = {
+        user_id: [_as_date(day) for _, day in rows]
+        for user_id, rows in groupby(days, key=lambda row: row[0])
+    }
+
+    stats = []
+    for user_id, total, scored, score_sum, best in totals:
+        exam_days = days_by_user.get(user_id, [])
+        last_exam_date = exam_days[0] if exam_days else None
+        stats.append({
+            'user_id': user_id,
+            'total_exams': total,
+            'scored_exams': scored,
+            'score_sum': float(score_sum),
+            'best_score': best,
+            'last_exam_date': last_exam_date,
+            'current_streak': _study_streak(exam_days, last_exam_date) if last_exam_date else 0,
+            'updated_at': datetime.utcnow(),
+        })
+    connection.execute(_stats.delete().where(
+        _stats.c.user_id > after_user_id, _stats.c.user_id <= user_ids[-1]))
+    connection.execute(_stats.insert(), stats)
+    return user_ids[-1]
+
+
+def upgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'user_stats' not in tables:
+        op.create_table(
+            'user_stats',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('total_exams', sa.Integer(), nullable=False),
+            sa.Column('scored_exams', sa.Integer(), nullable=False),
+            sa.Column('score_sum', sa.Float(), nullable=False),
+            sa.Column('best_score', sa.Float(), nullable=True),
+            sa.Column('last_exam_date', sa.Date(), nullable=True),
+            sa.Column('current_streak', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('user_id'),
+        )
+    if 'tcf_exam' not in tables:
+        return
+
+    after_user_id = 0
+    while after_user_id is not None:
+        after_user_id = _rebuild_batch(op.get_bind(), after_user_id, 1000)
+
+
+def downgrade():
+    op.drop_table('user_stats')
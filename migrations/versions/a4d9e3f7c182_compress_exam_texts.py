@@ -0,0 +1,122 @@
+"""Textes IA des examens stockés compressés (colonnes <nom>_z)
+
+Revision ID: a4d9e3f7c182
+Revises: e2c8f4a6b951
+Create Date: 2026-10-17 03:30:00.000000
+
+Ajoute les colonnes compressées puis y déplace les textes existants par lots (même
+traitement que commands/compress_exam_texts.py, relançable avec `flask
+compress-exam-texts`, figé ici : la révision ne dépend pas du code applicatif).
+Les anciennes colonnes sont conservées, vidées : le modèle lit encore les lignes non
+migrées, et le retour arrière remet les textes en clair.
+
+"""
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d9e3f7c182'
+down_revision = 'e2c8f4a6b951'
+branch_labels = None
+depends_on = None
+
+# Copie figée de models.tcf_exam_model et commands/compress_exam_texts.py à cette révision
+COMPRESSED_TEXT_FIELDS = ('reponse_ia', 'traduction_reponse_ia', 'points_fort', 'point_faible')
+TEXT_COMPRESSION_LEVEL = 6
+
+_exams = sa.table(
+    'tcf_exam',
+    sa.column('id'),
+    *[sa.column(name) for name in COMPRESSED_TEXT_FIELDS],
+    *[sa.column(f'{name}_z') for name in COMPRESSED_TEXT_FIELDS],
+)
+
+
+def _compress_batch(connection, after_id, batch_size):
+    """Compresse les textes en clair d'un lot d'examens d'id > after_id ; retourne le dernier id lu"""
+    plain = [_exams.c[name] for name in COMPRESSED_TEXT_FIELDS]
+    rows = connection.execute(
+        sa.select(_exams.c.id, *plain)
+        .where(_exams.c.id > after_id, sa.or_(*[column.isnot(None) for column in plain]))
+        .order_by(_exams.c.id)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return None
+
+    connection.execute(
+        _exams.update()
+        .where(_exams.c.id == sa.bindparam('exam_id'))
+        .values({
+            **{name: None for name in COMPRESSED_TEXT_FIELDS},
+            # Champ sans texte en clair : texte compressé existant conservé
+            **{f'{name}_z': sa.func.coalesce(sa.bindparam(f'{name}_z'), _exams.c[f'{name}_z'])
+               for name in COMPRESSED_TEXT_FIELDS},
+        }),
+        [
+            {'exam_id': exam_id,
+             **{f'{name}_z': None if text is None else zlib.compress(text.encode('utf-8'), TEXT_COMPRESSION_LEVEL)
+                for name, text in zip(COMPRESSED_TEXT_FIELDS, texts)}}
+            for exam_id, *texts in rows
+        ],
+    )
+    return rows[-1][0]
+
+
+def _decompress_batch(connection, after_id, batch_size):
+    """Remet en clair les textes compressés d'un lot d'examens d'id > after_id ; retourne le dernier id lu"""
+    stored = [_exams.c[f'{name}_z'] for name in COMPRESSED_TEXT_FIELDS]
+    rows = connection.execute(
+        sa.select(_exams.c.id, *stored)
+        .where(_exams.c.id > after_id, sa.or_(*[column.isnot(None) for column in stored]))
+        .order_by(_exams.c.id)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return None
+
+    connection.execute(
+        _exams.update()
+        .where(_exams.c.id == sa.bindparam('exam_id'))
+        .values({
+            **{name: sa.func.coalesce(sa.bindparam(f'plain_{name}'), _exams.c[name])
+               for name in COMPRESSED_TEXT_FIELDS},
+            **{f'{name}_z': None for name in COMPRESSED_TEXT_FIELDS},
+        }),
+        [
+            {'exam_id': exam_id,
+             **{f'plain_{name}': None if data is None else zlib.decompress(data).decode('utf-8')
+                for name, data in zip(COMPRESSED_TEXT_FIELDS, blobs)}}
+            for exam_id, *blobs in rows
+        ],
+    )
+    return rows[-1][0]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'tcf_exam' not in inspector.get_table_names():
+        return
+    columns = {column['name'] for column in inspector.get_columns('tcf_exam')}
+    for name in COMPRESSED_TEXT_FIELDS:
+        if f'{name}_z' not in columns:
+            op.add_column('tcf_exam', sa.Column(f'{name}_z', sa.LargeBinary(), nullable=True))
+
+    after_id = 0
+    while after_id is not None:
+        after_id = _compress_batch(op.get_bind(), after_id, 2000)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'tcf_exam' not in inspector.get_table_names():
+        return
+    after_id = 0
+    while after_id is not None:
+        after_id = _decompress_batch(op.get_bind(), after_id, 2000)
+    with op.batch_alter_table('tcf_exam') as batch_op:
+        for name in reversed(COMPRESSED_TEXT_FIELDS):
+            batch_op.drop_column(f'{name}_z')
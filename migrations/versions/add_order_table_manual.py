@@ -0,0 +1,25 @@
+"""Révision historique : table orders créée manuellement
+
+Revision ID: add_order_table_manual
+Revises:
+Create Date: 2025-01-01 00:00:00.000000
+
+Les bases existantes sont marquées avec cette révision, dont le script n'a pas été
+conservé. Elle ne fait rien : le schéma de base est créé par `flask bootstrap`.
+
+"""
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_order_table_manual'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    pass
+
+
+def downgrade():
+    pass
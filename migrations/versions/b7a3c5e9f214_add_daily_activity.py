@@ -0,0 +1,108 @@
+"""Activité quotidienne agrégée (daily_activity, user_daily_activity)
+
+Revision ID: b7a3c5e9f214
+Revises: 9d4f2b6e1a73
+Create Date: 2026-10-17 01:40:00.000000
+
+Les tables sont remplies depuis tcf_exam et user (même calcul que
+`flask rebuild-daily-activity`, figé ici : la révision ne dépend pas du code applicatif).
+
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7a3c5e9f214'
+down_revision = '9d4f2b6e1a73'
+branch_labels = None
+depends_on = None
+
+# Copie figée de models.activity_model (rebuild_global_activity, rebuild_user_activity_batch)
+_exams = sa.table('tcf_exam', sa.column('id_user'), sa.column('date_passage'))
+_users = sa.table('user', sa.column('date_create'))
+_daily = sa.table('daily_activity', sa.column('day', sa.Date()), sa.column('exams'), sa.column('new_users'))
+_user_daily = sa.table('user_daily_activity', sa.column('user_id'), sa.column('day', sa.Date()), sa.column('exams'))
+
+
+def _as_date(value):
+    # DATE() renvoie une chaîne 'AAAA-MM-JJ' sous SQLite, une date sous MariaDB
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _rebuild_global_activity(connection):
+    """Remplit daily_activity depuis tcf_exam et user"""
+    exam_day = sa.func.date(_exams.c.date_passage)
+    user_day = sa.func.date(_users.c.date_create)
+    days = {}
+    for day, count in connection.execute(sa.select(exam_day, sa.func.count()).group_by(exam_day)):
+        days.setdefault(_as_date(day), {'exams': 0, 'new_users': 0})['exams'] = count
+    for day, count in connection.execute(
+            sa.select(user_day, sa.func.count()).where(_users.c.date_create.isnot(None)).group_by(user_day)):
+        days.setdefault(_as_date(day), {'exams': 0, 'new_users': 0})['new_users'] = count
+    connection.execute(_daily.delete())
+    if days:
+        connection.execute(_daily.insert(), [{'day': day, **counts} for day, counts in days.items()])
+
+
+def _rebuild_user_activity_batch(connection, after_user_id, batch_size):
+    """Remplit user_daily_activity des `batch_size` utilisateurs suivants ; retourne le dernier id (None à la fin)"""
+    user_ids = connection.execute(
+        sa.select(_exams.c.id_user).distinct()
+        .where(_exams.c.id_user > after_user_id)
+        .order_by(_exams.c.id_user)
+        .limit(batch_size)
+    ).scalars().all()
+    if not user_ids:
+        return None
+    exam_day = sa.func.date(_exams.c.date_passage)
+    groups = connection.execute(
+        sa.select(_exams.c.id_user, exam_day, sa.func.count())
+        .where(_exams.c.id_user.in_(user_ids))
+        .group_by(_exams.c.id_user, exam_day)
+    ).all()
+    connection.execute(_user_daily.delete().where(
+        _user_daily.c.user_id > after_user_id, _user_daily.c.user_id <= user_ids[-1]))
+    connection.execute(_user_daily.insert(), [
+        {'user_id': user_id, 'day': _as_date(day), 'exams': count} for user_id, day, count in groups
+    ])
+    return user_ids[-1]
+
+
+def upgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'daily_activity' not in tables:
+        op.create_table(
+            'daily_activity',
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('exams', sa.Integer(), nullable=False),
+            sa.Column('new_users', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('day'),
+        )
+    if 'user_daily_activity' not in tables:
+        op.create_table(
+            'user_daily_activity',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('exams', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('user_id', 'day'),
+        )
+    if 'tcf_exam' not in tables or 'user' not in tables:
+        return
+
+    _rebuild_global_activity(op.get_bind())
+    after_user_id = 0
+    while after_user_id is not None:
+        after_user_id = _rebuild_user_activity_batch(op.get_bind(), after_user_id, 1000)
+
+
+def downgrade():
+    op.drop_table('user_daily_activity')
+    op.drop_table('daily_activity')
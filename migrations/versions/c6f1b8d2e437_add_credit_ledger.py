@@ -0,0 +1,39 @@
+"""Registre des mouvements de crédits (credit_ledger)
+
+Revision ID: c6f1b8d2e437
+Revises: a4d9e3f7c182
+Create Date: 2026-10-17 04:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6f1b8d2e437'
+down_revision = 'a4d9e3f7c182'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'credit_ledger' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'credit_ledger',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('delta', sa.Float(), nullable=False),
+        sa.Column('balance', sa.Float(), nullable=False),
+        sa.Column('reason', sa.String(length=20), nullable=False),
+        sa.Column('reference', sa.String(length=200), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_credit_ledger_user_created', 'credit_ledger', ['user_id', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_credit_ledger_user_created', table_name='credit_ledger')
+    op.drop_table('credit_ledger')
@@ -0,0 +1,45 @@
+"""Index de la pagination par curseur des utilisateurs (date_create, id)
+
+Revision ID: d3a7e1c9f508
+Revises: c6f1b8d2e437
+Create Date: 2026-10-17 05:10:00.000000
+
+Les listes paginées des examens et des commandes utilisent les index existants
+(ix_tcf_exam_*, ix_orders_*), qui contiennent aussi la clé primaire.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a7e1c9f508'
+down_revision = 'c6f1b8d2e437'
+branch_labels = None
+depends_on = None
+
+
+# (table, nom de l'index, colonnes), alignés sur les __table_args__ des modèles
+INDEXES = (
+    ('user', 'ix_user_date_create', ['date_create']),
+)
+
+
+def _existing_indexes(inspector, table):
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    for table, name, columns in INDEXES:
+        if table in tables and name not in _existing_indexes(inspector, table):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    for table, name, columns in reversed(INDEXES):
+        if table in tables and name in _existing_indexes(inspector, table):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,78 @@
+"""Revenus agrégés par jour, plan, statut et devise (revenue_daily)
+
+Revision ID: e2c8f4a6b951
+Revises: b7a3c5e9f214
+Create Date: 2026-10-17 02:30:00.000000
+
+La table est remplie depuis orders (même calcul que `flask rebuild-revenue`, figé
+ici : la révision ne dépend pas du code applicatif).
+
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2c8f4a6b951'
+down_revision = 'b7a3c5e9f214'
+branch_labels = None
+depends_on = None
+
+# Copie figée de models.revenue_model.rebuild_revenue à cette révision
+_orders = sa.table('orders', sa.column('created_at'), sa.column('subscription_plan'), sa.column('status'),
+                   sa.column('currency'), sa.column('amount'))
+_revenue = sa.table(
+    'revenue_daily',
+    sa.column('day', sa.Date()), sa.column('subscription_plan'), sa.column('status'), sa.column('currency'),
+    sa.column('orders'), sa.column('amount'),
+)
+
+
+def _as_date(value):
+    # DATE() renvoie une chaîne 'AAAA-MM-JJ' sous SQLite, une date sous MariaDB
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _rebuild_revenue(connection):
+    """Remplit revenue_daily depuis orders"""
+    order_day = sa.func.date(_orders.c.created_at)
+    groups = connection.execute(
+        sa.select(
+            order_day, _orders.c.subscription_plan, _orders.c.status, _orders.c.currency,
+            sa.func.count(), sa.func.coalesce(sa.func.sum(_orders.c.amount), 0),
+        ).group_by(order_day, _orders.c.subscription_plan, _orders.c.status, _orders.c.currency)
+    ).all()
+    connection.execute(_revenue.delete())
+    if groups:
+        connection.execute(_revenue.insert(), [
+            {'day': _as_date(day), 'subscription_plan': plan, 'status': status, 'currency': currency,
+             'orders': count, 'amount': float(amount)}
+            for day, plan, status, currency, count, amount in groups
+        ])
+
+
+def upgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'revenue_daily' not in tables:
+        op.create_table(
+            'revenue_daily',
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('subscription_plan', sa.String(length=50), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('currency', sa.String(length=3), nullable=False),
+            sa.Column('orders', sa.Integer(), nullable=False),
+            sa.Column('amount', sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint('day', 'subscription_plan', 'status', 'currency'),
+        )
+    if 'orders' in tables:
+        _rebuild_revenue(op.get_bind())
+
+
+def downgrade():
+    op.drop_table('revenue_daily')
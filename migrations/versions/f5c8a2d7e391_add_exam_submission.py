@@ -0,0 +1,38 @@
+"""Soumissions d'examens complets et leur clé d'idempotence (exam_submission)
+
+Revision ID: f5c8a2d7e391
+Revises: d3a7e1c9f508
+Create Date: 2026-10-17 05:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5c8a2d7e391'
+down_revision = 'd3a7e1c9f508'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'exam_submission' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'exam_submission',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('idempotency_key', sa.String(length=100), nullable=False),
+        sa.Column('id_subject', sa.Integer(), nullable=False),
+        sa.Column('exam_ids', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['id_subject'], ['tcf_subject.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'idempotency_key', name='uq_exam_submission_user_key'),
+    )
+
+
+def downgrade():
+    op.drop_table('exam_submission')
@@ -0,0 +1,176 @@
+from sqlalchemy import event, inspect
+
+from models.counters import as_date, increment, track_previous_values
+from models.exts import db
+from models.model import User
+from models.tcf_exam_model import TCFExam, bulk_change_hooks
+
+'''
+Activité quotidienne agrégée pour les graphiques du dashboard.
+
+- daily_activity : examens passés et nouveaux utilisateurs par jour (tous utilisateurs) ;
+- user_daily_activity : examens passés par utilisateur et par jour.
+
+Les compteurs sont incrémentés dans la transaction qui écrit l'examen ou l'utilisateur
+(une instruction INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE par table, voir
+models/counters.py). Un graphique sur 12 mois lit au plus 366 lignes au lieu de grouper
+tcf_exam par mois.
+
+`flask rebuild-daily-activity` recalcule les deux tables (import hors ORM, dérive).
+'''
+
+
+class DailyActivity(db.Model):
+    __tablename__ = 'daily_activity'
+
+    day = db.Column(db.Date(), primary_key=True)
+    exams = db.Column(db.Integer(), default=0, nullable=False)
+    new_users = db.Column(db.Integer(), default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<DailyActivity {self.day} Exams:{self.exams} Users:{self.new_users}>"
+
+
+class UserDailyActivity(db.Model):
+    __tablename__ = 'user_daily_activity'
+
+    user_id = db.Column(db.Integer(), db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date(), primary_key=True)
+    exams = db.Column(db.Integer(), default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<UserDailyActivity User:{self.user_id} {self.day} Exams:{self.exams}>"
+
+
+_daily = DailyActivity.__table__
+_user_daily = UserDailyActivity.__table__
+_exams = TCFExam.__table__
+_users = User.__table__
+
+track_previous_values(TCFExam.id_user, TCFExam.date_passage)
+
+
+def _count_exam(connection, user_id, passed_at, delta):
+    day = as_date(passed_at)
+    if user_id is None or day is None:
+        return
+    increment(connection, _daily, {'day': day}, {'exams': delta, 'new_users': 0})
+    increment(connection, _user_daily, {'user_id': user_id, 'day': day}, {'exams': delta})
+
+
+@event.listens_for(TCFExam, 'after_insert')
+def _after_exam_insert(mapper, connection, exam):
+    _count_exam(connection, exam.id_user, exam.date_passage, 1)
+
+
+@event.listens_for(TCFExam, 'after_update')
+def _after_exam_update(mapper, connection, exam):
+    state = inspect(exam)
+    user_history = state.attrs.id_user.history
+    date_history = state.attrs.date_passage.history
+    if not (user_history.has_changes() or date_history.has_changes()):
+        return
+    old_user = user_history.deleted[0] if user_history.deleted else exam.id_user
+    old_date = date_history.deleted[0] if date_history.deleted else exam.date_passage
+    _count_exam(connection, old_user, old_date, -1)
+    _count_exam(connection, exam.id_user, exam.date_passage, 1)
+
+
+@event.listens_for(TCFExam, 'after_delete')
+def _after_exam_delete(mapper, connection, exam):
+    _count_exam(connection, exam.id_user, exam.date_passage, -1)
+
+
+@event.listens_for(User, 'after_insert')
+def _after_user_insert(mapper, connection, user):
+    day = as_date(user.date_create)
+    if day is not None:
+        increment(connection, _daily, {'day': day}, {'exams': 0, 'new_users': 1})
+
+
+@event.listens_for(User, 'after_delete')
+def _after_user_delete(mapper, connection, user):
+    day = as_date(user.date_create)
+    if day is not None:
+        increment(connection, _daily, {'day': day}, {'exams': 0, 'new_users': -1})
+
+
+def _exams_before_bulk_delete(session, whereclause, is_delete, bind_arguments):
+    # Seules les suppressions en masse changent les compteurs (aucun Query.update() ne
+    # modifie id_user ou date_passage ; le cas échéant : flask rebuild-daily-activity)
+    if not is_delete:
+        return []
+    exam_day = db.func.date(_exams.c.date_passage)
+    query = db.select(_exams.c.id_user, exam_day, db.func.count()).group_by(_exams.c.id_user, exam_day)
+    if whereclause is not None:
+        query = query.where(whereclause)
+    return session.execute(query, bind_arguments=bind_arguments).all()
+
+
+def _uncount_deleted_exams(connection, groups):
+    for user_id, day, count in groups:
+        _count_exam(connection, user_id, day, -count)
+
+
+bulk_change_hooks.append((_exams_before_bulk_delete, _uncount_deleted_exams))
+
+
+def rebuild_global_activity(connection):
+    """Recalcule daily_activity depuis tcf_exam et user ; retourne le nombre de jours"""
+    exam_day = db.func.date(_exams.c.date_passage)
+    user_day = db.func.date(_users.c.date_create)
+    days = {}
+    for day, count in connection.execute(db.select(exam_day, db.func.count()).group_by(exam_day)):
+        days.setdefault(as_date(day), {'exams': 0, 'new_users': 0})['exams'] = count
+    for day, count in connection.execute(
+            db.select(user_day, db.func.count()).where(_users.c.date_create.isnot(None)).group_by(user_day)):
+        days.setdefault(as_date(day), {'exams': 0, 'new_users': 0})['new_users'] = count
+    connection.execute(_daily.delete())
+    if days:
+        connection.execute(_daily.insert(), [{'day': day, **counts} for day, counts in days.items()])
+    return len(days)
+
+
+def rebuild_user_activity_batch(connection, after_user_id, batch_size):
+    """Recalcule user_daily_activity des `batch_size` utilisateurs suivants ; retourne (dernier id, lignes)"""
+    user_ids = connection.execute(
+        db.select(_exams.c.id_user).distinct()
+        .where(_exams.c.id_user > after_user_id)
+        .order_by(_exams.c.id_user)
+        .limit(batch_size)
+    ).scalars().all()
+    if not user_ids:
+        # Lignes restantes : utilisateurs qui n'ont plus d'examen
+        connection.execute(_user_daily.delete().where(_user_daily.c.user_id > after_user_id))
+        return None, 0
+    exam_day = db.func.date(_exams.c.date_passage)
+    groups = connection.execute(
+        db.select(_exams.c.id_user, exam_day, db.func.count())
+        .where(_exams.c.id_user.in_(user_ids))
+        .group_by(_exams.c.id_user, exam_day)
+    ).all()
+    connection.execute(_user_daily.delete().where(
+        _user_daily.c.user_id > after_user_id, _user_daily.c.user_id <= user_ids[-1]))
+    connection.execute(_user_daily.insert(), [
+        {'user_id': user_id, 'day': as_date(day), 'exams': count} for user_id, day, count in groups
+    ])
+    return user_ids[-1], len(groups)
+
+
+def rebuild_daily_activity(engine, batch_size=1000, after_user_id=0, echo=None):
+    """Recalcule daily_activity, puis user_daily_activity des utilisateurs d'id > after_user_id
+    par lots (un commit par lot) ; retourne le nombre de jours d'activité globale"""
+    with engine.begin() as connection:
+        days = rebuild_global_activity(connection)
+    if echo:
+        echo(f"- {days} jours d'activité globale")
+
+    rows = 0
+    while True:
+        with engine.begin() as connection:
+            after_user_id, written = rebuild_user_activity_batch(connection, after_user_id, batch_size)
+        if after_user_id is None:
+            return days
+        rows += written
+        if echo:
+            echo(f"- {rows} jours d'activité par utilisateur (id <= {after_user_id})")
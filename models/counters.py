@@ -0,0 +1,53 @@
+from datetime import date, datetime
+
+from sqlalchemy import event
+from sqlalchemy.dialects import mysql, sqlite
+
+'''
+Compteurs des tables de cumuls (statistiques, activité quotidienne, revenus).
+'''
+
+
+def as_date(value):
+    """Date d'une valeur DATE()/DateTime lue en base ou d'un datetime"""
+    # DATE() renvoie une chaîne 'AAAA-MM-JJ' sous SQLite, une date sous MariaDB
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def increment(connection, table, keys, counters):
+    """Ajoute `counters` à la ligne `keys` de `table`, créée à zéro si absente (une instruction)"""
+    values = {**keys, **counters}
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        statement = sqlite.insert(table).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: table.c[name] + statement.excluded[name] for name in counters},
+        )
+    elif dialect in ('mysql', 'mariadb'):
+        statement = mysql.insert(table).values(**values)
+        statement = statement.on_duplicate_key_update(
+            {name: table.c[name] + statement.inserted[name] for name in counters})
+    else:
+        key_filter = [table.c[name] == value for name, value in keys.items()]
+        updated = connection.execute(table.update().where(*key_filter).values(
+            {name: table.c[name] + value for name, value in counters.items()}))
+        if updated.rowcount:
+            return
+        statement = table.insert().values(**values)
+    connection.execute(statement)
+
+
+def _keep_previous(target, value, oldvalue, initiator):
+    return value
+
+
+def track_previous_values(*attributes):
+    """Charge l'ancienne valeur des attributs modifiés, même expirés après un commit,
+    pour que leur historique permette de décrémenter l'ancienne ligne de cumuls"""
+    for attribute in attributes:
+        event.listen(attribute, 'set', _keep_previous, active_history=True, retval=True)
@@ -0,0 +1,86 @@
+from datetime import datetime
+
+from models.exts import db
+from models.model import User
+
+'''
+Mouvements de crédits (User.sold), en ajout seul.
+
+Chaque consommation ou attribution modifie le solde par une seule instruction
+conditionnelle (`sold = sold - :n WHERE ... AND sold >= :n`) et ajoute une ligne au
+registre dans la même transaction : deux onglets qui consomment en même temps ne
+peuvent ni passer sous zéro ni écraser le solde l'un de l'autre.
+'''
+
+# Motifs des mouvements
+CONSUME = 'consume'
+PURCHASE = 'purchase'
+
+
+class CreditLedger(db.Model):
+    __tablename__ = 'credit_ledger'
+
+    id = db.Column(db.Integer(), primary_key=True)
+    user_id = db.Column(db.Integer(), db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    # Variation du solde (négative pour une consommation) et solde après le mouvement
+    delta = db.Column(db.Float(), nullable=False)
+    balance = db.Column(db.Float(), nullable=False)
+    reason = db.Column(db.String(20), nullable=False)
+    # Référence libre : examen, tâche, session Stripe...
+    reference = db.Column(db.String(200), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_credit_ledger_user_created', 'user_id', 'created_at'),  # historique d'un utilisateur
+    )
+
+    def __repr__(self):
+        return f"<CreditLedger User:{self.user_id} {self.delta:+g} -> {self.balance:g}>"
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'delta': self.delta,
+            'balance': self.balance,
+            'reason': self.reason,
+            'reference': self.reference,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+_users = User.__table__
+_ledger = CreditLedger.__table__
+
+
+def _record(connection, user_filter, delta, reason, reference):
+    user_id, balance = connection.execute(db.select(_users.c.id, _users.c.sold).where(user_filter)).one()
+    connection.execute(_ledger.insert().values(
+        user_id=user_id, delta=delta, balance=balance, reason=reason, reference=reference,
+        created_at=datetime.utcnow()))
+    return balance
+
+
+def consume_credits(connection, user_id, amount, reason=CONSUME, reference=None):
+    """Retire `amount` crédits si le solde suffit ; retourne le nouveau solde, None sinon
+    (solde insuffisant ou utilisateur inconnu)"""
+    user_filter = _users.c.id == user_id
+    consumed = connection.execute(
+        _users.update()
+        .where(user_filter, _users.c.sold >= amount)
+        .values(sold=_users.c.sold - amount)
+    )
+    if consumed.rowcount != 1:
+        return None
+    return _record(connection, user_filter, -amount, reason, reference)
+
+
+def grant_credits(connection, user_id, amount, reason=PURCHASE, reference=None):
+    """Ajoute `amount` crédits au solde et au total de l'utilisateur ; retourne le nouveau solde"""
+    user_filter = _users.c.id == user_id
+    connection.execute(
+        _users.update()
+        .where(user_filter)
+        .values(sold=db.func.coalesce(_users.c.sold, 0) + amount,
+                total_sold=db.func.coalesce(_users.c.total_sold, 0) + amount)
+    )
+    return _record(connection, user_filter, amount, reason, reference)
@@ -0,0 +1,75 @@
+import json
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from models.exts import db
+from models.tcf_exam_model import TCFExam
+
+'''
+Soumissions d'examens complets (résultats de toutes les tâches d'un sujet).
+
+Chaque soumission porte la clé d'idempotence envoyée par le client : une soumission
+rejouée après un appel de correction trop long (même utilisateur, même clé) renvoie les
+examens déjà enregistrés au lieu d'en créer de nouveaux.
+'''
+
+# Champs des résultats d'une tâche repris dans l'examen
+RESULT_FIELDS = ('id_task', 'reponse_utilisateur', 'score', 'reponse_ia', 'points_fort', 'point_faible',
+                 'traduction_reponse_ia')
+
+
+class ExamSubmission(db.Model):
+    __tablename__ = 'exam_submission'
+
+    id = db.Column(db.Integer(), primary_key=True)
+    user_id = db.Column(db.Integer(), db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    idempotency_key = db.Column(db.String(100), nullable=False)
+    id_subject = db.Column(db.Integer(), db.ForeignKey('tcf_subject.id'), nullable=False)
+    # Ids des examens créés (liste JSON), renvoyés tels quels si la soumission est rejouée
+    exam_ids = db.Column(db.Text(), nullable=False, default='[]')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'idempotency_key', name='uq_exam_submission_user_key'),
+    )
+
+    def __repr__(self):
+        return f"<ExamSubmission User:{self.user_id} Key:{self.idempotency_key}>"
+
+    @property
+    def exam_id_list(self):
+        return json.loads(self.exam_ids)
+
+
+def submit_exams(user_id, idempotency_key, subject_id, type_exam, results):
+    """Enregistre les résultats `results` (un dict par tâche) d'un sujet ; retourne
+    (soumission, créée).
+
+    La soumission est insérée avant les examens : une soumission concurrente avec la même
+    clé attend sur l'index unique, puis échoue. La session est alors annulée et la
+    soumission existante renvoyée (créée = False) ; toute autre violation de contrainte
+    est propagée. Les statistiques dérivées des examens (événements d'insertion) sont
+    écrites dans la même transaction ; l'appelant valide.
+    """
+    submission = ExamSubmission(user_id=user_id, idempotency_key=idempotency_key, id_subject=subject_id)
+    db.session.add(submission)
+    try:
+        db.session.flush()
+    except IntegrityError:
+        db.session.rollback()
+        existing = ExamSubmission.query.filter_by(user_id=user_id, idempotency_key=idempotency_key).first()
+        if existing is None:
+            # Autre contrainte (clé étrangère...) : pas un doublon de soumission
+            raise
+        return existing, False
+
+    exams = [
+        TCFExam(id_user=user_id, id_subject=subject_id, type_exam=type_exam,
+                **{name: result.get(name) for name in RESULT_FIELDS})
+        for result in results
+    ]
+    db.session.add_all(exams)
+    db.session.flush()
+    submission.exam_ids = json.dumps([exam.id for exam in exams])
+    return submission, True
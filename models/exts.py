@@ -1,4 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
+from models.routing import RoutingSession
 
 
-db = SQLAlchemy()
+# RoutingSession envoie les lectures des ressources @read_only aux réplicas (voir models/routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
@@ -1,4 +1,5 @@
 from models.exts import db
+from models.unit_of_work import save_changes
 from datetime import datetime, timedelta
 import secrets
 
@@ -32,6 +33,15 @@ class User(db.Model):
     reset_token_expires = db.Column(db.DateTime, nullable=True)
     created_by = db.Column(db.String(80), nullable=True)  # Username du modérateur qui a créé cet utilisateur
 
+    # Index des recherches fréquentes (migration 3f2a9c1d8e47)
+    __table_args__ = (
+        db.Index('ix_user_email', 'email'),  # connexion par email
+        db.Index('ix_user_reset_token', 'reset_token'),  # réinitialisation du mot de passe
+        db.Index('ix_user_created_by_role', 'created_by', 'role'),  # utilisateurs d'un modérateur
+        db.Index('ix_user_payment_status', 'payment_status'),  # statistiques admin
+        db.Index('ix_user_date_create', 'date_create'),  # liste paginée des utilisateurs (migration d3a7e1c9f508)
+    )
+
     def to_dict(self):
         return {
             'email': self.email,
@@ -58,7 +68,7 @@ class User(db.Model):
         self.tel = tel
         self.date_naissance = date_naissance
         self.sexe = sexe
-        db.session.commit()
+        save_changes()
 
     def update_subscription(self, plan, payment_status, payment_id):
         self.subscription_plan = plan
@@ -84,25 +94,25 @@ class User(db.Model):
             if self.sold > self.total_sold:
                 self.sold = self.total_sold
         
-        db.session.commit()
+        save_changes()
 
     def update_sold(self, new_sold_value):
         self.sold = new_sold_value
-        db.session.commit()
+        save_changes()
 
     def update_total_sold(self, new_total_sold_value):
         self.total_sold = new_total_sold_value
-        db.session.commit()
+        save_changes()
 
     def save(self):
         db.session.add(self)
-        db.session.commit()
+        save_changes()
     
     def generate_reset_token(self):
         """Génère un token de réinitialisation de mot de passe"""
         self.reset_token = secrets.token_urlsafe(32)
         self.reset_token_expires = datetime.utcnow() + timedelta(hours=1)  # Expire dans 1 heure
-        db.session.commit()
+        save_changes()
         return self.reset_token
     
     @classmethod
@@ -121,7 +131,7 @@ class User(db.Model):
         """Efface le token de réinitialisation après utilisation"""
         self.reset_token = None
         self.reset_token_expires = None
-        db.session.commit()
+        save_changes()
 
 
 '''
@@ -1,5 +1,8 @@
 from models.exts import db
+from models.unit_of_work import save_changes
 from datetime import datetime
+import os
+import threading
 import uuid
 from models.model import User  # Ajout de l'import manquant
 from flask import current_app
@@ -48,6 +51,14 @@ class Order(db.Model):
     # Relations
     user = db.relationship('User', foreign_keys=[user_id], backref='orders')
     cancelled_by_user = db.relationship('User', foreign_keys=[cancelled_by], backref='cancelled_orders')
+
+    # Index des recherches fréquentes (migration 3f2a9c1d8e47)
+    __table_args__ = (
+        db.Index('ix_orders_user_created', 'user_id', 'created_at'),  # commandes d'un client
+        db.Index('ix_orders_status_created', 'status', 'created_at'),  # statistiques et filtres admin
+        db.Index('ix_orders_created_at', 'created_at'),  # liste et export admin
+        db.Index('ix_orders_stripe_session_id', 'stripe_session_id'),  # webhook Stripe
+    )
     
     def __init__(self, **kwargs):
         super(Order, self).__init__(**kwargs)
@@ -57,27 +68,7 @@ class Order(db.Model):
     @staticmethod
     def generate_order_number():
         """Génère un numéro de commande unique au format Ordre#0001000"""
-        from models.exts import db
-        
-        # Trouver le dernier numéro de commande pour déterminer le prochain
-        last_order = db.session.query(Order).filter(
-            Order.order_number.like('Ordre#%')
-        ).order_by(Order.id.desc()).first()
-        
-        if last_order and last_order.order_number:
-            # Extraire le numéro de la dernière commande
-            try:
-                last_number = int(last_order.order_number.split('#')[1])
-                next_number = last_number + 1
-            except (ValueError, IndexError):
-                # En cas d'erreur, commencer à 1000
-                next_number = 1000
-        else:
-            # Première commande, commencer à 1000
-            next_number = 1000
-        
-        # Formater avec des zéros à gauche (7 chiffres)
-        return f"Ordre#{next_number:07d}"
+        return format_order_number(allocate_order_numbers(1))
     
     def to_dict(self):
         return {
@@ -109,7 +100,7 @@ class Order(db.Model):
     def save(self):
         """Sauvegarde l'ordre dans la base de données"""
         db.session.add(self)
-        db.session.commit()
+        save_changes()
     
     def update_status(self, new_status, admin_user_id=None):
         """Met à jour le statut de la commande"""
@@ -127,7 +118,7 @@ class Order(db.Model):
             self.payment_status = 'refunded'
             self.refunded_at = datetime.utcnow()
         
-        db.session.commit()
+        save_changes()
     
     def update_payment_status_from_stripe(self, stripe_session, validate_amount=True):
         """Met à jour le statut de paiement de manière sécurisée à partir des données Stripe"""
@@ -168,7 +159,7 @@ class Order(db.Model):
                     self.customer_email = customer_email
                 
                 self.updated_at = datetime.utcnow()
-                db.session.commit()
+                save_changes()
                 
                 return True, f"Statut de paiement mis à jour pour la commande {self.order_number}"
                 
@@ -179,7 +170,7 @@ class Order(db.Model):
                 self.status = 'pending'
                 self.payment_status = 'pending'
                 self.updated_at = datetime.utcnow()
-                db.session.commit()
+                save_changes()
                 
                 return True, f"Statut de paiement mis à jour comme en attente pour la commande {self.order_number}"
                 
@@ -232,7 +223,7 @@ class Order(db.Model):
                     db.session.add(user)
             
             db.session.add(self)
-            db.session.commit()
+            save_changes()
             
             return True, "Commande annulée avec succès"
             
@@ -265,33 +256,10 @@ class Order(db.Model):
     
     @classmethod
     def get_revenue_stats(cls, start_date=None, end_date=None):
-        """Calcule les statistiques de revenus"""
-        query = cls.query.filter(cls.status.in_(['paid', 'completed']))
-        
-        if start_date:
-            query = query.filter(cls.created_at >= start_date)
-        if end_date:
-            query = query.filter(cls.created_at <= end_date)
-        
-        orders = query.all()
-        
-        total_revenue = sum(order.amount for order in orders)
-        total_orders = len(orders)
-        
-        plans_stats = {}
-        for order in orders:
-            plan = order.subscription_plan
-            if plan not in plans_stats:
-                plans_stats[plan] = {'count': 0, 'revenue': 0}
-            plans_stats[plan]['count'] += 1
-            plans_stats[plan]['revenue'] += order.amount
-        
-        return {
-            'totalRevenue': total_revenue,
-            'totalOrders': total_orders,
-            'averageOrderValue': total_revenue / total_orders if total_orders > 0 else 0,
-            'planStats': plans_stats
-        }
+        """Calcule les statistiques de revenus (cumuls revenue_daily, jours inclus)"""
+        from models.revenue_model import revenue_statistics
+        stats = revenue_statistics(start_date, end_date)
+        return {key: stats[key] for key in ('totalRevenue', 'totalOrders', 'averageOrderValue', 'planStats')}
 
     @classmethod
     def get_plan_statistics(cls):
@@ -318,4 +286,100 @@ class Order(db.Model):
         return result
     
     def __repr__(self):
-        return f"<Order {self.order_number}>"
\ No newline at end of file
+        return f"<Order {self.order_number}>"
+
+ORDER_NUMBER_PREFIX = 'Ordre#'
+FIRST_ORDER_NUMBER = 1000
+
+
+def format_order_number(number):
+    # Formater avec des zéros à gauche (7 chiffres)
+    return f"{ORDER_NUMBER_PREFIX}{number:07d}"
+
+
+class OrderNumberCounter(db.Model):
+    """Compteur des numéros de commande: prochain numéro libre, incrémenté atomiquement"""
+    __tablename__ = 'order_number_counter'
+
+    name = db.Column(db.String(50), primary_key=True)
+    next_value = db.Column(db.BigInteger(), nullable=False)
+
+
+class OrderNumberAllocator:
+    """Réserve les numéros de commande par blocs dans le compteur, une réservation par bloc.
+
+    La réservation passe par sa propre connexion et sa propre transaction, validée
+    aussitôt : le verrou sur la ligne du compteur ne dure qu'un UPDATE, quelle que soit
+    la durée de la transaction de la commande. Un numéro réservé mais non utilisé
+    (commande annulée, worker arrêté) laisse un trou dans la numérotation, jamais un doublon.
+    """
+
+    COUNTER_NAME = 'orders'
+
+    def __init__(self, engine, block_size=1):
+        self.engine = engine
+        self.block_size = max(1, block_size)
+        self._lock = threading.Lock()
+        self._next = self._end = 0
+        self._pid = None
+
+    def allocate(self, count=1):
+        """Retourne le premier de `count` numéros consécutifs réservés à l'appelant"""
+        with self._lock:
+            # Bloc hérité du processus parent (fork gunicorn): il appartient aussi aux autres workers
+            if self._pid != os.getpid():
+                self._next = self._end = 0
+                self._pid = os.getpid()
+            if count > self._end - self._next:
+                if count > 1:
+                    # Réservation en lot (import, données synthétiques): hors du bloc courant
+                    return self._reserve(count)
+                self._next = self._reserve(self.block_size)
+                self._end = self._next + self.block_size
+            first = self._next
+            self._next += count
+            return first
+
+    def _reserve(self, count):
+        table = OrderNumberCounter.__table__
+        increment = table.update().where(table.c.name == self.COUNTER_NAME).values(
+            next_value=table.c.next_value + count)
+        current = db.select(table.c.next_value).where(table.c.name == self.COUNTER_NAME)
+        for _ in range(2):
+            with self.engine.begin() as connection:
+                if connection.execute(increment).rowcount:
+                    return connection.execute(current).scalar_one() - count
+            self._initialize()
+        raise RuntimeError("Compteur des numéros de commande introuvable")
+
+    def _initialize(self):
+        """Crée le compteur à partir du plus grand numéro existant (première réservation)"""
+        table = OrderNumberCounter.__table__
+        with self.engine.begin() as connection:
+            last_number = connection.execute(
+                db.select(db.func.max(Order.order_number)).where(
+                    Order.order_number.like(f'{ORDER_NUMBER_PREFIX}%'))
+            ).scalar()
+        try:
+            next_value = int(last_number.split('#')[1]) + 1 if last_number else FIRST_ORDER_NUMBER
+        except (ValueError, IndexError):
+            next_value = FIRST_ORDER_NUMBER
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(table.insert().values(name=self.COUNTER_NAME, next_value=next_value))
+        except db.exc.IntegrityError:
+            # Un autre worker vient de créer le compteur
+            pass
+
+
+def allocate_order_numbers(count=1):
+    """Réserve `count` numéros de commande consécutifs et retourne le premier"""
+    allocator = current_app.extensions.get('order_numbers')
+    if allocator is None:
+        allocator = current_app.extensions['order_numbers'] = OrderNumberAllocator(
+            db.engine, current_app.config.get('ORDER_NUMBER_BLOCK_SIZE', 1))
+    return allocator.allocate(count)
+
+
+# Cumuls de revenus maintenus par événements sur Order
+from models import revenue_model  # noqa: E402,F401
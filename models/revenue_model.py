@@ -0,0 +1,166 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, inspect
+
+from models.counters import as_date, increment, track_previous_values
+from models.exts import db
+from models.order_model import Order
+
+'''
+Revenus agrégés par jour, plan, statut et devise (statistiques des commandes).
+
+La ligne (jour de création, plan, statut, devise) d'une commande est mise à jour dans
+la transaction qui l'écrit : création, changement de statut (update_status,
+update_payment_status_from_stripe, cancel_order, remboursement...) ou de montant,
+suppression. Les statistiques admin se calculent sur ces cumuls en une requête.
+
+`flask rebuild-revenue` recalcule la table (import hors ORM, dérive).
+'''
+
+# Statuts comptés dans le chiffre d'affaires
+REVENUE_STATUSES = ('paid', 'completed')
+# Statuts détaillés dans les statistiques admin
+TRACKED_STATUSES = ('pending', 'paid', 'failed', 'cancelled', 'refunded')
+
+
+class RevenueDaily(db.Model):
+    __tablename__ = 'revenue_daily'
+
+    day = db.Column(db.Date(), primary_key=True)
+    subscription_plan = db.Column(db.String(50), primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    currency = db.Column(db.String(3), primary_key=True)
+    orders = db.Column(db.Integer(), default=0, nullable=False)
+    amount = db.Column(db.Float(), default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<RevenueDaily {self.day} {self.subscription_plan} {self.status} {self.currency}>"
+
+
+_revenue = RevenueDaily.__table__
+_orders = Order.__table__
+_KEY_ATTRIBUTES = ('created_at', 'subscription_plan', 'status', 'currency')
+
+track_previous_values(Order.created_at, Order.subscription_plan, Order.status, Order.currency, Order.amount)
+
+
+def _count_order(connection, created_at, plan, status, currency, amount, delta):
+    day = as_date(created_at)
+    if day is None:
+        return
+    increment(
+        connection, _revenue,
+        {'day': day, 'subscription_plan': plan, 'status': status, 'currency': currency},
+        {'orders': delta, 'amount': delta * (amount or 0)},
+    )
+
+
+def _previous(state, key):
+    history = state.attrs[key].history
+    return history.deleted[0] if history.deleted else getattr(state.object, key)
+
+
+@event.listens_for(Order, 'after_insert')
+def _after_order_insert(mapper, connection, order):
+    _count_order(connection, order.created_at, order.subscription_plan, order.status,
+                 order.currency, order.amount, 1)
+
+
+@event.listens_for(Order, 'after_update')
+def _after_order_update(mapper, connection, order):
+    state = inspect(order)
+    if not any(state.attrs[key].history.has_changes() for key in _KEY_ATTRIBUTES + ('amount',)):
+        return
+    old = {key: _previous(state, key) for key in _KEY_ATTRIBUTES + ('amount',)}
+    _count_order(connection, old['created_at'], old['subscription_plan'], old['status'],
+                 old['currency'], old['amount'], -1)
+    _count_order(connection, order.created_at, order.subscription_plan, order.status,
+                 order.currency, order.amount, 1)
+
+
+@event.listens_for(Order, 'after_delete')
+def _after_order_delete(mapper, connection, order):
+    _count_order(connection, order.created_at, order.subscription_plan, order.status,
+                 order.currency, order.amount, -1)
+
+
+def rebuild_revenue(connection):
+    """Recalcule revenue_daily depuis orders ; retourne le nombre de lignes"""
+    order_day = db.func.date(_orders.c.created_at)
+    groups = connection.execute(
+        db.select(
+            order_day, _orders.c.subscription_plan, _orders.c.status, _orders.c.currency,
+            db.func.count(), db.func.coalesce(db.func.sum(_orders.c.amount), 0),
+        ).group_by(order_day, _orders.c.subscription_plan, _orders.c.status, _orders.c.currency)
+    ).all()
+    connection.execute(_revenue.delete())
+    if groups:
+        connection.execute(_revenue.insert(), [
+            {'day': as_date(day), 'subscription_plan': plan, 'status': status, 'currency': currency,
+             'orders': count, 'amount': float(amount)}
+            for day, plan, status, currency, count, amount in groups
+        ])
+    return len(groups)
+
+
+def _month_starts(today, months):
+    """Premiers jours des `months` derniers mois, du plus ancien au mois courant"""
+    starts = [today.replace(day=1)]
+    for _ in range(months - 1):
+        starts.append((starts[-1] - timedelta(days=1)).replace(day=1))
+    return starts[::-1]
+
+
+def revenue_statistics(start_date=None, end_date=None, months=12):
+    """Statistiques de revenus sur [start_date, end_date] (jours inclus) et des `months` derniers mois.
+
+    Une seule requête sur revenue_daily, regroupée par jour, plan et statut.
+    """
+    today = datetime.utcnow().date()
+    month_starts = _month_starts(today, months)
+    start_day = as_date(start_date)
+    end_day = as_date(end_date)
+
+    query = db.session.query(
+        RevenueDaily.day, RevenueDaily.subscription_plan, RevenueDaily.status,
+        db.func.sum(RevenueDaily.orders), db.func.sum(RevenueDaily.amount),
+    ).group_by(RevenueDaily.day, RevenueDaily.subscription_plan, RevenueDaily.status)
+    if start_day is not None:
+        # Lignes de la période demandée et des mois du graphique
+        query = query.filter(RevenueDaily.day >= min(start_day, month_starts[0]))
+
+    total_revenue, total_orders = 0, 0
+    plan_stats = {}
+    status_stats = {status: 0 for status in TRACKED_STATUSES}
+    monthly = {(start.year, start.month): {'revenue': 0, 'orders': 0} for start in month_starts}
+    for day, plan, status, orders, amount in query:
+        day = as_date(day)
+        if status == 'paid' and (day.year, day.month) in monthly:
+            monthly[(day.year, day.month)]['revenue'] += amount
+            monthly[(day.year, day.month)]['orders'] += orders
+        if (start_day is not None and day < start_day) or (end_day is not None and day > end_day):
+            continue
+        if status in status_stats:
+            status_stats[status] += orders
+        if status in REVENUE_STATUSES:
+            total_revenue += amount
+            total_orders += orders
+            plan = plan_stats.setdefault(plan, {'count': 0, 'revenue': 0})
+            plan['count'] += orders
+            plan['revenue'] += amount
+
+    return {
+        'totalRevenue': round(total_revenue, 2),
+        'totalOrders': total_orders,
+        'averageOrderValue': total_revenue / total_orders if total_orders > 0 else 0,
+        'planStats': {
+            name: {'count': plan['count'], 'revenue': round(plan['revenue'], 2)}
+            for name, plan in plan_stats.items()
+        },
+        'statusStats': status_stats,
+        'monthlyStats': [
+            {'month': start.strftime('%Y-%m'), 'revenue': round(monthly[(start.year, start.month)]['revenue'], 2),
+             'orders': monthly[(start.year, start.month)]['orders']}
+            for start in month_starts
+        ],
+    }
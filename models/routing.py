@@ -0,0 +1,154 @@
+import random
+import time
+from functools import wraps
+from threading import Lock
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+'''
+Routage des lectures vers les réplicas MariaDB.
+
+Les ressources marquées @read_only lisent sur un réplica (DATABASE_REPLICA_URLS), les
+écritures et tout le reste restent sur la base principale. Sans réplica configuré, tout
+passe par la principale.
+
+Lecture de ses propres écritures : un utilisateur qui vient d'écrire lit sur la
+principale pendant REPLICA_READ_YOUR_WRITES_SECONDS. L'écriture est mémorisée dans le
+worker (par identité JWT) et dans un cookie, pour les requêtes servies par un autre worker.
+'''
+
+LAST_WRITE_COOKIE = 'tcf_last_write'
+
+# Dernière écriture par identité JWT dans ce worker: {username: time.time()}
+_recent_writers = {}
+_recent_writers_lock = Lock()
+_MAX_TRACKED_WRITERS = 10000
+
+
+def replica_bind_key(index):
+    return f"replica_{index}"
+
+
+def init_replica_routing(app):
+    """Déclare les réplicas comme binds Flask-SQLAlchemy (à appeler avant db.init_app)"""
+    urls = app.config.get('DATABASE_REPLICA_URLS') or []
+    if isinstance(urls, str):
+        urls = [url.strip() for url in urls.split(',') if url.strip()]
+
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    engine_options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+    bind_keys = []
+    for index, url in enumerate(urls):
+        key = replica_bind_key(index)
+        binds[key] = dict(engine_options, url=url)
+        bind_keys.append(key)
+
+    app.config['SQLALCHEMY_BINDS'] = binds
+    app.config['REPLICA_BIND_KEYS'] = bind_keys
+    # Sans réplica, toutes les lectures vont déjà sur la principale : rien à mémoriser
+    if bind_keys:
+        app.after_request(_remember_write_in_cookie)
+
+
+def read_only(f):
+    """Marque une ressource en lecture seule: ses SELECT peuvent partir sur un réplica"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.db_read_only = not _recently_wrote()
+        try:
+            return f(*args, **kwargs)
+        finally:
+            g.db_read_only = False
+    return decorated_function
+
+
+def _current_identity():
+    try:
+        from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+        verify_jwt_in_request(optional=True)
+        return get_jwt_identity()
+    except Exception:
+        return None
+
+
+def _recently_wrote():
+    ttl = current_app.config.get('REPLICA_READ_YOUR_WRITES_SECONDS', 10)
+    now = time.time()
+
+    try:
+        if now - float(request.cookies.get(LAST_WRITE_COOKIE, 0)) < ttl:
+            return True
+    except ValueError:
+        pass
+
+    identity = _current_identity()
+    if identity is None:
+        return False
+    with _recent_writers_lock:
+        written_at = _recent_writers.get(identity)
+    return written_at is not None and now - written_at < ttl
+
+
+def record_write():
+    """Mémorise qu'une écriture a eu lieu pendant la requête courante"""
+    if not has_request_context() or not current_app.config.get('REPLICA_BIND_KEYS'):
+        return
+    g.db_wrote = True
+
+    identity = _current_identity()
+    if identity is None:
+        return
+    now = time.time()
+    with _recent_writers_lock:
+        if len(_recent_writers) >= _MAX_TRACKED_WRITERS:
+            ttl = current_app.config.get('REPLICA_READ_YOUR_WRITES_SECONDS', 10)
+            for key in [k for k, t in _recent_writers.items() if now - t >= ttl]:
+                del _recent_writers[key]
+        _recent_writers[identity] = now
+
+
+def _remember_write_in_cookie(response):
+    if g.get('db_wrote'):
+        response.set_cookie(
+            LAST_WRITE_COOKIE,
+            str(time.time()),
+            max_age=int(current_app.config.get('REPLICA_READ_YOUR_WRITES_SECONDS', 10)) + 1,
+            httponly=True,
+            samesite='Lax',
+        )
+    return response
+
+
+class RoutingSession(Session):
+    """Session Flask-SQLAlchemy qui envoie les SELECT des ressources @read_only aux réplicas"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and self._use_replica(clause):
+            engine = self._replica_engine()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    @staticmethod
+    def _use_replica(clause):
+        if not has_app_context() or not g.get('db_read_only') or g.get('db_wrote'):
+            return False
+        return clause is not None and getattr(clause, 'is_select', False)
+
+    def _replica_engine(self):
+        bind_keys = current_app.config.get('REPLICA_BIND_KEYS')
+        if not bind_keys:
+            return None
+        # Un seul réplica par requête pour des lectures cohérentes entre elles
+        key = g.get('db_replica_key')
+        if key is None:
+            key = g.db_replica_key = random.choice(bind_keys)
+        return self._db.engines[key]
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session, flush_context):
+    if session.new or session.dirty or session.deleted:
+        record_write()
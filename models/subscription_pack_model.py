@@ -1,4 +1,5 @@
 from models.exts import db
+from models.unit_of_work import save_changes
 from datetime import datetime
 
 
@@ -65,18 +66,18 @@ class SubscriptionPack(db.Model):
     
     def save(self):
         db.session.add(self)
-        db.session.commit()
+        save_changes()
     
     def delete(self):
         db.session.delete(self)
-        db.session.commit()
+        save_changes()
     
     def update(self, **kwargs):
         for key, value in kwargs.items():
             if hasattr(self, key):
                 setattr(self, key, value)
         self.updated_at = datetime.utcnow()
-        db.session.commit()
+        save_changes()
     
     def __repr__(self):
         return f"<SubscriptionPack {self.name}>"
@@ -103,11 +104,11 @@ class PackFeature(db.Model):
     
     def save(self):
         db.session.add(self)
-        db.session.commit()
+        save_changes()
     
     def delete(self):
         db.session.delete(self)
-        db.session.commit()
+        save_changes()
     
     def __repr__(self):
         return f"<PackFeature {self.feature_text[:50]}>"
\ No newline at end of file
@@ -1,10 +1,15 @@
 from models.exts import db
+from models.unit_of_work import save_changes
 from datetime import datetime
+from sqlalchemy.dialects import sqlite
 
 '''
 Modèle pour suivre les tentatives d'examen par utilisateur et par sujet
 '''
 
+# Tentatives autorisées par utilisateur et par sujet
+MAX_ATTEMPTS_PER_SUBJECT = 1
+
 class TCFAttempt(db.Model):
     __tablename__ = 'tcf_attempt'
     
@@ -28,24 +33,24 @@ class TCFAttempt(db.Model):
 
     def save(self):
         db.session.add(self)
-        db.session.commit()
+        save_changes()
 
     def delete(self):
         db.session.delete(self)
-        db.session.commit()
+        save_changes()
 
     def update(self, data):
         for key, value in data.items():
             setattr(self, key, value)
         self.updated_at = datetime.utcnow()
-        db.session.commit()
+        save_changes()
 
     def increment_attempt(self):
         """Incrémente le compteur de tentatives"""
         self.attempt_count += 1
         self.last_attempt_date = datetime.utcnow()
         self.updated_at = datetime.utcnow()
-        db.session.commit()
+        save_changes()
 
     def to_dict(self):
         return {
@@ -58,15 +63,73 @@ class TCFAttempt(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+    @property
+    def remaining_attempts(self):
+        return max(0, MAX_ATTEMPTS_PER_SUBJECT - self.attempt_count)
+
     @staticmethod
     def get_or_create_attempt(user_id, subject_id):
         """Récupère ou crée une tentative pour un utilisateur et un sujet"""
         attempt = TCFAttempt.query.filter_by(id_user=user_id, id_subject=subject_id).first()
         if not attempt:
-            attempt = TCFAttempt(
-                id_user=user_id,
-                id_subject=subject_id,
-                attempt_count=0
-            )
-            attempt.save()
-        return attempt
\ No newline at end of file
+            # Création sans conflit si un autre onglet crée la même ligne au même moment
+            _insert_if_absent(db.session.connection(), user_id, subject_id, 0, datetime.utcnow())
+            save_changes()
+            attempt = TCFAttempt.query.filter_by(id_user=user_id, id_subject=subject_id).one()
+        return attempt
+
+
+_attempts = TCFAttempt.__table__
+
+
+def _row_values(user_id, subject_id, attempt_count, now):
+    return {'id_user': user_id, 'id_subject': subject_id, 'attempt_count': attempt_count,
+            'last_attempt_date': now, 'created_at': now, 'updated_at': now}
+
+
+def _insert_if_absent(connection, user_id, subject_id, attempt_count, now):
+    """Insère la ligne (utilisateur, sujet) si elle n'existe pas ; retourne True si insérée"""
+    values = _row_values(user_id, subject_id, attempt_count, now)
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        statement = sqlite.insert(_attempts).values(**values).on_conflict_do_nothing(
+            index_elements=['id_user', 'id_subject'])
+    elif dialect in ('mysql', 'mariadb'):
+        statement = _attempts.insert().prefix_with('IGNORE').values(**values)
+    else:
+        exists = connection.execute(db.select(_attempts.c.id).where(
+            _attempts.c.id_user == user_id, _attempts.c.id_subject == subject_id)).first()
+        if exists:
+            return False
+        statement = _attempts.insert().values(**values)
+    return connection.execute(statement).rowcount == 1
+
+
+def reserve_attempt(connection, user_id, subject_id, max_attempts=MAX_ATTEMPTS_PER_SUBJECT):
+    """Réserve une tentative si l'utilisateur en a passé moins de `max_attempts` sur ce sujet ;
+    retourne True si la tentative est réservée.
+
+    SQLite : une seule instruction (INSERT ... ON CONFLICT DO UPDATE ... WHERE attempt_count < max).
+    MariaDB : INSERT IGNORE (première tentative, cas courant), sinon UPDATE conditionnel.
+    ON DUPLICATE KEY UPDATE ne convient pas : avec CLIENT_FOUND_ROWS (activé par
+    SQLAlchemy), une insertion et une mise à jour sans effet renvoient toutes deux 1.
+    """
+    now = datetime.utcnow()
+    if connection.dialect.name == 'sqlite':
+        statement = sqlite.insert(_attempts).values(**_row_values(user_id, subject_id, 1, now))
+        statement = statement.on_conflict_do_update(
+            index_elements=['id_user', 'id_subject'],
+            set_={'attempt_count': _attempts.c.attempt_count + 1, 'last_attempt_date': now, 'updated_at': now},
+            where=_attempts.c.attempt_count < max_attempts,
+        )
+        return connection.execute(statement).rowcount == 1
+
+    if max_attempts > 0 and _insert_if_absent(connection, user_id, subject_id, 1, now):
+        return True
+    reserved = connection.execute(
+        _attempts.update()
+        .where(_attempts.c.id_user == user_id, _attempts.c.id_subject == subject_id,
+               _attempts.c.attempt_count < max_attempts)
+        .values(attempt_count=_attempts.c.attempt_count + 1, last_attempt_date=now, updated_at=now)
+    )
+    return reserved.rowcount == 1
\ No newline at end of file
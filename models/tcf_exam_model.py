@@ -1,21 +1,112 @@
 from models.exts import db
+from models.unit_of_work import save_changes
 from datetime import datetime
+import zlib
+from sqlalchemy import event
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Session, undefer_group, validates
 
 '''
 Modèle pour stocker les informations des examens passés par les utilisateurs
 '''
 
+# Points attribués aux scores textuels ("Niveau C1", "B2"...), du niveau le plus haut au plus bas
+CEFR_POINTS = (('C2', 95), ('C1', 85), ('B2', 75), ('B1', 65), ('A2', 55), ('A1', 45))
+DEFAULT_SCORE_POINTS = 50
+
+
+def cefr_level(score):
+    """Niveau CECRL mentionné dans un score textuel ("Niveau C1" -> "C1"), sinon None"""
+    if not score:
+        return None
+    upper = str(score).upper()
+    for level, _ in CEFR_POINTS:
+        if level in upper:
+            return level
+    return None
+
+
+def score_points(score):
+    """Score d'examen en points: valeur numérique, sinon points du niveau CECRL"""
+    try:
+        return float(score)
+    except (ValueError, TypeError):
+        level = cefr_level(score)
+        return dict(CEFR_POINTS)[level] if level else DEFAULT_SCORE_POINTS
+
+
+def normalized_score(score):
+    """(score_numeric, cefr_level) d'un score brut, (None, None) sans score"""
+    if not score:
+        return None, None
+    return score_points(score), cefr_level(score)
+
+
+# Textes générés par l'IA (correction, traduction, points forts/faibles), longs et
+# répétitifs : stockés compressés (zlib) dans les colonnes <nom>_z (migration a4d9e3f7c182)
+COMPRESSED_TEXT_FIELDS = ('reponse_ia', 'traduction_reponse_ia', 'points_fort', 'point_faible')
+TEXT_COMPRESSION_LEVEL = 6
+
+
+def compress_text(text):
+    """Texte -> octets compressés (None reste None)"""
+    return None if text is None else zlib.compress(text.encode('utf-8'), TEXT_COMPRESSION_LEVEL)
+
+
+def decompress_text(data):
+    """Octets compressés -> texte (None reste None)"""
+    return None if data is None else zlib.decompress(data).decode('utf-8')
+
+
+def _compressed_text(name):
+    """Attribut texte `name` stocké compressé dans la colonne <name>_z.
+
+    Les lignes pas encore migrées (texte en clair dans la colonne <name>) restent lisibles ;
+    toute écriture passe par la colonne compressée. En SQL, l'attribut désigne la colonne
+    compressée (tests IS NULL uniquement).
+    """
+    stored, plain = f'_{name}_z', f'_{name}_plain'
+
+    def fget(self):
+        data = getattr(self, stored)
+        return decompress_text(data) if data is not None else getattr(self, plain)
+
+    def fset(self, value):
+        setattr(self, stored, compress_text(value))
+        setattr(self, plain, None)
+
+    def expr(cls):
+        return getattr(cls, stored)
+
+    return hybrid_property(fget, fset, expr=expr)
+
+
 class TCFExam(db.Model):
+    # Textes de l'examen (réponse, correction, traduction : plusieurs Ko chacun), chargés
+    # seulement à l'accès ou avec with_texts() : les listes et statistiques ne les lisent pas
+    TEXT_FIELDS = ('reponse_utilisateur', 'reponse_ia', 'points_fort', 'point_faible', 'traduction_reponse_ia')
+
     id = db.Column(db.Integer(), primary_key=True)
     id_user = db.Column(db.Integer(), db.ForeignKey('user.id'), nullable=False)
     id_subject = db.Column(db.Integer(), db.ForeignKey('tcf_subject.id'), nullable=False)
     id_task = db.Column(db.Integer(), db.ForeignKey('tcf_task.id'), nullable=False)
-    reponse_utilisateur = db.Column(db.Text(), nullable=True)
+    reponse_utilisateur = db.deferred(db.Column(db.Text(), nullable=True), group='texts')
     score = db.Column(db.String(20), nullable=True) # Score peut être un texte (ex: B2, C1) ou un nombre
-    reponse_ia = db.Column(db.Text(), nullable=True)
-    points_fort = db.Column(db.Text(), nullable=True)
-    point_faible = db.Column(db.Text(), nullable=True)
-    traduction_reponse_ia = db.Column(db.Text(), nullable=True)
+    # Score normalisé à l'écriture (voir _normalize_score): agrégats du dashboard en SQL
+    score_numeric = db.Column(db.Float(), nullable=True)
+    cefr_level = db.Column(db.String(2), nullable=True)
+    reponse_ia = _compressed_text('reponse_ia')
+    _reponse_ia_plain = db.deferred(db.Column('reponse_ia', db.Text(), nullable=True), group='texts')
+    _reponse_ia_z = db.deferred(db.Column('reponse_ia_z', db.LargeBinary(), nullable=True), group='texts')
+    points_fort = _compressed_text('points_fort')
+    _points_fort_plain = db.deferred(db.Column('points_fort', db.Text(), nullable=True), group='texts')
+    _points_fort_z = db.deferred(db.Column('points_fort_z', db.LargeBinary(), nullable=True), group='texts')
+    point_faible = _compressed_text('point_faible')
+    _point_faible_plain = db.deferred(db.Column('point_faible', db.Text(), nullable=True), group='texts')
+    _point_faible_z = db.deferred(db.Column('point_faible_z', db.LargeBinary(), nullable=True), group='texts')
+    traduction_reponse_ia = _compressed_text('traduction_reponse_ia')
+    _traduction_reponse_ia_plain = db.deferred(db.Column('traduction_reponse_ia', db.Text(), nullable=True), group='texts')
+    _traduction_reponse_ia_z = db.deferred(db.Column('traduction_reponse_ia_z', db.LargeBinary(), nullable=True), group='texts')
     type_exam = db.Column(db.String(10), nullable=False, default='écrit') # 'écrit' ou 'oral'
     date_passage = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
@@ -24,21 +115,43 @@ class TCFExam(db.Model):
     subject = db.relationship('TCFSubject', backref='exams')
     task = db.relationship('TCFTask', backref='exams')
 
+    # Index des recherches fréquentes (migration 3f2a9c1d8e47)
+    __table_args__ = (
+        db.Index('ix_tcf_exam_user_date', 'id_user', 'date_passage'),  # dashboard client, crédits du mois
+        db.Index('ix_tcf_exam_subject_date', 'id_subject', 'date_passage'),  # examens par sujet
+        db.Index('ix_tcf_exam_date_passage', 'date_passage'),  # graphiques et activité récente (admin)
+        # Statistiques client (moyenne, meilleur score, examens récents) sans lire les lignes (migration 5c1e7a9b2d30)
+        db.Index('ix_tcf_exam_user_score', 'id_user', 'score_numeric', 'date_passage'),
+    )
+
+    @staticmethod
+    def with_texts():
+        """Option de requête chargeant les textes dans la même requête que l'examen"""
+        return undefer_group('texts')
+
+    @validates('score')
+    def _normalize_score(self, key, score):
+        # Score numérique envoyé en JSON (14, 14.5) : stocké en texte comme la colonne
+        if score is not None and not isinstance(score, str):
+            score = str(score)
+        self.score_numeric, self.cefr_level = normalized_score(score)
+        return score
+
     def __repr__(self):
         return f"<TCFExam User:{self.id_user} Subject:{self.id_subject} Task:{self.id_task}>"
 
     def save(self):
         db.session.add(self)
-        db.session.commit()
+        save_changes()
 
     def delete(self):
         db.session.delete(self)
-        db.session.commit()
+        save_changes()
 
     def update(self, data):
         for key, value in data.items():
             setattr(self, key, value)
-        db.session.commit()
+        save_changes()
 
     def to_dict(self):
         return {
@@ -53,4 +166,37 @@ class TCFExam(db.Model):
             'point_faible': self.point_faible,
             'traduction_reponse_ia': self.traduction_reponse_ia,
             'date_passage': self.date_passage.isoformat() if self.date_passage else None
-        }
\ No newline at end of file
+        }
+
+# Tables dérivées de tcf_exam (statistiques, activité quotidienne). Query.update() et
+# Query.delete() ne déclenchent pas les événements de mapper : chaque table dérivée
+# enregistre (avant, après). avant(session, whereclause, is_delete, bind_arguments) lit
+# les lignes concernées ; après(connection, état) met la table à jour une fois
+# l'instruction exécutée, dans la même transaction.
+bulk_change_hooks = []
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _bulk_exam_changes(orm_execute_state):
+    if not (orm_execute_state.is_delete or orm_execute_state.is_update) or not bulk_change_hooks:
+        return None
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ is not TCFExam:
+        return None
+
+    session = orm_execute_state.session
+    bind_arguments = {'mapper': mapper}
+    whereclause = orm_execute_state.statement.whereclause
+    states = [
+        (after, before(session, whereclause, orm_execute_state.is_delete, bind_arguments))
+        for before, after in bulk_change_hooks
+    ]
+    result = orm_execute_state.invoke_statement()
+    connection = session.connection(bind_arguments=bind_arguments)
+    for after, state in states:
+        after(connection, state)
+    return result
+
+
+# Tables dérivées maintenues par événements sur TCFExam
+from models import activity_model, user_stats_model  # noqa: E402,F401
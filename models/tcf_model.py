@@ -1,5 +1,7 @@
 from models.exts import db
+from models.unit_of_work import save_changes
 from datetime import datetime
+from sqlalchemy.orm import load_only, selectinload
 
 '''
 Modèle pour les sujets TCF (Test de Connaissance du Français)
@@ -22,7 +24,7 @@ class TCFSubject(db.Model):
 
     def save(self):
         db.session.add(self)
-        db.session.commit()
+        save_changes()
 
     def delete(self):
         # Supprimer d'abord tous les examens liés à cette tâche
@@ -30,25 +32,32 @@ class TCFSubject(db.Model):
         TCFExam.query.filter_by(id_task=self.id).delete()
         
         db.session.delete(self)
-        db.session.commit()
+        save_changes()
 
     def update(self, data):
         for key, value in data.items():
             setattr(self, key, value)
-        db.session.commit()
+        save_changes()
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'date': self.date,
-            'status': self.status,
-            'duration': self.duration,
-            'combination': self.combination,
-            'subject_type': self.subject_type,
-            'description': self.description,
-            'tasks': [task.to_dict() for task in self.tasks]
-        }
+    # Champs sélectionnables par `?fields=` et relations par `?include=`
+    LIST_FIELDS = ('id', 'name', 'date', 'status', 'duration', 'combination', 'subject_type', 'description')
+    LIST_INCLUDES = ('tasks', 'documents')
+
+    @classmethod
+    def listing_options(cls, fields=LIST_FIELDS, include=LIST_INCLUDES):
+        """Options de chargement d'une liste : colonnes demandées, tâches et documents
+        chargés par lots (une requête par niveau au lieu d'une par sujet et par tâche)"""
+        options = [load_only(*[getattr(cls, name) for name in fields])]
+        if 'tasks' in include or 'documents' in include:
+            tasks = selectinload(cls.tasks)
+            options.append(tasks.selectinload(TCFTask.documents) if 'documents' in include else tasks)
+        return options
+
+    def to_dict(self, fields=LIST_FIELDS, include=LIST_INCLUDES):
+        data = {name: getattr(self, name) for name in fields}
+        if 'tasks' in include or 'documents' in include:
+            data['tasks'] = [task.to_dict(include_documents='documents' in include) for task in self.tasks]
+        return data
 
 
 class TCFTask(db.Model):
@@ -71,7 +80,7 @@ class TCFTask(db.Model):
 
     def save(self):
         db.session.add(self)
-        db.session.commit()
+        save_changes()
         return self
 
     def delete(self):
@@ -80,17 +89,17 @@ class TCFTask(db.Model):
         TCFExam.query.filter_by(id_task=self.id).delete()
         
         db.session.delete(self)
-        db.session.commit()
+        save_changes()
 
     def update(self, data):
         for key, value in data.items():
             if hasattr(self, key):
                 setattr(self, key, value)
-        db.session.commit()
+        save_changes()
         return self
 
-    def to_dict(self):
-        return {
+    def to_dict(self, include_documents=True):
+        data = {
             'id': self.id,
             'title': self.title,
             'structure': self.structure,
@@ -98,8 +107,10 @@ class TCFTask(db.Model):
             'min_word_count': self.min_word_count,
             'max_word_count': self.max_word_count,
             'duration': self.duration,
-            'documents': [doc.to_dict() for doc in self.documents]
         }
+        if include_documents:
+            data['documents'] = [doc.to_dict() for doc in self.documents]
+        return data
 
 
 class TCFDocument(db.Model):
@@ -114,7 +125,7 @@ class TCFDocument(db.Model):
 
     def save(self):
         db.session.add(self)
-        db.session.commit()
+        save_changes()
         return self
 
     def delete(self):
@@ -123,13 +134,13 @@ class TCFDocument(db.Model):
         TCFExam.query.filter_by(id_task=self.id).delete()
         
         db.session.delete(self)
-        db.session.commit()
+        save_changes()
 
     def update(self, data):
         for key, value in data.items():
             if hasattr(self, key):
                 setattr(self, key, value)
-        db.session.commit()
+        save_changes()
         return self
 
     def to_dict(self):
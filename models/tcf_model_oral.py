@@ -1,6 +1,8 @@
 from models.exts import db
+from models.unit_of_work import save_changes
 from datetime import datetime
 import json
+from sqlalchemy.orm import load_only, selectinload
 
 '''
 Modèles pour les sujets TCF Expression Orale
@@ -26,7 +28,7 @@ class TCFOralSubject(db.Model):
 
     def save(self):
         db.session.add(self)
-        db.session.commit()
+        save_changes()
         return self
 
     def delete(self):
@@ -35,27 +37,32 @@ class TCFOralSubject(db.Model):
         TCFExam.query.filter_by(id_subject=self.id).delete()
         
         db.session.delete(self)
-        db.session.commit()
+        save_changes()
 
     def update(self, data):
         for key, value in data.items():
             if hasattr(self, key):
                 setattr(self, key, value)
-        db.session.commit()
+        save_changes()
         return self
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'date': self.date,
-            'status': self.status,
-            'duration': self.duration,
-            'combination': self.combination,
-            'subject_type': self.subject_type,
-            'description': self.description,
-            'tasks': [task.to_dict() for task in self.oral_tasks]
-        }
+    # Champs sélectionnables par `?fields=` et relations par `?include=`
+    LIST_FIELDS = ('id', 'name', 'date', 'status', 'duration', 'combination', 'subject_type', 'description')
+    LIST_INCLUDES = ('tasks',)
+
+    @classmethod
+    def listing_options(cls, fields=LIST_FIELDS, include=LIST_INCLUDES):
+        """Options de chargement d'une liste : colonnes demandées, tâches chargées par lot"""
+        options = [load_only(*[getattr(cls, name) for name in fields])]
+        if 'tasks' in include:
+            options.append(selectinload(cls.oral_tasks))
+        return options
+
+    def to_dict(self, fields=LIST_FIELDS, include=LIST_INCLUDES):
+        data = {name: getattr(self, name) for name in fields}
+        if 'tasks' in include:
+            data['tasks'] = [task.to_dict() for task in self.oral_tasks]
+        return data
 
 
 class TCFOralTask(db.Model):
@@ -85,19 +92,19 @@ class TCFOralTask(db.Model):
 
     def save(self):
         db.session.add(self)
-        db.session.commit()
+        save_changes()
         return self
 
     def delete(self):
         db.session.delete(self)
-        db.session.commit()
+        save_changes()
 
     def update(self, data):
         for key, value in data.items():
             if hasattr(self, key):
                 setattr(self, key, value)
         self.updated_at = datetime.utcnow()
-        db.session.commit()
+        save_changes()
         return self
 
     def to_dict(self):
@@ -0,0 +1,118 @@
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.exts import db
+
+'''
+Unité de travail : une transaction validée une fois par appel de ressource.
+
+Les méthodes des modèles (save, update, delete, update_status...) appellent
+`save_changes()`. Dans une unité de travail (`@transactional` sur une méthode de
+ressource, ou `with unit_of_work():`), elles préparent seulement les changements :
+flush, pour attribuer les ids et vérifier les contraintes au point d'appel. La
+transaction est validée une fois en sortie, ou annulée sur exception ou réponse 5xx.
+Hors unité de travail (commandes CLI, scripts), elles valident immédiatement, comme
+avant.
+
+`after_commit(callback)` diffère un effet externe (email...) après la validation.
+
+Un `db.session.rollback()` pendant une unité de travail l'annule entièrement : rien de ce
+qui suit n'est validé en sortie et les effets différés sont abandonnés.
+'''
+
+_DEPTH = 'unit_of_work_depth'
+_CALLBACKS = 'unit_of_work_after_commit'
+_ROLLBACK_ONLY = 'unit_of_work_rollback_only'
+
+
+def in_unit_of_work():
+    return db.session.info.get(_DEPTH, 0) > 0
+
+
+def save_changes():
+    """Valide la session, ou prépare les changements si une unité de travail est en cours"""
+    if in_unit_of_work():
+        db.session.flush()
+    else:
+        db.session.commit()
+
+
+def after_commit(callback):
+    """Appelle `callback` après la validation de l'unité de travail en cours (aussitôt sinon)"""
+    if in_unit_of_work():
+        db.session.info.setdefault(_CALLBACKS, []).append(callback)
+    else:
+        callback()
+
+
+@contextmanager
+def unit_of_work():
+    """Une transaction pour le bloc : validée en sortie, annulée sur exception (imbrication
+    possible : seule l'unité la plus externe valide)"""
+    session = db.session
+    depth = session.info.get(_DEPTH, 0)
+    session.info[_DEPTH] = depth + 1
+    try:
+        yield session
+    except BaseException:
+        session.info[_DEPTH] = depth
+        if depth == 0:
+            session.info.pop(_CALLBACKS, None)
+            session.rollback()
+            session.info.pop(_ROLLBACK_ONLY, None)
+        raise
+    session.info[_DEPTH] = depth
+    if depth > 0:
+        return
+    callbacks = session.info.pop(_CALLBACKS, [])
+    if session.info.pop(_ROLLBACK_ONLY, False) or not session.is_active:
+        # Rollback en cours d'unité, ou échec de flush rattrapé sans rollback : rien à valider
+        session.rollback()
+        return
+    session.commit()
+    for callback in callbacks:
+        callback()
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _doom_unit_of_work(session, previous_transaction):
+    if previous_transaction.nested or session.info.get(_DEPTH, 0) == 0:
+        return
+    session.info[_ROLLBACK_ONLY] = True
+    session.info.pop(_CALLBACKS, None)
+
+
+class _ErrorResponse(Exception):
+    """Réponse 5xx d'une ressource : annule son unité de travail"""
+
+    def __init__(self, response):
+        super().__init__(response)
+        self.response = response
+
+
+def _status_code(response):
+    if isinstance(response, Response):
+        return response.status_code
+    if isinstance(response, tuple) and len(response) > 1 and isinstance(response[1], int):
+        return response[1]
+    return 200
+
+
+def transactional(f):
+    """Méthode de ressource exécutée dans une unité de travail : un seul commit par appel,
+    annulation sur exception ou réponse 5xx"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        try:
+            with unit_of_work():
+                response = f(*args, **kwargs)
+                if _status_code(response) >= 500:
+                    raise _ErrorResponse(response)
+        except _ErrorResponse as error:
+            return error.response
+        return response
+    return decorated_function
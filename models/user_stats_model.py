@@ -0,0 +1,233 @@
+from datetime import datetime, timedelta
+from itertools import groupby
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from models.counters import as_date, increment, track_previous_values
+from models.exts import db
+from models.tcf_exam_model import TCFExam, bulk_change_hooks
+
+'''
+Statistiques par utilisateur maintenues à l'écriture des examens.
+
+La ligne user_stats d'un utilisateur est mise à jour dans la transaction qui insère,
+modifie ou supprime un de ses examens (événements ci-dessous) : le dashboard client lit
+une seule ligne par clé primaire au lieu de parcourir ses examens.
+
+- insertion (cas courant) : mise à jour incrémentale des compteurs et de la série ;
+- modification du score, de la date ou de l'utilisateur, suppression (y compris
+  Query.delete()) : recalcul de la ligne depuis tcf_exam pour les utilisateurs concernés.
+
+`flask rebuild-user-stats` recalcule toute la table (dérive, import hors ORM).
+'''
+
+
+class UserStats(db.Model):
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(db.Integer(), db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    total_exams = db.Column(db.Integer(), default=0, nullable=False)
+    # Examens avec un score (score_numeric renseigné), base de la moyenne
+    scored_exams = db.Column(db.Integer(), default=0, nullable=False)
+    score_sum = db.Column(db.Float(), default=0, nullable=False)
+    best_score = db.Column(db.Float(), nullable=True)
+    last_exam_date = db.Column(db.Date(), nullable=True)
+    # Jours consécutifs avec au moins un examen, jusqu'à last_exam_date inclus
+    current_streak = db.Column(db.Integer(), default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<UserStats User:{self.user_id} Exams:{self.total_exams}>"
+
+    @property
+    def average_score(self):
+        return round(self.score_sum / self.scored_exams, 1) if self.scored_exams else 0
+
+    def streak_on(self, today):
+        """Série d'étude vue le jour `today` : interrompue si aucun examen ce jour-là"""
+        return self.current_streak if self.last_exam_date == today else 0
+
+
+def study_streak(exam_dates, today):
+    """Nombre de jours consécutifs avec un examen jusqu'à `today` (dates distinctes triées décroissantes)"""
+    streak = 0
+    expected = today
+    for exam_date in exam_dates:
+        if exam_date > expected:
+            continue
+        if exam_date < expected:
+            break
+        streak += 1
+        expected -= timedelta(days=1)
+    return streak
+
+
+_stats = UserStats.__table__
+_exams = TCFExam.__table__
+
+# Ancien propriétaire d'un examen réattribué
+track_previous_values(TCFExam.id_user)
+
+
+def compute_user_stats(connection, user_ids):
+    """Statistiques recalculées depuis tcf_exam : {user_id: valeurs des colonnes} (utilisateurs avec examens)"""
+    if not user_ids:
+        return {}
+    totals = connection.execute(
+        db.select(
+            _exams.c.id_user,
+            db.func.count(_exams.c.id),
+            db.func.count(_exams.c.score_numeric),
+            db.func.coalesce(db.func.sum(_exams.c.score_numeric), 0),
+            db.func.max(_exams.c.score_numeric),
+        ).where(_exams.c.id_user.in_(user_ids)).group_by(_exams.c.id_user)
+    ).all()
+    exam_day = db.func.date(_exams.c.date_passage)
+    days = connection.execute(
+        db.select(_exams.c.id_user, exam_day).distinct()
+        .where(_exams.c.id_user.in_(user_ids))
+        .order_by(_exams.c.id_user, exam_day.desc())
+    ).all()
+    days_by_user = {
+        user_id: [as_date(day) for _, day in rows]
+        for user_id, rows in groupby(days, key=lambda row: row[0])
+    }
+
+    stats = {}
+    for user_id, total, scored, score_sum, best in totals:
+        exam_days = days_by_user.get(user_id, [])
+        last_exam_date = exam_days[0] if exam_days else None
+        stats[user_id] = {
+            'user_id': user_id,
+            'total_exams': total,
+            'scored_exams': scored,
+            'score_sum': float(score_sum),
+            'best_score': best,
+            'last_exam_date': last_exam_date,
+            'current_streak': study_streak(exam_days, last_exam_date) if last_exam_date else 0,
+            'updated_at': datetime.utcnow(),
+        }
+    return stats
+
+
+def refresh_user_stats(connection, user_ids):
+    """Remplace les lignes user_stats de `user_ids` par des valeurs recalculées"""
+    user_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+    if not user_ids:
+        return
+    stats = compute_user_stats(connection, user_ids)
+    connection.execute(_stats.delete().where(_stats.c.user_id.in_(user_ids)))
+    if stats:
+        connection.execute(_stats.insert(), list(stats.values()))
+
+
+def rebuild_batch(connection, after_user_id, batch_size):
+    """Recalcule les statistiques des `batch_size` utilisateurs suivants ; retourne (dernier id, lignes écrites)"""
+    user_ids = connection.execute(
+        db.select(_exams.c.id_user).distinct()
+        .where(_exams.c.id_user > after_user_id)
+        .order_by(_exams.c.id_user)
+        .limit(batch_size)
+    ).scalars().all()
+    if not user_ids:
+        # Lignes restantes : utilisateurs qui n'ont plus d'examen
+        connection.execute(_stats.delete().where(_stats.c.user_id > after_user_id))
+        return None, 0
+    stats = compute_user_stats(connection, user_ids)
+    connection.execute(_stats.delete().where(
+        _stats.c.user_id > after_user_id, _stats.c.user_id <= user_ids[-1]))
+    connection.execute(_stats.insert(), list(stats.values()))
+    return user_ids[-1], len(stats)
+
+
+def rebuild_user_stats(engine, batch_size=1000, after_user_id=0, echo=None):
+    """Recalcule user_stats par lots d'utilisateurs (un commit par lot) ; retourne le nombre d'utilisateurs"""
+    total = 0
+    while True:
+        with engine.begin() as connection:
+            after_user_id, written = rebuild_batch(connection, after_user_id, batch_size)
+        if after_user_id is None:
+            return total
+        total += written
+        if echo:
+            echo(f"- {total} utilisateurs recalculés (id <= {after_user_id})")
+
+
+def _refreshed_in_flush(exam):
+    """Utilisateurs recalculés depuis tcf_exam pendant le flush en cours"""
+    return object_session(exam).info.setdefault('user_stats_refreshed', set())
+
+
+def _record_new_exam(connection, exam):
+    """Ajoute un examen inséré aux statistiques de son utilisateur (incrémental)"""
+    # after_insert est émis une fois toutes les lignes du flush insérées : un recalcul
+    # compte déjà les autres examens de l'utilisateur insérés dans le même flush
+    refreshed = _refreshed_in_flush(exam)
+    if exam.id_user in refreshed:
+        return
+    # Ligne créée à zéro si absente avant d'être verrouillée : les premiers examens
+    # concurrents d'un utilisateur attendent sur cette ligne, au lieu de poser chacun un
+    # verrou d'intervalle (InnoDB) qui bloque l'INSERT de l'autre (deadlock)
+    increment(connection, _stats, {'user_id': exam.id_user}, {'total_exams': 0})
+    row = connection.execute(
+        db.select(_stats).where(_stats.c.user_id == exam.id_user).with_for_update()
+    ).mappings().one()
+    exam_date = as_date(exam.date_passage)
+    if not row['total_exams'] or exam_date is None or (row['last_exam_date'] and exam_date < row['last_exam_date']):
+        # Première ligne de l'utilisateur ou examen antidaté : la série doit être recalculée
+        refresh_user_stats(connection, [exam.id_user])
+        refreshed.add(exam.id_user)
+        return
+
+    values = {'total_exams': row['total_exams'] + 1, 'updated_at': datetime.utcnow()}
+    if exam.score_numeric is not None:
+        values['scored_exams'] = row['scored_exams'] + 1
+        values['score_sum'] = row['score_sum'] + exam.score_numeric
+        if row['best_score'] is None or exam.score_numeric > row['best_score']:
+            values['best_score'] = exam.score_numeric
+
+    last_exam_date = row['last_exam_date']
+    if last_exam_date is None or exam_date > last_exam_date:
+        values['last_exam_date'] = exam_date
+        consecutive = last_exam_date is not None and exam_date - last_exam_date == timedelta(days=1)
+        values['current_streak'] = row['current_streak'] + 1 if consecutive else 1
+
+    connection.execute(_stats.update().where(_stats.c.user_id == exam.id_user).values(**values))
+
+
+@event.listens_for(TCFExam, 'after_insert')
+def _after_exam_insert(mapper, connection, exam):
+    _record_new_exam(connection, exam)
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    session.info.pop('user_stats_refreshed', None)
+
+
+@event.listens_for(TCFExam, 'after_update')
+def _after_exam_update(mapper, connection, exam):
+    state = inspect(exam)
+    if not any(state.attrs[key].history.has_changes() for key in ('id_user', 'score_numeric', 'date_passage')):
+        return
+    user_ids = {exam.id_user}
+    # Ancien utilisateur si l'examen a changé de propriétaire
+    user_ids.update(state.attrs.id_user.history.deleted or ())
+    refresh_user_stats(connection, user_ids)
+
+
+@event.listens_for(TCFExam, 'after_delete')
+def _after_exam_delete(mapper, connection, exam):
+    refresh_user_stats(connection, [exam.id_user])
+
+
+def _users_before_bulk_change(session, whereclause, is_delete, bind_arguments):
+    user_query = db.select(_exams.c.id_user).distinct()
+    if whereclause is not None:
+        user_query = user_query.where(whereclause)
+    return session.execute(user_query, bind_arguments=bind_arguments).scalars().all()
+
+
+# Query.delete() / .update() sur TCFExam : recalcul des utilisateurs touchés
+bulk_change_hooks.append((_users_before_bulk_change, refresh_user_stats))
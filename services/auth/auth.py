@@ -1,13 +1,16 @@
 from flask import request, jsonify, make_response, g, current_app
 from flask_restx import Resource, Namespace, fields
-from flask_jwt_extended import JWTManager, create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import JWTManager, create_refresh_token, jwt_required, get_jwt_identity
 from models.model import User
 from werkzeug.security import generate_password_hash, check_password_hash
 from models.exts import db
+from sqlalchemy import and_, or_
 import random
 import string
+from services.auth.principal import create_user_access_token, current_principal, current_user
 from services.email.email_service import EmailService, email_service
-from services.moderator_permissions import ModeratorPermissions, validate_moderator_access
+from services.listing import ListingParamError, keyset_paginate, keyset_requested, page_headers
+from services.moderator_permissions import validate_moderator_access
 import logging
 import os
 
@@ -165,7 +168,7 @@ class SignUp(Resource):
         # pour inclure le numéro de commande (voir order_public.py)
         
         # Générer les tokens JWT après la création du compte
-        access_token = create_access_token(identity=new_user.username)
+        access_token = create_user_access_token(new_user)
         refresh_token = create_refresh_token(identity=new_user.username)
         
         return make_response(jsonify({
@@ -197,7 +200,7 @@ class Login(Resource):
             return {"message": "Utilisateur non trouvé. Vérifiez votre nom d'utilisateur ou email."}, 404
             
         if check_password_hash(user.password, password):
-            access_token = create_access_token(identity=user.username)
+            access_token = create_user_access_token(user)
             refresh_token = create_refresh_token(
                 identity=user.username)
             return {
@@ -250,7 +253,7 @@ class SimulateLogin(Resource):
                 db.session.add(user)
                 db.session.commit()
 
-            access_token = create_access_token(identity=user.username)
+            access_token = create_user_access_token(user)
             refresh_token = create_refresh_token(identity=user.username)
             return {
                 'access_token': access_token,
@@ -274,17 +277,16 @@ class DeleteUser(Resource):
     def delete(self, username):
         try:
             # Récupérer l'utilisateur connecté
-            current_user_id = get_jwt_identity()
-            current_user = User.query.filter_by(username=current_user_id).first()
+            principal = current_principal()
             
-            if not current_user:
+            if not principal:
                 return {'message': 'Utilisateur connecté non trouvé'}, 404
             
             # Si l'utilisateur connecté est un modérateur, vérifier les permissions
-            if current_user.role == 'moderator':
+            if principal.role == 'moderator':
                 moderator_info = {
-                    'username': current_user.username,
-                    'role': current_user.role
+                    'username': principal.username,
+                    'role': principal.role
                 }
                 
                 can_delete, message, target_user_info = validate_moderator_access(
@@ -313,8 +315,7 @@ class UserInfo(Resource):
     def get(self):
         """Récupérer les informations de l'utilisateur connecté"""
         try:
-            current_user_id = get_jwt_identity()
-            user = User.query.get(current_user_id)
+            user = current_user()
             
             if not user:
                 return {'message': 'Utilisateur non trouvé'}, 404
@@ -370,39 +371,41 @@ update_sold_model = auth_ns.model(
 @auth_ns.route('/users')
 class UserListResource(Resource):
     @jwt_required()
+    @auth_ns.doc(params={
+        'limit': 'Taille de page (pagination par curseur, du plus récent au plus ancien)',
+        'cursor': 'Curseur de la page suivante (en-tête X-Next-Cursor de la page précédente)',
+        'total': '1 : total borné dans X-Total-Count',
+    })
     @auth_ns.marshal_list_with(user_model)
     def get(self):
         '''Récupérer tous les utilisateurs'''
         try:
             # Récupérer l'utilisateur connecté
-            current_user_id = get_jwt_identity()
-            current_user = User.query.filter_by(username=current_user_id).first()
+            principal = current_principal()
             
-            if not current_user:
+            if not principal:
                 return {'message': 'Utilisateur connecté non trouvé'}, 404
             
             # Si l'utilisateur connecté est un modérateur, filtrer les utilisateurs
-            if current_user.role == 'moderator':
-                moderator_info = {
-                    'username': current_user.username,
-                    'role': current_user.role
-                }
-                
-                all_users = User.query.all()
-                accessible_users = ModeratorPermissions.get_accessible_users(
-                    moderator_info, [user.to_dict() for user in all_users]
-                )
-                
-                # Récupérer les objets User correspondants
-                accessible_usernames = [user['username'] for user in accessible_users]
-                users = User.query.filter(User.username.in_(accessible_usernames)).all()
-                
-                return users
+            if principal.role == 'moderator':
+                # Mêmes règles que ModeratorPermissions.get_accessible_users, filtrées en SQL
+                # (index ix_user_created_by_role) au lieu de charger tous les utilisateurs
+                query = User.query.filter(or_(
+                    User.username == principal.username,
+                    and_(User.role == 'client', User.created_by == principal.username),
+                ))
             else:
                 # Pour les administrateurs, retourner tous les utilisateurs
-                users = User.query.all()
-                return users
+                query = User.query
+            
+            if not keyset_requested():
+                return query.all()
+            # Page d'utilisateurs, des plus récents aux plus anciens (index ix_user_date_create)
+            page = keyset_paginate(query, User.date_create, User.id)
+            return page.items, 200, page_headers(page)
                 
+        except ListingParamError as e:
+            auth_ns.abort(400, str(e))
         except Exception as e:
             return {'message': f'Erreur lors de la récupération des utilisateurs: {str(e)}'}, 500
 
@@ -410,8 +413,11 @@ class UserListResource(Resource):
 class RefreshResource(Resource):
     @jwt_required(refresh=True)
     def post(self):
-        current_user = get_jwt_identity()
-        new_access_token = create_access_token(identity=current_user)
+        # Claims relus en base : rôle et créateur à jour dans le nouveau jeton
+        user = User.query.filter_by(username=get_jwt_identity()).first()
+        if not user:
+            return {'message': 'Utilisateur non trouvé'}, 404
+        new_access_token = create_user_access_token(user)
 
         return make_response(jsonify({"access_token": new_access_token}), 200)
 
@@ -435,17 +441,16 @@ class UpdateSoldResource(Resource):
             new_sold_value = data.get('new_sold_value')
             
             # Récupérer l'utilisateur connecté
-            current_user_id = get_jwt_identity()
-            current_user = User.query.filter_by(username=current_user_id).first()
+            principal = current_principal()
             
-            if not current_user:
+            if not principal:
                 return {'message': 'Utilisateur connecté non trouvé'}, 404
             
             # Si l'utilisateur connecté est un modérateur, vérifier les permissions
-            if current_user.role == 'moderator':
+            if principal.role == 'moderator':
                 moderator_info = {
-                    'username': current_user.username,
-                    'role': current_user.role
+                    'username': principal.username,
+                    'role': principal.role
                 }
                 
                 can_manage, message, target_user_info = validate_moderator_access(
@@ -479,17 +484,16 @@ class UpdateTotalSoldResource(Resource):
             new_total_sold_value = data.get('new_total_sold_value')
             
             # Récupérer l'utilisateur connecté
-            current_user_id = get_jwt_identity()
-            current_user = User.query.filter_by(username=current_user_id).first()
+            principal = current_principal()
             
-            if not current_user:
+            if not principal:
                 return {'message': 'Utilisateur connecté non trouvé'}, 404
             
             # Si l'utilisateur connecté est un modérateur, vérifier les permissions
-            if current_user.role == 'moderator':
+            if principal.role == 'moderator':
                 moderator_info = {
-                    'username': current_user.username,
-                    'role': current_user.role
+                    'username': principal.username,
+                    'role': principal.role
                 }
                 
                 can_manage, message, target_user_info = validate_moderator_access(
@@ -516,24 +520,22 @@ class UpdateTotalSoldResource(Resource):
 class MyPlanResource(Resource):
     @jwt_required()
     def get(self):
-        current_user_identity = get_jwt_identity()
-        user = User.query.filter_by(username=current_user_identity).first()
-        if user:
-            return jsonify({'subscription_plan': user.subscription_plan})
+        principal = current_principal()
+        if principal:
+            return jsonify({'subscription_plan': principal.subscription_plan})
         else:
-            return jsonify({'message': 'User not found'}), 404
+            return {'message': 'User not found'}, 404
 
 @auth_ns.route('/me')
 class CurrentUserResource(Resource):
     @jwt_required()
     def get(self):
         '''Récupérer les informations de l'utilisateur connecté'''
-        current_user_identity = get_jwt_identity()
-        user = User.query.filter_by(username=current_user_identity).first()
+        user = current_user()
         if user:
             return jsonify(user.to_dict())
         else:
-            return jsonify({'message': 'User not found'}), 404
+            return {'message': 'User not found'}, 404
 
 
 @auth_ns.route('/forgot-password')
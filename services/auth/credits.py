@@ -0,0 +1,53 @@
+from flask import request
+from flask_restx import Resource, Namespace, fields
+from flask_jwt_extended import jwt_required
+from models.credit_model import CONSUME, consume_credits
+from models.exts import db
+from models.model import User
+from services.auth.principal import current_principal
+from services.monitoring.query_budget import query_budget
+
+credits_ns = Namespace('credits', description='Consommation des crédits (solde utilisateur)')
+
+consume_model = credits_ns.model(
+    "CreditConsume",
+    {
+        "amount": fields.Float(default=1, description="Crédits à consommer (> 0)"),
+        "reason": fields.String(default=CONSUME, description="Motif enregistré dans le registre"),
+        "reference": fields.String(description="Référence libre (examen, tâche...)"),
+    }
+)
+
+
+@credits_ns.route('/consume')
+class CreditConsumeResource(Resource):
+    @jwt_required()
+    @credits_ns.expect(consume_model)
+    # Mise à jour, solde, registre ; plus le principal à l'expiration de son cache
+    @query_budget(max_queries=4)
+    def post(self):
+        '''Consommer des crédits de l'utilisateur connecté (mise à jour conditionnelle, atomique)'''
+        data = request.get_json(silent=True) or {}
+        amount = data.get('amount', 1)
+        if isinstance(amount, bool) or not isinstance(amount, (int, float)) or amount <= 0:
+            return {'message': 'amount doit être un nombre positif'}, 400
+        reason = str(data.get('reason') or CONSUME)[:20]
+        reference = data.get('reference')
+
+        principal = current_principal()
+        if not principal:
+            return {'message': 'Utilisateur non trouvé'}, 404
+        try:
+            balance = consume_credits(db.session.connection(), principal.id, amount, reason,
+                                      str(reference)[:200] if reference is not None else None)
+            if balance is None:
+                db.session.rollback()
+                user = db.session.get(User, principal.id)
+                if not user:
+                    return {'message': 'Utilisateur non trouvé'}, 404
+                return {'message': 'Solde insuffisant', 'sold': user.sold}, 402
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return {'message': f"Erreur lors de la consommation des crédits : {str(e)}"}, 500
+        return {'message': 'Crédits consommés', 'consumed': amount, 'sold': balance}, 200
@@ -0,0 +1,155 @@
+import time
+from collections import namedtuple
+from threading import Lock
+
+from flask import current_app, g
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from models.exts import db
+from models.model import User
+
+'''
+Utilisateur connecté (principal) des requêtes authentifiées.
+
+Les jetons d'accès portent, en plus de l'identité (username), l'id, le rôle et le créateur
+de l'utilisateur (claims `uid`, `role`, `created_by`). `current_principal()` résout
+l'utilisateur une fois par requête, depuis un cache du worker valable
+PRINCIPAL_CACHE_SECONDS : la plupart des requêtes ne lisent plus la table user.
+
+La base reste la référence : à l'expiration du cache, le principal est relu (par id si le
+jeton porte `uid`). Un changement de rôle, de plan, de créateur ou une suppression
+invalide l'entrée du worker après le commit ; les autres workers la relisent au plus tard
+à l'expiration. `/auth/refresh` émet un jeton avec les claims à jour.
+'''
+
+Principal = namedtuple('Principal', ['id', 'username', 'role', 'created_by', 'subscription_plan'])
+
+# Attributs de User repris dans le principal
+_PRINCIPAL_ATTRIBUTES = ('username', 'role', 'created_by', 'subscription_plan')
+_CHANGED_KEY = 'principals_changed'
+
+# Principaux par username dans ce worker: {username: (expire_à, Principal)}
+_principals = {}
+_principals_lock = Lock()
+_MAX_CACHED_PRINCIPALS = 10000
+
+
+def init_principal(app):
+    """Vide le cache du worker et le principal de chaque requête en fin de requête"""
+    clear_principal_cache()
+    app.teardown_request(_forget_request_principal)
+
+
+def _forget_request_principal(exception=None):
+    g.pop('principal', None)
+
+
+def principal_claims(user):
+    return {'uid': user.id, 'role': user.role, 'created_by': user.created_by}
+
+
+def create_user_access_token(user):
+    """Jeton d'accès de `user`, avec les claims du principal"""
+    return create_access_token(identity=user.username, additional_claims=principal_claims(user))
+
+
+def _from_user(user):
+    return Principal(user.id, user.username, user.role, user.created_by, user.subscription_plan)
+
+
+def current_principal():
+    """Principal de la requête (None si l'utilisateur n'existe plus) ; @jwt_required doit précéder"""
+    if 'principal' in g:
+        return g.principal
+    username = get_jwt_identity()
+    user_id = get_jwt().get('uid')
+    principal = _cached_principal(username, user_id)
+    if principal is None:
+        query = User.query.filter_by(id=user_id) if user_id is not None else User.query.filter_by(username=username)
+        user = query.first()
+        if user is not None and user.username == username:
+            principal = _from_user(user)
+            _cache_principal(principal)
+    g.principal = principal
+    return principal
+
+
+def current_user():
+    """Ligne User complète de l'utilisateur connecté (solde, email...), lue par clé primaire.
+
+    Sans requête supplémentaire si le principal vient d'être relu dans la requête.
+    """
+    principal = current_principal()
+    return db.session.get(User, principal.id) if principal is not None else None
+
+
+def _cached_principal(username, user_id):
+    now = time.monotonic()
+    with _principals_lock:
+        entry = _principals.get(username)
+    if entry is None or entry[0] <= now:
+        return None
+    principal = entry[1]
+    # Compte supprimé puis recréé sous le même nom : l'id du jeton ne correspond plus
+    if user_id is not None and principal.id != user_id:
+        return None
+    return principal
+
+
+def _cache_principal(principal):
+    ttl = current_app.config.get('PRINCIPAL_CACHE_SECONDS', 60)
+    if ttl <= 0:
+        return
+    now = time.monotonic()
+    with _principals_lock:
+        if len(_principals) >= _MAX_CACHED_PRINCIPALS:
+            for key in [k for k, (expires_at, _) in _principals.items() if expires_at <= now]:
+                del _principals[key]
+            if len(_principals) >= _MAX_CACHED_PRINCIPALS:
+                _principals.clear()
+        _principals[principal.username] = (now + ttl, principal)
+
+
+def invalidate_principal(*usernames):
+    with _principals_lock:
+        for username in usernames:
+            _principals.pop(username, None)
+
+
+def clear_principal_cache():
+    with _principals_lock:
+        _principals.clear()
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_principals(session, flush_context):
+    changed = set()
+    for user in session.deleted:
+        if isinstance(user, User):
+            changed.add(user.username)
+    for user in session.dirty:
+        if not isinstance(user, User):
+            continue
+        state = inspect(user)
+        for key in _PRINCIPAL_ATTRIBUTES:
+            history = state.attrs[key].history
+            if history.has_changes():
+                changed.add(user.username)
+                # Ancien nom d'utilisateur si le username a changé
+                changed.update(value for value in history.deleted if key == 'username' and value)
+    if changed:
+        session.info.setdefault(_CHANGED_KEY, set()).update(changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_principals(session):
+    changed = session.info.pop(_CHANGED_KEY, None)
+    if changed:
+        invalidate_principal(*changed)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_changed_principals(session, previous_transaction):
+    session.info.pop(_CHANGED_KEY, None)
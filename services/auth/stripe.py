@@ -1,11 +1,16 @@
-import stripe
 from flask import request, jsonify, make_response, current_app
 import traceback
 from flask_restx import Resource, Namespace, fields
 from models.model import User
 from models.order_model import Order
+from models.credit_model import PURCHASE, grant_credits
 from models.exts import db
+from models.unit_of_work import after_commit, in_unit_of_work, save_changes, transactional
 from datetime import datetime
+from services.lazy_imports import lazy_import
+
+# SDK Stripe chargé au premier appel (voir services/lazy_imports.py)
+stripe = lazy_import('stripe')
 
 # La clé API Stripe sera configurée dynamiquement lors de l'initialisation de l'application
 # Voir la fonction init_stripe() ci-dessous
@@ -138,6 +143,7 @@ class StripeCheckoutSession(Resource):
 
 @stripe_ns.route('/verify-payment')
 class StripeVerifyPayment(Resource):
+    @transactional
     @stripe_ns.expect(payment_verify_model)
     def post(self):
         """Vérifier le statut d'un paiement Stripe et mettre à jour l'utilisateur si nécessaire"""
@@ -181,6 +187,7 @@ class StripeVerifyPayment(Resource):
 # Webhook pour recevoir les événements Stripe
 @stripe_ns.route('/webhook')
 class StripeWebhook(Resource):
+    @transactional
     def post(self):
         payload = request.data
         sig_header = request.headers.get('Stripe-Signature')
@@ -231,6 +238,8 @@ class StripeWebhook(Resource):
                 
         except Exception as e:
             current_app.logger.error(f"Erreur webhook Stripe: {str(e)}")
+            # Rien de l'événement n'est validé : Stripe le renverra
+            db.session.rollback()
             return make_response(jsonify({"error": str(e)}), 400)
         
         return make_response(jsonify({"status": "success"}), 200)
@@ -248,7 +257,7 @@ def create_order_and_update_user(session, user_id, plan_name, product_id):
                 existing_order.status = 'paid'
                 existing_order.payment_status = 'completed'
                 existing_order.paid_at = datetime.utcnow()
-                db.session.commit()
+                save_changes()
             return True
         
         # Récupérer l'utilisateur
@@ -304,8 +313,8 @@ def create_order_and_update_user(session, user_id, plan_name, product_id):
         # (ne pas ajouter si l'utilisateur a déjà ce plan actif)
         if not user_has_active_plan or old_plan != plan_name:
             new_usages = float(subscription_pack.usages)
-            user.sold += new_usages
-            user.total_sold += new_usages
+            # Ajout atomique au solde, inscrit au registre des crédits (même transaction que la commande)
+            grant_credits(db.session.connection(), user.id, new_usages, PURCHASE, session.get('id'))
             current_app.logger.info(
                 f"Nouveaux crédits ajoutés: {new_usages} pour le plan {plan_name}"
             )
@@ -316,7 +325,7 @@ def create_order_and_update_user(session, user_id, plan_name, product_id):
         
         # Sauvegarder la commande et l'utilisateur
         db.session.add(order)
-        db.session.commit()
+        save_changes()
         
         current_app.logger.info(
             f"Commande {order.order_number} créée et plan mis à jour pour l'utilisateur {user_id}: "
@@ -325,40 +334,47 @@ def create_order_and_update_user(session, user_id, plan_name, product_id):
             f"Total: {old_total_sold} -> {user.total_sold}"
         )
         
-        # Envoyer l'email de bienvenue APRÈS que toutes les opérations DB soient terminées
+        # Envoyer l'email de bienvenue APRÈS la validation de la transaction
         # Ceci évite les ROLLBACK si l'envoi d'email échoue
-        try:
-            from services.email.email_service import email_service
-            
-            user_email_data = {
-                'username': user.username,
-                'email': user.email,
-                'nom': user.nom,
-                'prenom': user.prenom,
-                'subscription_plan': user.subscription_plan,
-                'sold': user.sold
-            }
-            
-            email_sent = email_service.send_welcome_email(user_email_data, order.order_number)
-            if email_sent:
-                current_app.logger.info(f"Email de bienvenue envoyé avec succès pour la commande {order.order_number}")
-            else:
-                current_app.logger.warning(f"Échec de l'envoi de l'email de bienvenue pour la commande {order.order_number}")
-                
-        except Exception as e:
-            # IMPORTANT: Ne pas faire de ROLLBACK ici car la commande est déjà sauvegardée
-            # L'échec d'envoi d'email ne doit pas annuler la transaction de commande
-            current_app.logger.error(f"Erreur lors de l'envoi de l'email de bienvenue: {str(e)}")
-            current_app.logger.warning(f"La commande {order.order_number} a été créée avec succès malgré l'échec de l'email")
+        after_commit(lambda: _send_welcome_email(user, order))
         
         return True
             
     except Exception as e:
         current_app.logger.error(f"Erreur lors de la création de commande et mise à jour: {str(e)}")
+        if in_unit_of_work():
+            # Appel depuis une ressource @transactional : toute la transaction est annulée
+            raise
         db.session.rollback()
         return False
 
 
+def _send_welcome_email(user, order):
+    try:
+        from services.email.email_service import email_service
+        
+        user_email_data = {
+            'username': user.username,
+            'email': user.email,
+            'nom': user.nom,
+            'prenom': user.prenom,
+            'subscription_plan': user.subscription_plan,
+            'sold': user.sold
+        }
+        
+        email_sent = email_service.send_welcome_email(user_email_data, order.order_number)
+        if email_sent:
+            current_app.logger.info(f"Email de bienvenue envoyé avec succès pour la commande {order.order_number}")
+        else:
+            current_app.logger.warning(f"Échec de l'envoi de l'email de bienvenue pour la commande {order.order_number}")
+            
+    except Exception as e:
+        # IMPORTANT: la commande est déjà validée
+        # L'échec d'envoi d'email ne doit pas annuler la transaction de commande
+        current_app.logger.error(f"Erreur lors de l'envoi de l'email de bienvenue: {str(e)}")
+        current_app.logger.warning(f"La commande {order.order_number} a été créée avec succès malgré l'échec de l'email")
+
+
 def update_order_payment_status(checkout_session):
     """Met à jour le statut de paiement dans la table Order de manière sécurisée et synchronisée avec Stripe"""
     try:
@@ -391,6 +407,9 @@ def update_order_payment_status(checkout_session):
             
     except Exception as e:
         current_app.logger.error(f"Erreur lors de la synchronisation du statut de paiement: {str(e)}")
+        if in_unit_of_work():
+            # Appel depuis une ressource @transactional : toute la transaction est annulée
+            raise
         db.session.rollback()
         return False
 
@@ -418,13 +437,14 @@ def update_user_subscription(user_id, plan_name):
             user.subscription_plan = plan_name
             user.payment_status = "paid"
             
-            # Ajouter les nouveaux usages au solde existant
+            # Ajouter les nouveaux usages au solde existant (ajout atomique, inscrit au registre)
             new_usages = float(subscription_pack.usages)
-            user.sold += new_usages
-            user.total_sold += new_usages
+            grant_credits(db.session.connection(), user.id, new_usages, PURCHASE)
+            # Solde modifié hors ORM : relu pour le journal
+            db.session.expire(user, ['sold', 'total_sold'])
             
             # Sauvegarder les changements
-            db.session.commit()
+            save_changes()
             
             current_app.logger.info(
                 f"Plan mis à jour pour l'utilisateur {user_id}: "
@@ -439,5 +459,8 @@ def update_user_subscription(user_id, plan_name):
             
     except Exception as e:
         current_app.logger.error(f"Erreur lors de la mise à jour de l'abonnement: {str(e)}")
+        if in_unit_of_work():
+            # Appel depuis une ressource @transactional : toute la transaction est annulée
+            raise
         db.session.rollback()
         return False
\ No newline at end of file
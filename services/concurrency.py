@@ -0,0 +1,42 @@
+import asyncio
+
+'''
+Utilitaires pour le mode worker coopératif (gevent, voir gevent_wsgi.py).
+
+Sous gevent, toutes les requêtes d'un worker partagent le même thread système.
+La boucle asyncio courante étant mémorisée par thread système, deux greenlets qui
+exécutent chacun `loop.run_until_complete()` (ex. EdgeTTS) se marcheraient dessus.
+Les coroutines sont donc exécutées dans le pool de threads natifs du hub gevent,
+chacune avec sa propre boucle ; le greenlet appelant cède la main pendant l'attente.
+'''
+
+
+def is_cooperative():
+    """Indique si le processus a été monkey-patché par gevent"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('socket')
+
+
+def _run_in_new_loop(coro_factory, args, kwargs):
+    loop = asyncio.new_event_loop()
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(coro_factory(*args, **kwargs))
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+def run_coroutine(coro_factory, *args, **kwargs):
+    """Exécute `coro_factory(*args, **kwargs)` jusqu'à son terme depuis du code synchrone.
+
+    En mode gevent, l'exécution a lieu dans un thread natif du hub ; sinon dans une
+    boucle dédiée du thread courant (comportement historique).
+    """
+    if is_cooperative():
+        import gevent
+        return gevent.get_hub().threadpool.apply(_run_in_new_loop, (coro_factory, args, kwargs))
+    return _run_in_new_loop(coro_factory, args, kwargs)
@@ -3,11 +3,44 @@ from flask_restx import Resource, Namespace, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.model import User
 from models.order_model import Order
+from models.revenue_model import revenue_statistics
 from models.subscription_pack_model import SubscriptionPack
 from models.exts import db
-from datetime import datetime, timedelta
-import stripe
-from services.auth.stripe import init_stripe
+from models.routing import read_only
+from services.auth.principal import current_principal
+from services.listing import ListingParamError, keyset_paginate, keyset_requested, page_headers, page_pagination
+from services.monitoring.query_budget import query_budget
+import csv
+import io
+from datetime import datetime
+from services.auth.stripe import init_stripe, stripe
+
+ORDER_CSV_HEADER = [
+    'Numéro de commande', 'Date', 'Client', 'Email', 'Plan',
+    'Montant', 'Devise', 'Statut', 'Statut paiement', 'Méthode paiement'
+]
+
+
+def write_orders_csv(orders):
+    """Export CSV des commandes (une ligne par commande, en-têtes en français)"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(ORDER_CSV_HEADER)
+    for order in orders:
+        writer.writerow([
+            order.order_number,
+            order.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            order.customer_name or '',
+            order.customer_email,
+            order.subscription_plan,
+            order.amount,
+            order.currency,
+            order.status,
+            order.payment_status,
+            order.payment_method or ''
+        ])
+    return output.getvalue()
+
 
 # Créer un namespace pour les routes d'administration des commandes
 order_admin_ns = Namespace('order-admin', description='Administration des commandes et transactions')
@@ -74,9 +107,8 @@ stats_model = order_admin_ns.model(
 def admin_required(f):
     """Décorateur pour vérifier les droits d'administration"""
     def decorated_function(*args, **kwargs):
-        current_username = get_jwt_identity()
-        user = User.query.filter_by(username=current_username).first()
-        if not user or user.role != 'admin':
+        principal = current_principal()
+        if not principal or principal.role != 'admin':
             return make_response(jsonify({"error": "Accès refusé. Droits d'administration requis."}), 403)
         return f(*args, **kwargs)
     return decorated_function
@@ -114,6 +146,14 @@ class OrderList(Resource):
                 end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
                 query = query.filter(Order.created_at <= end_dt)
             
+            # Pagination par curseur (?limit= / ?cursor=) : ni OFFSET ni COUNT
+            if keyset_requested():
+                orders = keyset_paginate(query, Order.created_at, Order.id, default_limit=per_page)
+                return make_response(jsonify({
+                    "orders": [order.to_dict() for order in orders.items],
+                    "pagination": page_pagination(orders)
+                }), 200, page_headers(orders))
+            
             # Ordonner par date de création décroissante
             query = query.order_by(Order.created_at.desc())
             
@@ -134,6 +174,8 @@ class OrderList(Resource):
                 }
             }), 200)
             
+        except ListingParamError as e:
+            return make_response(jsonify({"error": str(e)}), 400)
         except Exception as e:
             current_app.logger.error(f"Erreur lors de la récupération des commandes: {str(e)}")
             return make_response(jsonify({"error": str(e)}), 500)
@@ -371,7 +413,9 @@ class OrderRefund(Resource):
 
 @order_admin_ns.route('/stats')
 class OrderStats(Resource):
+    @read_only
     @jwt_required()
+    @query_budget(max_queries=2)
     @admin_required
     def get(self):
         """Récupérer les statistiques des commandes"""
@@ -388,68 +432,8 @@ class OrderStats(Resource):
             if end_date:
                 end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
             
-            # Récupérer les statistiques directement
-            query = Order.query.filter(Order.status.in_(['paid', 'completed']))
-            if start_dt:
-                query = query.filter(Order.created_at >= start_dt)
-            if end_dt:
-                query = query.filter(Order.created_at <= end_dt)
-            
-            orders = query.all()
-            total_revenue = sum(order.amount for order in orders)
-            total_orders = len(orders)
-            
-            plans_stats = {}
-            for order in orders:
-                plan = order.subscription_plan
-                if plan not in plans_stats:
-                    plans_stats[plan] = {'count': 0, 'revenue': 0}
-                plans_stats[plan]['count'] += 1
-                plans_stats[plan]['revenue'] += order.amount
-            
-            stats = {
-                'totalRevenue': total_revenue,
-                'totalOrders': total_orders,
-                'averageOrderValue': total_revenue / total_orders if total_orders > 0 else 0,
-                'planStats': plans_stats
-            }
-            
-            # Ajouter des statistiques supplémentaires
-            query = Order.query
-            if start_dt:
-                query = query.filter(Order.created_at >= start_dt)
-            if end_dt:
-                query = query.filter(Order.created_at <= end_dt)
-            
-            # Statistiques par statut
-            status_stats = {}
-            for status in ['pending', 'paid', 'failed', 'cancelled', 'refunded']:
-                count = query.filter(Order.status == status).count()
-                status_stats[status] = count
-            
-            # Statistiques mensuelles (derniers 12 mois)
-            monthly_stats = []
-            for i in range(12):
-                month_start = datetime.now().replace(day=1) - timedelta(days=30*i)
-                month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-                
-                month_orders = Order.query.filter(
-                    Order.created_at >= month_start,
-                    Order.created_at <= month_end,
-                    Order.status == 'paid'
-                ).all()
-                
-                monthly_revenue = sum(order.amount for order in month_orders)
-                monthly_stats.insert(0, {
-                    'month': month_start.strftime('%Y-%m'),
-                    'revenue': monthly_revenue,
-                    'orders': len(month_orders)
-                })
-            
-            stats.update({
-                'statusStats': status_stats,
-                'monthlyStats': monthly_stats
-            })
+            # Une requête sur les cumuls revenue_daily (jours inclus, voir models/revenue_model.py)
+            stats = revenue_statistics(start_dt, end_dt)
             
             return make_response(jsonify(stats), 200)
             
@@ -484,36 +468,7 @@ class OrderExport(Resource):
             orders = query.order_by(Order.created_at.desc()).all()
             
             # Générer le CSV
-            import csv
-            import io
-            
-            output = io.StringIO()
-            writer = csv.writer(output)
-            
-            # En-têtes
-            writer.writerow([
-                'Numéro de commande', 'Date', 'Client', 'Email', 'Plan', 
-                'Montant', 'Devise', 'Statut', 'Statut paiement', 'Méthode paiement'
-            ])
-            
-            # Données
-            for order in orders:
-                writer.writerow([
-                    order.order_number,
-                    order.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                    order.customer_name or '',
-                    order.customer_email,
-                    order.subscription_plan,
-                    order.amount,
-                    order.currency,
-                    order.status,
-                    order.payment_status,
-                    order.payment_method or ''
-                ])
-            
-            output.seek(0)
-            
-            response = make_response(output.getvalue())
+            response = make_response(write_orders_csv(orders))
             response.headers['Content-Type'] = 'text/csv'
             response.headers['Content-Disposition'] = f'attachment; filename=commandes_{datetime.now().strftime("%Y%m%d")}.csv'
             
@@ -1,10 +1,12 @@
 from flask import request, jsonify, make_response, current_app
 from flask_restx import Resource, Namespace, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models.model import User
+from flask_jwt_extended import jwt_required
 from models.order_model import Order
 from models.subscription_pack_model import SubscriptionPack
+from models.credit_model import PURCHASE, grant_credits
 from models.exts import db
+from services.auth.principal import current_principal, current_user
+from services.listing import ListingParamError, keyset_paginate, keyset_requested, page_headers, page_pagination
 from datetime import datetime
 import uuid
 
@@ -50,8 +52,7 @@ class OrderCreate(Resource):
         """Créer une nouvelle commande"""
         try:
             # Récupérer l'utilisateur connecté
-            current_username = get_jwt_identity()
-            user = User.query.filter_by(username=current_username).first()
+            user = current_user()
             
             if not user:
                 return make_response(jsonify({"error": "Utilisateur non trouvé"}), 404)
@@ -112,8 +113,7 @@ class OrderCreate(Resource):
                     updated_at=datetime.utcnow()
                 )
                 
-                # Générer le numéro de commande
-                order.order_number = order.generate_order_number()
+                # Numéro de commande attribué par Order.__init__
                 current_app.logger.info(f"Numéro de commande généré: {order.order_number}")
                 
                 # Sauvegarder en base de données
@@ -157,8 +157,7 @@ class OrderUpdateStatus(Resource):
             data = request.get_json()
             
             # Récupérer l'utilisateur actuel
-            current_username = get_jwt_identity()
-            user = User.query.filter_by(username=current_username).first()
+            user = current_user()
             
             if not user:
                 return make_response(jsonify({"error": "Utilisateur non trouvé"}), 404)
@@ -217,8 +216,11 @@ class OrderUpdateStatus(Resource):
                     # Ajouter les nouveaux usages seulement si nécessaire
                     if should_add_credits:
                         new_usages = float(subscription_pack.usages)
-                        user.sold += new_usages
-                        user.total_sold += new_usages
+                        # Ajout atomique au solde, inscrit au registre des crédits (même transaction)
+                        grant_credits(db.session.connection(), user.id, new_usages, PURCHASE,
+                                      stripe_session_id or str(order.id))
+                        # Solde modifié hors ORM : relu pour le journal
+                        db.session.expire(user, ['sold', 'total_sold'])
                         current_app.logger.info(
                             f"Nouveaux crédits ajoutés: {new_usages} pour le plan {order.subscription_plan}"
                         )
@@ -240,7 +242,7 @@ class OrderUpdateStatus(Resource):
                 
                 # Note: L'email de bienvenue est maintenant envoyé automatiquement
                 # via le webhook Stripe dans stripe.py lors du paiement réussi
-                current_app.logger.info(f"Statut de commande mis à jour: {order.order_number} -> {new_status}")
+                current_app.logger.info(f"Statut de commande mis à jour: {order.order_number} -> {order.status}")
                 
                 return {
                     "message": "Statut de commande mis à jour avec succès",
@@ -271,8 +273,7 @@ class MyOrders(Resource):
     def get(self):
         """Récupérer les commandes de l'utilisateur connecté"""
         try:
-            current_username = get_jwt_identity()
-            user = User.query.filter_by(username=current_username).first()
+            user = current_principal()
             
             if not user:
                 return make_response(jsonify({"error": "Utilisateur non trouvé"}), 404)
@@ -281,6 +282,15 @@ class MyOrders(Resource):
             page = int(request.args.get('page', 1))
             per_page = int(request.args.get('per_page', 10))
             
+            # Pagination par curseur (?limit= / ?cursor=) : ni OFFSET ni COUNT
+            if keyset_requested():
+                orders = keyset_paginate(Order.query.filter_by(user_id=user.id), Order.created_at, Order.id,
+                                         default_limit=per_page)
+                return make_response(jsonify({
+                    "orders": [order.to_dict() for order in orders.items],
+                    "pagination": page_pagination(orders)
+                }), 200, page_headers(orders))
+            
             # Récupérer les commandes de l'utilisateur
             orders_query = Order.query.filter_by(user_id=user.id).order_by(Order.created_at.desc())
             
@@ -301,6 +311,8 @@ class MyOrders(Resource):
                 }
             }), 200)
             
+        except ListingParamError as e:
+            return make_response(jsonify({"error": str(e)}), 400)
         except Exception as e:
             current_app.logger.error(f"Erreur lors de la récupération des commandes utilisateur: {str(e)}")
             return make_response(jsonify({"error": "Erreur interne du serveur"}), 500)
@@ -311,8 +323,7 @@ class OrderDetail(Resource):
     def get(self, order_id):
         """Récupérer les détails d'une commande (seulement si elle appartient à l'utilisateur)"""
         try:
-            current_username = get_jwt_identity()
-            user = User.query.filter_by(username=current_username).first()
+            user = current_principal()
             
             if not user:
                 return make_response(jsonify({"error": "Utilisateur non trouvé"}), 404)
@@ -3,6 +3,8 @@ from flask_restx import Resource, Namespace, fields
 from flask_jwt_extended import jwt_required
 from models.subscription_pack_model import SubscriptionPack, PackFeature
 from models.exts import db
+from sqlalchemy.orm import selectinload
+from services.monitoring.query_budget import query_budget
 
 pack_ns = Namespace('subscription-packs', description='Gestion des packs d\'abonnement')
 
@@ -75,15 +77,18 @@ subscription_pack_input_model = pack_ns.model(
 class SubscriptionPackResource(Resource):
     
     @jwt_required()
+    @query_budget(max_queries=2)
     def get(self):
         '''Récupérer tous les packs d\'abonnement'''
         try:
             # Filtrer par statut actif si spécifié
             active_only = request.args.get('active_only', 'false').lower() == 'true'
+            # Les fonctionnalités de tous les packs sont chargées en une requête
+            query = SubscriptionPack.query.options(selectinload(SubscriptionPack.features))
             if active_only:
-                packs = SubscriptionPack.query.filter_by(is_active=True).all()
+                packs = query.filter_by(is_active=True).all()
             else:
-                packs = SubscriptionPack.query.all()
+                packs = query.all()
             
             # Sérialiser manuellement pour garantir la structure correcte
             packs_data = [pack.to_dict() for pack in packs]
@@ -306,10 +311,13 @@ class SubscriptionPackToggleStatusResource(Resource):
 @pack_ns.route("/packs/active")
 class ActiveSubscriptionPacksResource(Resource):
     
+    @query_budget(max_queries=2)
     def get(self):
         '''Récupérer uniquement les packs actifs (pour l\'affichage public)'''
         try:
-            packs = SubscriptionPack.query.filter_by(is_active=True).order_by(SubscriptionPack.price_in_cents).all()
+            packs = SubscriptionPack.query.options(
+                selectinload(SubscriptionPack.features)
+            ).filter_by(is_active=True).order_by(SubscriptionPack.price_in_cents).all()
             packs_data = [pack.to_dict() for pack in packs]
             return make_response(jsonify(packs_data), 200)
         except Exception as e:
@@ -319,10 +327,13 @@ class ActiveSubscriptionPacksResource(Resource):
 @pack_ns.route("/active-packs")
 class ActivePacksResource(Resource):
     
+    @query_budget(max_queries=2)
     def get(self):
         '''Récupérer uniquement les packs actifs (endpoint alternatif pour compatibilité)'''
         try:
-            packs = SubscriptionPack.query.filter_by(is_active=True).order_by(SubscriptionPack.price_in_cents).all()
+            packs = SubscriptionPack.query.options(
+                selectinload(SubscriptionPack.features)
+            ).filter_by(is_active=True).order_by(SubscriptionPack.price_in_cents).all()
             packs_data = [pack.to_dict() for pack in packs]
             return make_response(jsonify(packs_data), 200)
         except Exception as e:
@@ -444,4 +455,7 @@ def create_default_packs():
             )
             feature.save()
         
-        print("Packs d'abonnement par défaut créés avec succès!")
\ No newline at end of file
+        print("Packs d'abonnement par défaut créés avec succès!")
+        return True
+    
+    return False
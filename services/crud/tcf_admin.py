@@ -3,6 +3,11 @@ from flask_restx import Resource, Namespace, fields
 from flask_jwt_extended import jwt_required
 from models.tcf_model import TCFSubject, TCFTask, TCFDocument
 from models.exts import db
+from models.routing import read_only
+from models.unit_of_work import transactional
+from services.listing import (
+    ListingParamError, keyset_paginate, keyset_requested, page_headers, requested_fields, requested_includes,
+)
 
 tcf_ns = Namespace('tcf', description='Gestion des sujets TCF')
 
@@ -64,17 +69,40 @@ tcf_subject_input_model = tcf_ns.model(
 @tcf_ns.route("/subjects")
 class TCFSubjectResource(Resource):
     
-    @tcf_ns.marshal_list_with(tcf_subject_model)
+    @read_only
+    @tcf_ns.response(200, 'Sujets TCF', [tcf_subject_model])
+    @tcf_ns.doc(params={
+        'type': 'Type de sujet (Écrit, Oral)',
+        'fields': 'Champs des sujets, séparés par des virgules (ex. id,name,status,subject_type)',
+        'include': 'Relations à inclure : tasks, documents (toutes par défaut sans fields)',
+        'limit': 'Taille de page (pagination par curseur, du plus récent au plus ancien)',
+        'cursor': 'Curseur de la page suivante (en-tête X-Next-Cursor de la page précédente)',
+        'total': '1 : total borné dans X-Total-Count',
+    })
     def get(self):
         '''Récupérer tous les sujets TCF'''
+        try:
+            subject_fields = requested_fields(TCFSubject.LIST_FIELDS)
+            include = requested_includes(TCFSubject.LIST_INCLUDES)
+        except ListingParamError as e:
+            tcf_ns.abort(400, str(e))
+        paginated = keyset_requested()
+        # La date sert au curseur de la page suivante : chargée même hors de ?fields=
+        loaded_fields = tuple(dict.fromkeys(subject_fields + ('date',))) if paginated else subject_fields
+        query = TCFSubject.query.options(*TCFSubject.listing_options(loaded_fields, include))
         # Filtrer par type de sujet si spécifié
         subject_type = request.args.get('type')
         if subject_type:
-            subjects = TCFSubject.query.filter_by(subject_type=subject_type).all()
-        else:
-            subjects = TCFSubject.query.all()
-        return subjects
+            query = query.filter_by(subject_type=subject_type)
+        if not paginated:
+            return [subject.to_dict(subject_fields, include) for subject in query.all()]
+        try:
+            page = keyset_paginate(query, TCFSubject.date, TCFSubject.id)
+        except ListingParamError as e:
+            tcf_ns.abort(400, str(e))
+        return [subject.to_dict(subject_fields, include) for subject in page.items], 200, page_headers(page)
 
+    @transactional
     @tcf_ns.expect(tcf_subject_input_model)
     @tcf_ns.marshal_with(tcf_subject_model)
     def post(self):
@@ -122,12 +150,14 @@ class TCFSubjectResource(Resource):
 @tcf_ns.route("/subjects/<int:id>")
 class TCFSubjectDetailResource(Resource):
     
+    @read_only
     @tcf_ns.marshal_with(tcf_subject_model)
     def get(self, id):
         '''Récupérer un sujet TCF par son ID'''
         subject = TCFSubject.query.get_or_404(id)
         return subject
 
+    @transactional
     @tcf_ns.expect(tcf_subject_input_model)
     @tcf_ns.marshal_with(tcf_subject_model)
     def put(self, id):
@@ -207,8 +237,16 @@ class TCFSubjectDetailResource(Resource):
                 if task_id not in updated_task_ids:
                     task.delete()
 
+            # Tâches et documents ajoutés ou supprimés par clé étrangère : recharger les
+            # collections avant la réponse (la validation n'a lieu qu'en sortie)
+            db.session.expire(subject, ['tasks'])
+            for task in existing_tasks.values():
+                if task.id in updated_task_ids:
+                    db.session.expire(task, ['documents'])
+
         return subject
 
+    @transactional
     def delete(self, id):
         '''Supprimer un sujet TCF'''
         from models.tcf_attempt_model import TCFAttempt
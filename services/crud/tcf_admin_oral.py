@@ -4,6 +4,7 @@ from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime
 import json
 from flask import request
+from services.listing import ListingParamError, requested_fields, requested_includes
 
 # Création du namespace pour l'API
 tcf_oral_ns = Namespace('tcf-oral', description='Opérations sur les sujets oraux TCF')
@@ -40,23 +41,31 @@ agent_validation_model = tcf_oral_ns.model('AgentValidation', {
 # Endpoints pour les sujets oraux
 @tcf_oral_ns.route('/oral-subjects')
 class OralSubjectListResource(Resource):
-    @tcf_oral_ns.doc('list_oral_subjects')
+    @tcf_oral_ns.doc('list_oral_subjects', params={
+        'fields': 'Champs des sujets, séparés par des virgules (ex. id,name,status,subject_type)',
+        'include': 'Relations à inclure : tasks (par défaut sans fields)',
+    })
     def get(self):
         """Récupère tous les sujets oraux"""
         try:
             from models.exts import db
+            from models.tcf_model_oral import TCFOralSubject
+            subject_fields = requested_fields(TCFOralSubject.LIST_FIELDS)
+            include = requested_includes(TCFOralSubject.LIST_INCLUDES)
             service = create_tcf_oral_service(db.session)
-            subjects = service.get_all_subjects()
+            subjects = service.get_all_subjects(TCFOralSubject.listing_options(subject_fields, include))
             
             # Pagination et filtrage (à implémenter si nécessaire)
             return {
-                'subjects': [service._serialize_subject(subject) for subject in subjects],
+                'subjects': [subject.to_dict(subject_fields, include) for subject in subjects],
                 'pagination': {
                     'total': len(subjects),
                     'page': 1,
                     'per_page': len(subjects)
                 }
             }, 200
+        except ListingParamError as e:
+            return handle_tcf_oral_error(e), 400
         except Exception as e:
             return handle_tcf_oral_error(e), 500
     
@@ -214,11 +223,11 @@ class TCFOralCRUDService:
     def __init__(self, db_session):
         self.db_session = db_session
 
-    def get_all_subjects(self) -> List[Any]:
-        """Récupère tous les sujets oraux"""
+    def get_all_subjects(self, options: Optional[List[Any]] = None) -> List[Any]:
+        """Récupère tous les sujets oraux (options de chargement SQLAlchemy facultatives)"""
         try:
             from models.tcf_model_oral import TCFOralSubject
-            return TCFOralSubject.query.all()
+            return TCFOralSubject.query.options(*(options or ())).all()
         except SQLAlchemyError as e:
             self.db_session.rollback()
             raise TCFOralCRUDError(f"Erreur lors de la récupération des sujets: {str(e)}")
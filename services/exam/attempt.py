@@ -1,8 +1,9 @@
 from flask import request, jsonify
 from flask_restx import Resource, Namespace, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models.tcf_attempt_model import TCFAttempt
-from models.model import User
+from flask_jwt_extended import jwt_required
+from models.tcf_attempt_model import TCFAttempt, MAX_ATTEMPTS_PER_SUBJECT, reserve_attempt
+from services.auth.principal import current_principal
+from services.monitoring.query_budget import query_budget
 from models.tcf_model import TCFSubject
 from models.exts import db
 
@@ -22,6 +23,16 @@ attempt_model = attempt_ns.model(
     }
 )
 
+# Tentative réservée, avec le nombre de tentatives restantes
+attempt_reservation_model = attempt_ns.inherit(
+    "TCFAttemptReservation",
+    attempt_model,
+    {
+        "remaining_attempts": fields.Integer(),
+        "max_attempts": fields.Integer()
+    }
+)
+
 # Modèle pour la création/mise à jour d'une tentative
 attempt_input_model = attempt_ns.model(
     "TCFAttemptInput",
@@ -37,8 +48,7 @@ class TCFAttemptResource(Resource):
     @jwt_required()
     def get(self):
         '''Récupérer toutes les tentatives de l\'utilisateur connecté'''
-        current_user_identity = get_jwt_identity()
-        user = User.query.filter_by(username=current_user_identity).first()
+        user = current_principal()
         
         if not user:
             return {'message': 'Utilisateur non trouvé'}, 404
@@ -53,8 +63,7 @@ class TCFAttemptBySubjectResource(Resource):
     @jwt_required()
     def get(self, subject_id):
         '''Récupérer les tentatives pour un sujet spécifique'''
-        current_user_identity = get_jwt_identity()
-        user = User.query.filter_by(username=current_user_identity).first()
+        user = current_principal()
         
         if not user:
             return {'message': 'Utilisateur non trouvé'}, 404
@@ -66,55 +75,62 @@ class TCFAttemptBySubjectResource(Resource):
         attempt = TCFAttempt.get_or_create_attempt(user.id, subject_id)
         return attempt
     
-    @attempt_ns.marshal_with(attempt_model)
     @jwt_required()
+    @query_budget(max_queries=4)
     def post(self, subject_id):
-        '''Incrémenter le compteur de tentatives pour un sujet'''
-        current_user_identity = get_jwt_identity()
-        user = User.query.filter_by(username=current_user_identity).first()
+        '''Réserver une tentative pour un sujet (refusée au-delà du maximum)'''
+        user = current_principal()
         
         if not user:
             return {'message': 'Utilisateur non trouvé'}, 404
             
         # Vérifier si le sujet existe
-        subject = TCFSubject.query.get_or_404(subject_id)
+        if db.session.query(TCFSubject.id).filter_by(id=subject_id).scalar() is None:
+            return {'message': 'Sujet non trouvé'}, 404
         
-        try:
-            # Récupérer ou créer la tentative
-            attempt = TCFAttempt.get_or_create_attempt(user.id, subject_id)
-            
-            # Incrémenter le compteur
-            attempt.increment_attempt()
-            
-            return attempt, 200
-            
-        except Exception as e:
-            return {'error': f"Erreur lors de l'incrémentation : {str(e)}"}, 500
+        # Une instruction : deux onglets ne peuvent pas réserver la même dernière tentative
+        user_id = user.id
+        reserved = reserve_attempt(db.session.connection(), user_id, subject_id)
+        db.session.commit()
+        attempt = TCFAttempt.query.filter_by(id_user=user_id, id_subject=subject_id).one()
+        
+        if not reserved:
+            return {
+                'message': 'Nombre maximal de tentatives atteint',
+                'current_attempts': attempt.attempt_count,
+                'remaining_attempts': 0,
+                'max_attempts': MAX_ATTEMPTS_PER_SUBJECT
+            }, 409
+        
+        result = attempt_ns.marshal(attempt, attempt_reservation_model)
+        result['remaining_attempts'] = attempt.remaining_attempts
+        result['max_attempts'] = MAX_ATTEMPTS_PER_SUBJECT
+        return result, 200
 
 @attempt_ns.route("/attempts/check/<int:subject_id>")
 class TCFAttemptCheckResource(Resource):
     
     @jwt_required()
+    @query_budget(max_queries=2)
     def get(self, subject_id):
-        '''Vérifier si l\'utilisateur peut passer l\'examen (max 2 tentatives)'''
-        current_user_identity = get_jwt_identity()
-        user = User.query.filter_by(username=current_user_identity).first()
+        '''Vérifier si l\'utilisateur peut passer l\'examen'''
+        user = current_principal()
         
         if not user:
             return {'message': 'Utilisateur non trouvé'}, 404
             
-        # Vérifier si le sujet existe
-        subject = TCFSubject.query.get_or_404(subject_id)
-        
-        # Récupérer ou créer la tentative
-        attempt = TCFAttempt.get_or_create_attempt(user.id, subject_id)
+        # Sujet et compteur en une requête, sans créer de ligne de tentative
+        row = db.session.query(TCFSubject.id, TCFAttempt.attempt_count).outerjoin(
+            TCFAttempt, db.and_(TCFAttempt.id_subject == TCFSubject.id, TCFAttempt.id_user == user.id)
+        ).filter(TCFSubject.id == subject_id).first()
+        if row is None:
+            return {'message': 'Sujet non trouvé'}, 404
         
-        can_attempt = attempt.attempt_count < 1
-        remaining_attempts = max(0, 1 - attempt.attempt_count)
+        attempt_count = row.attempt_count or 0
         
         return {
-            'can_attempt': can_attempt,
-            'current_attempts': attempt.attempt_count,
-            'remaining_attempts': remaining_attempts,
-            'max_attempts': 1
-        }, 200
\ No newline at end of file
+            'can_attempt': attempt_count < MAX_ATTEMPTS_PER_SUBJECT,
+            'current_attempts': attempt_count,
+            'remaining_attempts': max(0, MAX_ATTEMPTS_PER_SUBJECT - attempt_count),
+            'max_attempts': MAX_ATTEMPTS_PER_SUBJECT
+        }, 200
@@ -1,13 +1,18 @@
 from flask import request, jsonify
 from flask_restx import Resource, Namespace, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from models.model import User
 from models.tcf_exam_model import TCFExam
+from models.user_stats_model import UserStats, compute_user_stats
+from models.activity_model import DailyActivity, UserDailyActivity
 from models.tcf_attempt_model import TCFAttempt
-from models.tcf_model import TCFSubject
 from models.exts import db
+from models.routing import read_only
+from services.auth.principal import current_principal, current_user
+from services.monitoring.query_budget import query_budget
 from datetime import datetime, timedelta
-from sqlalchemy import func, extract
+from sqlalchemy import case, func
+from sqlalchemy.orm import joinedload
 
 dashboard_ns = Namespace('dashboard', description='Services pour les statistiques du dashboard')
 
@@ -47,6 +52,16 @@ monthly_chart_model = dashboard_ns.model(
     }
 )
 
+# Modèle pour les données de graphique hebdomadaire
+weekly_chart_model = dashboard_ns.model(
+    "WeeklyChart",
+    {
+        "week": fields.String(),
+        "exams": fields.Integer(),
+        "users": fields.Integer()
+    }
+)
+
 # Modèle pour l'activité récente
 recent_activity_model = dashboard_ns.model(
     "RecentActivity",
@@ -63,17 +78,18 @@ recent_activity_model = dashboard_ns.model(
 @dashboard_ns.route("/stats")
 class DashboardStatsResource(Resource):
     
+    @read_only
     @jwt_required()
     def get(self):
         '''Récupérer les statistiques du dashboard selon le rôle de l\'utilisateur'''
-        current_user_identity = get_jwt_identity()
-        user = User.query.filter_by(username=current_user_identity).first()
+        user = current_principal()
         
         if not user:
             return {'message': 'Utilisateur non trouvé'}, 404
         
         if user.role.lower() == 'client':
-            return self._get_client_stats(user)
+            # Solde lu sur la ligne User (absent du principal)
+            return self._get_client_stats(current_user())
         elif user.role.lower() in ['admin', 'administrator', 'moderator']:
             return self._get_admin_stats(user)
         else:
@@ -81,66 +97,45 @@ class DashboardStatsResource(Resource):
     
     def _get_client_stats(self, user):
         '''Calculer les statistiques pour un client'''
-        # Récupérer tous les examens de l'utilisateur
-        exams = TCFExam.query.filter_by(id_user=user.id).all()
-        
-        # Statistiques de base
-        total_exams = len(exams)
-        
-        # Calcul des scores - gérer les scores textuels comme "Niveau C1"
-        scores = []
-        for exam in exams:
-            if exam.score:
-                try:
-                    # Essayer de convertir en float d'abord
-                    score = float(exam.score)
-                    scores.append(score)
-                except (ValueError, TypeError):
-                    # Si c'est un niveau comme "Niveau C1", assigner une valeur numérique
-                    if "C2" in exam.score.upper():
-                        scores.append(95)
-                    elif "C1" in exam.score.upper():
-                        scores.append(85)
-                    elif "B2" in exam.score.upper():
-                        scores.append(75)
-                    elif "B1" in exam.score.upper():
-                        scores.append(65)
-                    elif "A2" in exam.score.upper():
-                        scores.append(55)
-                    elif "A1" in exam.score.upper():
-                        scores.append(45)
-                    else:
-                        scores.append(50)  # Score par défaut
-        
-        average_score = round(sum(scores) / len(scores), 1) if scores else 0
-        best_score = max(scores) if scores else 0
-        
-        # Examens de la semaine dernière
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        weekly_exams = len([e for e in exams if e.date_passage and e.date_passage >= week_ago])
-        
+        now = datetime.utcnow()
+        week_ago = now - timedelta(days=7)
+        month_ago = now - timedelta(days=30)
+        two_months_ago = now - timedelta(days=60)
+
+        def count_since(start, end=None):
+            condition = TCFExam.date_passage >= start
+            if end is not None:
+                condition = condition & (TCFExam.date_passage < end)
+            return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+        # Compteurs, scores et série maintenus à l'écriture des examens (user_stats)
+        stats = db.session.get(UserStats, user.id)
+        if stats is None:
+            # Aucun examen, ou table pas encore reconstruite (flask rebuild-user-stats)
+            values = compute_user_stats(db.session, [user.id]).get(user.id)
+            stats = UserStats(**values) if values else UserStats(
+                user_id=user.id, total_exams=0, scored_exams=0, score_sum=0, current_streak=0)
+
+        # Examens des 60 derniers jours seulement (index (id_user, date_passage))
+        weekly_exams, current_month_exams, previous_month_exams = db.session.query(
+            count_since(week_ago),
+            count_since(month_ago),
+            count_since(two_months_ago, month_ago),
+        ).filter(TCFExam.id_user == user.id, TCFExam.date_passage >= two_months_ago).one()
+
         # Progression mensuelle (différence avec le mois précédent)
-        month_ago = datetime.utcnow() - timedelta(days=30)
-        two_months_ago = datetime.utcnow() - timedelta(days=60)
-        
-        current_month_exams = len([e for e in exams if e.date_passage and e.date_passage >= month_ago])
-        previous_month_exams = len([e for e in exams if e.date_passage and two_months_ago <= e.date_passage < month_ago])
-        
         monthly_progress = current_month_exams - previous_month_exams
         
-        # Série d'étude (jours consécutifs avec au moins un examen)
-        study_streak = self._calculate_study_streak(user.id)
-        
         # Crédits restants (basé sur le plan d'abonnement)
-        remaining_credits = self._calculate_remaining_credits(user)
+        remaining_credits = self._calculate_remaining_credits(user, current_month_exams)
         
         return {
-            'total_exams': total_exams,
-            'average_score': average_score,
-            'best_score': best_score,
+            'total_exams': stats.total_exams,
+            'average_score': stats.average_score,
+            'best_score': stats.best_score if stats.best_score is not None else 0,
             'weekly_exams': weekly_exams,
             'monthly_progress': monthly_progress,
-            'study_streak': study_streak,
+            'study_streak': stats.streak_on(now.date()),
             'remaining_credits': remaining_credits
         }
     
@@ -169,34 +164,6 @@ class DashboardStatsResource(Resource):
             'monthly_revenue': monthly_revenue
         }
     
-    def _calculate_study_streak(self, user_id):
-        '''Calculer la série d\'étude de l\'utilisateur'''
-        # Récupérer les dates d'examens triées par date décroissante
-        exam_dates = db.session.query(
-            func.date(TCFExam.date_passage)
-        ).filter(
-            TCFExam.id_user == user_id
-        ).distinct().order_by(
-            func.date(TCFExam.date_passage).desc()
-        ).all()
-        
-        if not exam_dates:
-            return 0
-        
-        streak = 0
-        current_date = datetime.utcnow().date()
-        
-        for (exam_date,) in exam_dates:
-            days_diff = (current_date - exam_date).days
-            
-            if days_diff == streak:
-                streak += 1
-                current_date = current_date - timedelta(days=1)
-            elif days_diff > streak:
-                break
-        
-        return streak
-    
     def _calculate_monthly_revenue(self):
         '''Calculer les revenus mensuels estimés'''
         plan_prices = {
@@ -214,7 +181,7 @@ class DashboardStatsResource(Resource):
         
         return round(total_revenue, 2)
     
-    def _calculate_remaining_credits(self, user):
+    def _calculate_remaining_credits(self, user, monthly_exams):
         '''Calculer les crédits restants de l\'utilisateur'''
         # Crédits basés sur le plan d'abonnement
         plan_credits = {
@@ -228,12 +195,7 @@ class DashboardStatsResource(Resource):
         # Crédits de base selon le plan
         base_credits = plan_credits.get(user.subscription_plan, 20)
         
-        # Soustraire les examens du mois en cours
-        month_ago = datetime.utcnow() - timedelta(days=30)
-        monthly_exams = TCFExam.query.filter(
-            TCFExam.id_user == user.id,
-            TCFExam.date_passage >= month_ago
-        ).count()
+        # Soustraire les examens des 30 derniers jours (comptés par _get_client_stats)
         
         remaining = max(0, base_credits - monthly_exams)
         
@@ -246,38 +208,32 @@ class DashboardStatsResource(Resource):
 @dashboard_ns.route("/chart/monthly")
 class DashboardMonthlyChartResource(Resource):
     
+    @read_only
     @jwt_required()
+    @query_budget(max_queries=2)
     def get(self):
         '''Récupérer les données pour le graphique mensuel'''
-        current_user_identity = get_jwt_identity()
-        user = User.query.filter_by(username=current_user_identity).first()
+        user = current_principal()
         
         if not user:
             return {'message': 'Utilisateur non trouvé'}, 404
         
-        # Récupérer les données des 12 derniers mois
-        twelve_months_ago = datetime.utcnow() - timedelta(days=365)
+        # Récupérer les données des 12 derniers mois (au plus 366 lignes d'activité quotidienne)
+        today = datetime.utcnow().date()
+        since = today - timedelta(days=365)
         
-        if user.role == 'Client':
+        if user.role.lower() == 'client':
             # Pour les clients, montrer leurs examens par mois
-            monthly_data = db.session.query(
-                extract('month', TCFExam.date_passage).label('month'),
-                extract('year', TCFExam.date_passage).label('year'),
-                func.count(TCFExam.id).label('count')
-            ).filter(
-                TCFExam.id_user == user.id,
-                TCFExam.date_passage >= twelve_months_ago
-            ).group_by(
-                extract('year', TCFExam.date_passage),
-                extract('month', TCFExam.date_passage)
-            ).order_by(
-                extract('year', TCFExam.date_passage),
-                extract('month', TCFExam.date_passage)
-            ).all()
+            exams_per_month = {}
+            for day, exams in _user_daily_exams(user.id, since, today):
+                key = (day.year, day.month)
+                exams_per_month[key] = exams_per_month.get(key, 0) + exams
             
             result = []
-            for month, year, count in monthly_data:
-                month_name = datetime(int(year), int(month), 1).strftime('%B %Y')
+            for (year, month), count in sorted(exams_per_month.items()):
+                if not count:
+                    continue
+                month_name = datetime(year, month, 1).strftime('%B %Y')
                 result.append({
                     'month': month_name,
                     'exams': count,
@@ -286,34 +242,14 @@ class DashboardMonthlyChartResource(Resource):
             
         else:
             # Pour les admins, montrer les examens et nouveaux utilisateurs par mois
-            exam_data = db.session.query(
-                extract('month', TCFExam.date_passage).label('month'),
-                extract('year', TCFExam.date_passage).label('year'),
-                func.count(TCFExam.id).label('exam_count')
-            ).filter(
-                TCFExam.date_passage >= twelve_months_ago
-            ).group_by(
-                extract('year', TCFExam.date_passage),
-                extract('month', TCFExam.date_passage)
-            ).all()
-            
-            user_data = db.session.query(
-                extract('month', User.date_create).label('month'),
-                extract('year', User.date_create).label('year'),
-                func.count(User.id).label('user_count')
-            ).filter(
-                User.date_create >= twelve_months_ago
-            ).group_by(
-                extract('year', User.date_create),
-                extract('month', User.date_create)
-            ).all()
-            
-            # Combiner les données
-            result = []
-            exam_dict = {(int(year), int(month)): count for month, year, count in exam_data}
-            user_dict = {(int(year), int(month)): count for month, year, count in user_data}
+            exam_dict, user_dict = {}, {}
+            for day, exams, new_users in _daily_activity(since, today):
+                key = (day.year, day.month)
+                exam_dict[key] = exam_dict.get(key, 0) + exams
+                user_dict[key] = user_dict.get(key, 0) + new_users
             
             # Générer les 12 derniers mois
+            result = []
             current_date = datetime.utcnow()
             for i in range(12):
                 date = current_date - timedelta(days=30*i)
@@ -330,21 +266,73 @@ class DashboardMonthlyChartResource(Resource):
         
         return result
 
+
+@dashboard_ns.route("/chart/weekly")
+class DashboardWeeklyChartResource(Resource):
+    
+    @read_only
+    @jwt_required()
+    @query_budget(max_queries=2)
+    def get(self):
+        '''Récupérer les données pour le graphique hebdomadaire (12 dernières semaines)'''
+        user = current_principal()
+        
+        if not user:
+            return {'message': 'Utilisateur non trouvé'}, 404
+        
+        # Semaines du lundi au dimanche, la dernière contenant aujourd'hui
+        today = datetime.utcnow().date()
+        first_monday = today - timedelta(days=today.weekday() + 7 * 11)
+        weeks = {first_monday + timedelta(weeks=i): {'exams': 0, 'users': 0} for i in range(12)}
+        
+        if user.role.lower() == 'client':
+            rows = ((day, exams, 0) for day, exams in _user_daily_exams(user.id, first_monday, today))
+        else:
+            rows = _daily_activity(first_monday, today)
+        for day, exams, new_users in rows:
+            week = weeks[day - timedelta(days=day.weekday())]
+            week['exams'] += exams
+            week['users'] += new_users
+        
+        return [
+            {'week': monday.isoformat(), 'exams': counts['exams'], 'users': counts['users']}
+            for monday, counts in weeks.items()
+        ]
+
+
+def _user_daily_exams(user_id, since, until):
+    """(jour, examens) d'un utilisateur entre `since` et `until` inclus (table user_daily_activity)"""
+    return db.session.query(UserDailyActivity.day, UserDailyActivity.exams).filter(
+        UserDailyActivity.user_id == user_id,
+        UserDailyActivity.day.between(since, until)
+    ).all()
+
+
+def _daily_activity(since, until):
+    """(jour, examens, nouveaux utilisateurs) entre `since` et `until` inclus (table daily_activity)"""
+    # Borne haute : un examen daté dans le futur (horloge client, import) reste hors des graphiques
+    return db.session.query(DailyActivity.day, DailyActivity.exams, DailyActivity.new_users).filter(
+        DailyActivity.day.between(since, until)
+    ).all()
+
 @dashboard_ns.route("/activity/recent")
 class DashboardRecentActivityResource(Resource):
     
+    @read_only
     @jwt_required()
+    @query_budget(max_queries=2)
     def get(self):
         '''Récupérer l\'activité récente'''
-        current_user_identity = get_jwt_identity()
-        user = User.query.filter_by(username=current_user_identity).first()
+        user = current_principal()
         
         if not user:
             return {'message': 'Utilisateur non trouvé'}, 404
         
-        if user.role == 'Client':
+        if user.role.lower() == 'client':
             # Pour les clients, montrer leurs examens récents
-            recent_exams = TCFExam.query.filter_by(
+            recent_exams = TCFExam.query.options(
+                joinedload(TCFExam.subject)
+            ).filter_by(
                 id_user=user.id
             ).order_by(
                 TCFExam.date_passage.desc()
@@ -352,8 +340,8 @@ class DashboardRecentActivityResource(Resource):
             
             result = []
             for exam in recent_exams:
-                # Récupérer le nom du sujet
-                subject = TCFSubject.query.get(exam.id_subject)
+                # Nom du sujet (chargé avec l'examen)
+                subject = exam.subject
                 subject_name = subject.name if subject else f"Sujet {exam.id_subject}"
                 
                 result.append({
@@ -367,15 +355,18 @@ class DashboardRecentActivityResource(Resource):
         
         else:
             # Pour les admins, montrer l'activité globale récente
-            recent_exams = TCFExam.query.order_by(
+            recent_exams = TCFExam.query.options(
+                joinedload(TCFExam.user),
+                joinedload(TCFExam.subject)
+            ).order_by(
                 TCFExam.date_passage.desc()
             ).limit(5).all()
             
             result = []
             for exam in recent_exams:
-                # Récupérer les informations utilisateur et sujet
-                exam_user = User.query.get(exam.id_user)
-                subject = TCFSubject.query.get(exam.id_subject)
+                # Informations utilisateur et sujet (chargées avec l'examen)
+                exam_user = exam.user
+                subject = exam.subject
                 
                 user_name = exam_user.username if exam_user else f"Utilisateur {exam.id_user}"
                 subject_name = subject.name if subject else f"Sujet {exam.id_subject}"
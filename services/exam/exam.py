@@ -1,10 +1,16 @@
 from flask import request, jsonify
-from flask_restx import Resource, Namespace, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity # Added get_jwt_identity
+from flask_restx import Resource, Namespace, fields, marshal
+from flask_jwt_extended import jwt_required
 from models.tcf_exam_model import TCFExam
+from models.exam_submission_model import RESULT_FIELDS, submit_exams
 from models.model import User # Added User model import
 from models.tcf_model import TCFSubject, TCFTask # Added TCFSubject and TCFTask model imports
 from models.exts import db
+from models.routing import read_only
+from services.listing import ListingParamError, keyset_paginate, keyset_requested, page_headers, requested_includes
+from services.auth.principal import current_principal
+from services.monitoring.query_budget import query_budget
+from sqlalchemy.orm import joinedload
 
 exam_ns = Namespace('exam', description='Gestion des examens TCF passés')
 
@@ -45,6 +51,24 @@ exam_input_model = exam_ns.model(
     }
 )
 
+# Modèle pour la soumission d'un examen complet (résultats de toutes les tâches)
+exam_result_input_model = exam_ns.model(
+    "TCFExamResultInput",
+    {name: field for name, field in exam_input_model.items() if name in RESULT_FIELDS}
+)
+exam_batch_input_model = exam_ns.model(
+    "TCFExamBatchInput",
+    {
+        "id_subject": fields.Integer(required=True),
+        "type_exam": fields.String(description="Type d'examen: 'écrit' ou 'oral'"),
+        "idempotency_key": fields.String(description="Clé d'idempotence (ou en-tête Idempotency-Key)"),
+        "exams": fields.List(fields.Nested(exam_result_input_model), required=True),
+    }
+)
+
+# Tâches au plus dans une soumission (trois par sujet aujourd'hui)
+MAX_BATCH_EXAMS = 10
+
 # Modèle pour les données utilisateur imbriquées
 user_nested_model = exam_ns.model(
     "UserNested",
@@ -104,35 +128,79 @@ detailed_exam_model = exam_ns.model(
     }
 )
 
+# Modèles des listes : sans les textes de l'examen, sauf avec ?include=texts
+exam_summary_model = exam_ns.model(
+    "TCFExamSummary",
+    {name: field for name, field in exam_model.items() if name not in TCFExam.TEXT_FIELDS}
+)
+detailed_exam_summary_model = exam_ns.model(
+    "DetailedTCFExamSummary",
+    {name: field for name, field in detailed_exam_model.items() if name not in TCFExam.TEXT_FIELDS}
+)
+
+
+def _list_with_texts():
+    """Indique si la liste demande les textes des examens (?include=texts)"""
+    try:
+        return 'texts' in requested_includes(('texts',), default=())
+    except ListingParamError as e:
+        exam_ns.abort(400, str(e))
+
+
+def _marshal_exams(exams, with_texts, model, summary_model):
+    return marshal(exams, model if with_texts else summary_model)
+
+
+def _list_exams(query, with_texts, model, summary_model):
+    """Examens de `query` : tous, ou une page avec ?limit= / ?cursor= (en-tête X-Next-Cursor)"""
+    if not keyset_requested():
+        return _marshal_exams(query.all(), with_texts, model, summary_model)
+    try:
+        page = keyset_paginate(query, TCFExam.date_passage, TCFExam.id)
+    except ListingParamError as e:
+        exam_ns.abort(400, str(e))
+    return _marshal_exams(page.items, with_texts, model, summary_model), 200, page_headers(page)
+
+
+_PAGINATION_PARAMS = {
+    'include': 'texts : inclure les réponses et corrections',
+    'limit': 'Taille de page (pagination par curseur, du plus récent au plus ancien)',
+    'cursor': 'Curseur de la page suivante (en-tête X-Next-Cursor de la page précédente)',
+    'total': '1 : total borné dans X-Total-Count',
+}
+
 @exam_ns.route("/exams")
 class TCFExamResource(Resource):
     
-    @exam_ns.marshal_list_with(exam_model)
+    @read_only
+    @exam_ns.response(200, 'Examens (textes avec ?include=texts)', [exam_summary_model])
+    @exam_ns.doc(params=_PAGINATION_PARAMS)
     @jwt_required() # Assurez-vous que l'utilisateur est authentifié
     def get(self):
         '''Récupérer tous les examens passés'''
         # Vous pourriez vouloir filtrer par utilisateur ici, par exemple:
         # current_user_id = get_jwt_identity() # Nécessite d'importer get_jwt_identity
         # exams = TCFExam.query.filter_by(id_user=current_user_id).all()
-        exams = TCFExam.query.all()
-        return exams
+        with_texts = _list_with_texts()
+        query = TCFExam.query.options(TCFExam.with_texts()) if with_texts else TCFExam.query
+        return _list_exams(query, with_texts, exam_model, exam_summary_model)
 
 @exam_ns.route("/exams/user")
 class TCFExamUserResource(Resource):
     
-    @exam_ns.marshal_list_with(exam_model)
+    @exam_ns.response(200, 'Examens (textes avec ?include=texts)', [exam_summary_model])
+    @exam_ns.doc(params=_PAGINATION_PARAMS)
     @jwt_required()
     def get(self):
         '''Récupérer tous les examens passés de l'utilisateur connecté'''
-        current_user_identity = get_jwt_identity()
-        user = User.query.filter_by(username=current_user_identity).first()
+        with_texts = _list_with_texts()
+        user = current_principal()
         
         if not user:
             return {'message': 'Utilisateur non trouvé'}, 404
             
-        exams = TCFExam.query.filter_by(id_user=user.id).all()
-        
-        return exams
+        query = TCFExam.query.options(TCFExam.with_texts()) if with_texts else TCFExam.query
+        return _list_exams(query.filter_by(id_user=user.id), with_texts, exam_model, exam_summary_model)
 
     
     @exam_ns.marshal_with(exam_model)
@@ -176,6 +244,55 @@ class TCFExamUserResource(Resource):
             # Gestion des erreurs
             return jsonify({'error': f"Erreur lors de l'enregistrement : {str(e)}"}), 500
 
+@exam_ns.route("/exams/batch")
+class TCFExamBatchResource(Resource):
+
+    @exam_ns.expect(exam_batch_input_model)
+    @exam_ns.doc(params={'Idempotency-Key': {'in': 'header', 'description': "Clé d'idempotence de la soumission"}})
+    @jwt_required()
+    def post(self):
+        '''Enregistrer les résultats de toutes les tâches d'un sujet en une transaction'''
+        data = request.get_json(silent=True) or {}
+        idempotency_key = (request.headers.get('Idempotency-Key') or data.get('idempotency_key') or '').strip()
+        subject_id = data.get('id_subject')
+        results = data.get('exams')
+
+        if not idempotency_key or len(idempotency_key) > 100:
+            return {'message': "Clé d'idempotence requise (100 caractères au plus)"}, 400
+        if not isinstance(subject_id, int):
+            return {'message': 'id_subject requis'}, 400
+        if (not isinstance(results, list) or not 0 < len(results) <= MAX_BATCH_EXAMS
+                or not all(isinstance(result, dict) and isinstance(result.get('id_task'), int) for result in results)):
+            return {'message': f'exams : de 1 à {MAX_BATCH_EXAMS} résultats avec leur id_task'}, 400
+
+        user = current_principal()
+        if not user:
+            return {'message': 'Utilisateur non trouvé'}, 404
+
+        # Sujet et tâches vérifiés en une requête : une clé étrangère invalide n'est pas
+        # un doublon de soumission
+        subject_tasks = db.session.query(TCFSubject.id, TCFTask.id).outerjoin(
+            TCFTask, TCFTask.subject_id == TCFSubject.id
+        ).filter(TCFSubject.id == subject_id).all()
+        if not subject_tasks:
+            return {'message': 'Sujet non trouvé'}, 404
+        task_ids = {task_id for _, task_id in subject_tasks}
+        if any(result['id_task'] not in task_ids for result in results):
+            return {'message': "exams : id_task n'appartient pas au sujet"}, 400
+
+        submission, created = submit_exams(user.id, idempotency_key, subject_id,
+                                           data.get('type_exam') or 'écrit', results)
+        if not created and submission.id_subject != subject_id:
+            return {'message': "Clé d'idempotence déjà utilisée pour un autre sujet"}, 409
+        # Une seule validation : soumission, examens et statistiques dérivées
+        db.session.commit()
+
+        return {
+            'message': 'Examens enregistrés avec succès' if created else 'Examens déjà enregistrés',
+            'exam_ids': submission.exam_id_list,
+            'replayed': not created,
+        }, 201 if created else 200
+
 @exam_ns.route("/exams/<int:id>")
 class TCFExamDetailResource(Resource):
     
@@ -183,7 +300,8 @@ class TCFExamDetailResource(Resource):
     @jwt_required()
     def get(self, id):
         '''Récupérer un examen passé par son ID'''
-        exam = TCFExam.query.get_or_404(id)
+        # Détail : textes chargés dans la même requête
+        exam = TCFExam.query.options(TCFExam.with_texts()).get_or_404(id)
         # Optionnel: Vérifier si l'examen appartient à l'utilisateur authentifié
         # current_user_identity = get_jwt_identity()
         # user = User.query.filter_by(username=current_user_identity).first()
@@ -225,8 +343,10 @@ class TCFExamDetailResource(Resource):
 @exam_ns.route("/exams/subject/<int:subject_id>")
 class TCFExamBySubjectResource(Resource):
     
-    @exam_ns.marshal_list_with(detailed_exam_model) # Utiliser le modèle détaillé
+    @exam_ns.response(200, 'Examens détaillés (textes avec ?include=texts)', [detailed_exam_summary_model])
+    @exam_ns.doc(params=_PAGINATION_PARAMS)
     @jwt_required()
+    @query_budget(max_queries=2)  # examens avec leurs relations, total si ?total=1
     def get(self, subject_id):
         '''Récupérer tous les examens passés pour un sujet donné'''
         # Optionnel: Filtrer également par l'utilisateur authentifié
@@ -238,9 +358,19 @@ class TCFExamBySubjectResource(Resource):
         #     return {'message': 'Utilisateur non trouvé'}, 404
 
         # Récupérer les examens pour le sujet donné, en chargeant les relations
-        exams = TCFExam.query.filter_by(id_subject=subject_id).all()
+        with_texts = _list_with_texts()
+        query = TCFExam.query.options(
+            joinedload(TCFExam.user),
+            joinedload(TCFExam.subject),
+            joinedload(TCFExam.task)
+        )
+        if with_texts:
+            query = query.options(TCFExam.with_texts())
+        response = _list_exams(query.filter_by(id_subject=subject_id), with_texts,
+                               detailed_exam_model, detailed_exam_summary_model)
         
-        if not exams:
+        exams = response[0] if isinstance(response, tuple) else response
+        if not exams and not request.args.get('cursor'):
             return {'message': 'Aucun examen trouvé pour ce sujet'}, 404
             
-        return exams
\ No newline at end of file
+        return response
\ No newline at end of file
@@ -0,0 +1,88 @@
+import importlib
+import time
+from threading import Lock
+
+'''
+Registre des modules tiers lourds chargés à la première utilisation.
+
+Les workers qui ne font jamais de synthèse vocale ou de paiement ne paient plus
+l'import de edge_tts, bs4, markdown, stripe ou requests au démarrage.
+
+    stripe = lazy_import('stripe')
+    stripe.api_key = '...'          # déclenche l'import réel
+'''
+
+_registry = {}
+_registry_lock = Lock()
+
+
+class LazyModule:
+    """Proxy vers un module importé au premier accès à l'un de ses attributs"""
+
+    def __init__(self, name):
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_module', None)
+        object.__setattr__(self, '_load_time_ms', None)
+        object.__setattr__(self, '_on_load', [])
+        object.__setattr__(self, '_lock', Lock())
+
+    def _load(self):
+        module = self._module
+        if module is not None:
+            return module
+
+        with self._lock:
+            if self._module is None:
+                started_at = time.perf_counter()
+                module = importlib.import_module(self._name)
+                object.__setattr__(self, '_load_time_ms', (time.perf_counter() - started_at) * 1000)
+                for callback in self._on_load:
+                    callback(module)
+                object.__setattr__(self, '_module', module)
+        return self._module
+
+    def _add_on_load(self, callback):
+        with self._lock:
+            if self._module is None:
+                self._on_load.append(callback)
+                return
+        callback(self._module)
+
+    @property
+    def is_loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = 'chargé' if self.is_loaded else 'différé'
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_import(name, on_load=None):
+    """Retourne le proxy (partagé) du module `name`.
+
+    `on_load` est appelé une seule fois avec le module réel juste après son import,
+    ou immédiatement si le module est déjà chargé.
+    """
+    with _registry_lock:
+        module = _registry.get(name)
+        if module is None:
+            module = _registry[name] = LazyModule(name)
+    if on_load is not None:
+        module._add_on_load(on_load)
+    return module
+
+
+def registry_status():
+    """État du registre: {nom: temps de chargement en ms, ou None si non chargé}"""
+    with _registry_lock:
+        modules = dict(_registry)
+    return {
+        name: (round(module._load_time_ms, 1) if module.is_loaded else None)
+        for name, module in sorted(modules.items())
+    }
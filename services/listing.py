@@ -0,0 +1,171 @@
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime
+
+from flask import request
+
+from models.exts import db
+
+'''
+Paramètres communs des endpoints de liste.
+
+- `?fields=id,name,status` : champs renvoyés pour chaque élément (tous si absent) ;
+- `?include=tasks,documents` : relations imbriquées renvoyées (et chargées).
+
+Sans `include`, un endpoint renvoie toutes ses relations, comme avant l'ajout de ces
+paramètres, sauf si `fields` est donné : `?fields=id,name` renvoie une liste à plat,
+lue en une requête. Un endpoint peut aussi fixer ses relations par défaut (ex. les
+listes d'examens, sans leurs textes sauf `?include=texts`).
+
+Pagination par curseur (keyset), activée par `?limit=` ou `?cursor=` :
+
+- éléments triés par (date, id) décroissants ; `?cursor=` reprend après le dernier
+  élément de la page précédente, par un filtre indexé au lieu d'un OFFSET ;
+- curseur de la page suivante dans l'en-tête `X-Next-Cursor` (absent sur la dernière
+  page), ou dans le corps des réponses qui ont déjà une enveloppe de pagination ;
+- `?total=1` : total borné à TOTAL_COUNT_CAP (`X-Total-Count`, `X-Total-Exact`).
+
+Sans ces paramètres, les listes restent complètes, comme avant.
+'''
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Au-delà, le total n'est plus compté exactement (COUNT borné par un LIMIT)
+TOTAL_COUNT_CAP = 10000
+
+# En-têtes de pagination, exposés au navigateur par la configuration CORS
+PAGINATION_HEADERS = ('X-Next-Cursor', 'X-Total-Count', 'X-Total-Exact')
+
+KeysetPage = namedtuple('KeysetPage', ['items', 'limit', 'next_cursor', 'total', 'total_exact'])
+
+
+class ListingParamError(ValueError):
+    """Paramètre de liste invalide (champ ou relation inconnus) : réponse 400"""
+
+
+def _names(param):
+    return [name.strip() for name in request.args.get(param, '').split(',') if name.strip()]
+
+
+def requested_fields(allowed):
+    """Champs demandés par `?fields=`, dans l'ordre de `allowed` (tous si absent)"""
+    if 'fields' not in request.args:
+        return tuple(allowed)
+    names = _names('fields')
+    unknown = sorted(set(names) - set(allowed))
+    if unknown:
+        raise ListingParamError(f"Champs inconnus : {', '.join(unknown)} (disponibles : {', '.join(allowed)})")
+    return tuple(name for name in allowed if name in names)
+
+
+def requested_includes(allowed, default=None):
+    """Relations demandées par `?include=` ; sans `include` : `default`, ou toutes si
+    `default` vaut None et que `fields` n'est pas donné"""
+    if 'include' not in request.args:
+        if default is not None:
+            return tuple(default)
+        return () if 'fields' in request.args else tuple(allowed)
+    names = _names('include')
+    unknown = sorted(set(names) - set(allowed))
+    if unknown:
+        raise ListingParamError(f"Relations inconnues : {', '.join(unknown)} (disponibles : {', '.join(allowed)})")
+    return tuple(name for name in allowed if name in names)
+
+
+def keyset_requested():
+    """Indique si la liste est demandée page par page (`?limit=` ou `?cursor=`)"""
+    return 'limit' in request.args or 'cursor' in request.args
+
+
+def encode_cursor(date_value, id_value):
+    """Curseur opaque de la position (date, id)"""
+    if isinstance(date_value, datetime):
+        position = ['dt', date_value.isoformat(), id_value]
+    else:
+        position = ['v', date_value, id_value]
+    return base64.urlsafe_b64encode(json.dumps(position, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Position (date, id) d'un curseur ; ListingParamError s'il est invalide"""
+    try:
+        kind, date_value, id_value = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if kind == 'dt':
+            date_value = datetime.fromisoformat(date_value)
+        elif kind != 'v':
+            raise ValueError(kind)
+        return date_value, int(id_value)
+    except (ValueError, TypeError):
+        raise ListingParamError("Curseur invalide")
+
+
+def requested_limit(default=DEFAULT_PAGE_SIZE):
+    """Taille de page demandée par `?limit=` (entre 1 et MAX_PAGE_SIZE)"""
+    value = request.args.get('limit', default)
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        limit = 0
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ListingParamError(f"limit doit être un entier entre 1 et {MAX_PAGE_SIZE}")
+    return limit
+
+
+def approximate_total(query, id_column, cap=TOTAL_COUNT_CAP):
+    """Nombre d'éléments de `query`, compté jusqu'à `cap` ; retourne (total, exact)"""
+    limited = query.order_by(None).enable_eagerloads(False).with_entities(id_column).limit(cap + 1).subquery()
+    count = db.session.query(db.func.count()).select_from(limited).scalar()
+    return min(count, cap), count <= cap
+
+
+def keyset_paginate(query, date_column, id_column, default_limit=DEFAULT_PAGE_SIZE):
+    """Page de `query` triée par (date, id) décroissants, après `?cursor=` s'il est donné.
+
+    Lit `limit + 1` lignes pour savoir s'il reste une page, sans COUNT ni OFFSET.
+    """
+    limit = requested_limit(default_limit)
+    total = total_exact = None
+    if request.args.get('total') in ('1', 'true'):
+        total, total_exact = approximate_total(query, id_column)
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        date_value, id_value = decode_cursor(cursor)
+        # Les dates NULL sont triées après les autres (ordre décroissant de SQLite et MariaDB)
+        if date_value is None:
+            query = query.filter(date_column.is_(None), id_column < id_value)
+        else:
+            # `date <= :d` borne le parcours de l'index ; le OR seul le ferait lire depuis le début
+            after = db.and_(date_column <= date_value, db.or_(date_column < date_value, id_column < id_value))
+            if date_column.nullable:
+                after = db.or_(after, date_column.is_(None))
+            query = query.filter(after)
+
+    items = query.order_by(date_column.desc(), id_column.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, date_column.key), getattr(last, id_column.key))
+    return KeysetPage(items, limit, next_cursor, total, total_exact)
+
+
+def page_headers(page):
+    """En-têtes de pagination d'une page (curseur suivant, total demandé)"""
+    headers = {}
+    if page.next_cursor:
+        headers['X-Next-Cursor'] = page.next_cursor
+    if page.total is not None:
+        headers['X-Total-Count'] = str(page.total)
+        headers['X-Total-Exact'] = 'true' if page.total_exact else 'false'
+    return headers
+
+
+def page_pagination(page):
+    """Objet `pagination` des réponses qui ont déjà une enveloppe (commandes)"""
+    pagination = {'limit': page.limit, 'nextCursor': page.next_cursor}
+    if page.total is not None:
+        pagination['total'] = page.total
+        pagination['totalIsExact'] = page.total_exact
+    return pagination
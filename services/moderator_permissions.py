@@ -1,6 +1,7 @@
 from functools import wraps
 from flask import request, jsonify, g
-from flask_jwt_extended import get_jwt_identity, jwt_required
+from flask_jwt_extended import jwt_required
+from services.auth.principal import current_principal
 import logging
 
 # Configuration du logging
@@ -173,21 +174,14 @@ def require_moderator_permission(permission_type):
         @jwt_required()
         def decorated_function(*args, **kwargs):
             try:
-                # Récupérer l'identité de l'utilisateur connecté
-                current_user_id = get_jwt_identity()
-                
-                # Récupérer les informations de l'utilisateur connecté depuis la base de données
-                # (Cette partie doit être adaptée selon votre modèle de données)
-                from app import db
-                from models.user import User
-                
-                current_user = User.query.filter_by(username=current_user_id).first()
-                if not current_user:
+                # Utilisateur connecté (cache du principal, voir services/auth/principal.py)
+                principal = current_principal()
+                if not principal:
                     return jsonify({'error': 'Utilisateur non trouvé'}), 404
                 
                 moderator_info = {
-                    'username': current_user.username,
-                    'role': current_user.role
+                    'username': principal.username,
+                    'role': principal.role
                 }
                 
                 # Stocker les informations du modérateur dans g pour utilisation dans la route
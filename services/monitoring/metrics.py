@@ -0,0 +1,208 @@
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+from flask import Response, current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+'''
+Métriques par requête au format texte Prometheus (GET /metrics).
+
+Pour chaque ressource (labels namespace / route / method) : durée totale, nombre et
+durée des requêtes SQL, durée des appels amont (n8n, Groq, EdgeTTS) et taille de la
+réponse. Les compteurs sont propres au worker qui sert /metrics.
+'''
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+
+class Histogram:
+    """Histogramme cumulatif Prometheus avec labels (thread-safe)"""
+
+    def __init__(self, name, documentation, label_names, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(float(b) for b in buckets)
+        self._series = {}
+        self._lock = Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def series(self, **labels):
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            return dict(series, buckets=list(series['buckets'])) if series else None
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, dict(series, buckets=list(series['buckets'])))
+                           for key, series in self._series.items())
+        for key, series in items:
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, key)]
+            for bound, count in zip(self.buckets, series['buckets']):
+                lines.append(f"{self.name}_bucket{_labels(labels, le=f'{bound:g}')} {count}")
+            lines.append(f"{self.name}_bucket{_labels(labels, le='+Inf')} {series['count']}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {series['sum']:.6f}")
+            lines.append(f"{self.name}_count{_labels(labels)} {series['count']}")
+        return '\n'.join(lines)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+def _labels(labels, le=None):
+    if le is not None:
+        labels = labels + [f'le="{le}"']
+    return '{' + ','.join(labels) + '}'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+ROUTE_LABELS = ('namespace', 'route', 'method')
+
+REQUEST_DURATION = Histogram(
+    'tcf_request_duration_seconds', "Durée totale de traitement de la requête", ROUTE_LABELS, LATENCY_BUCKETS)
+DB_QUERIES = Histogram(
+    'tcf_request_db_queries', "Nombre de requêtes SQL par requête HTTP", ROUTE_LABELS, COUNT_BUCKETS)
+DB_DURATION = Histogram(
+    'tcf_request_db_seconds', "Temps passé dans les requêtes SQL par requête HTTP", ROUTE_LABELS, LATENCY_BUCKETS)
+UPSTREAM_DURATION = Histogram(
+    'tcf_request_upstream_seconds', "Temps passé dans les appels amont par requête HTTP",
+    ROUTE_LABELS + ('upstream',), LATENCY_BUCKETS)
+RESPONSE_SIZE = Histogram(
+    'tcf_response_size_bytes', "Taille du corps de la réponse", ROUTE_LABELS, SIZE_BUCKETS)
+
+HISTOGRAMS = (REQUEST_DURATION, DB_QUERIES, DB_DURATION, UPSTREAM_DURATION, RESPONSE_SIZE)
+
+
+class RequestMetrics:
+    """Mesures accumulées pendant une requête HTTP"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.upstream_seconds = {}
+
+    def add_upstream(self, upstream, seconds):
+        self.upstream_seconds[upstream] = self.upstream_seconds.get(upstream, 0.0) + seconds
+
+
+def current_request_metrics():
+    """Mesures de la requête en cours, ou None hors requête instrumentée"""
+    if not has_app_context():
+        return None
+    return g.get('request_metrics')
+
+
+@contextmanager
+def upstream_call(upstream):
+    """Chronomètre un appel amont (ex. 'n8n', 'groq', 'edge_tts') pour la requête en cours"""
+    metrics = current_request_metrics()
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.add_upstream(upstream, time.perf_counter() - started_at)
+
+
+def route_labels():
+    """Labels namespace/route/method de la requête courante (ex. proxy-task1, agent-vocal)"""
+    rule = request.url_rule.rule if request.url_rule is not None else None
+    if rule is None:
+        namespace, route = 'none', 'unmatched'
+    else:
+        namespace, _, route = rule.lstrip('/').partition('/')
+        if not route:
+            namespace, route = 'root', namespace or '/'
+    return {'namespace': namespace, 'route': route, 'method': request.method}
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('metrics_query_start')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    metrics = current_request_metrics()
+    if metrics is not None:
+        metrics.db_queries += 1
+        metrics.db_seconds += elapsed
+
+
+def _handle_error(exception_context):
+    # Requête SQL en erreur: retirer son horodatage de départ
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('metrics_query_start'):
+        connection.info['metrics_query_start'].pop()
+
+
+def _start_request_metrics():
+    g.request_metrics = RequestMetrics()
+
+
+def _record_request_metrics(response):
+    metrics = g.pop('request_metrics', None)
+    if metrics is None:
+        return response
+    labels = route_labels()
+    REQUEST_DURATION.observe(time.perf_counter() - metrics.started_at, **labels)
+    DB_QUERIES.observe(metrics.db_queries, **labels)
+    DB_DURATION.observe(metrics.db_seconds, **labels)
+    for upstream, seconds in metrics.upstream_seconds.items():
+        UPSTREAM_DURATION.observe(seconds, upstream=upstream, **labels)
+    # Les réponses en streaming (fichiers audio) n'ont pas toujours de longueur connue
+    if response.content_length is not None:
+        RESPONSE_SIZE.observe(response.content_length, **labels)
+    return response
+
+
+def render_metrics():
+    return '\n'.join(histogram.render() for histogram in HISTOGRAMS) + '\n'
+
+
+def metrics_view():
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f"Bearer {token}":
+        return Response('Accès refusé\n', status=403, mimetype='text/plain')
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+_engine_listeners_installed = False
+
+
+def init_metrics(app):
+    """Installe l'instrumentation des requêtes et la route GET /metrics"""
+    global _engine_listeners_installed
+    if not _engine_listeners_installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        _engine_listeners_installed = True
+
+    app.before_request(_start_request_metrics)
+    app.after_request(_record_request_metrics)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
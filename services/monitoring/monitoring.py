@@ -0,0 +1,18 @@
+from flask import jsonify, make_response
+from flask_restx import Resource, Namespace
+from flask_jwt_extended import jwt_required
+from models.exts import db
+from services.crud.order_admin import admin_required
+from services.monitoring.pool import engines_status
+
+# Namespace de supervision (réservé aux administrateurs)
+monitoring_ns = Namespace('monitoring', description='Supervision du worker (pool de connexions)')
+
+
+@monitoring_ns.route('/pool')
+class PoolStatus(Resource):
+    @jwt_required()
+    @admin_required
+    def get(self):
+        """État du pool de connexions du worker qui traite la requête"""
+        return make_response(jsonify(engines_status(db.engines)), 200)
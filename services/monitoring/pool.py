@@ -0,0 +1,130 @@
+import os
+import time
+from collections import deque
+from threading import Lock
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+'''
+Télémétrie du pool de connexions SQLAlchemy (un pool par worker).
+
+InstrumentedQueuePool chronomètre chaque emprunt de connexion : le temps mesuré
+inclut l'attente d'une connexion libre quand le pool est saturé, l'ouverture d'une
+connexion en overflow et le pre-ping.
+'''
+
+# Au-delà de ce délai, un emprunt est compté comme "lent" (attente probable)
+SLOW_CHECKOUT_MS = 10
+# Nombre d'emprunts récents conservés pour les percentiles
+RECENT_CHECKOUTS = 1000
+
+
+class PoolTelemetry:
+    """Compteurs d'emprunts d'un pool (thread-safe)"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.checkouts = 0
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.peak_checked_out = 0
+        self._recent = deque(maxlen=RECENT_CHECKOUTS)
+
+    def record_checkout(self, elapsed_ms, checked_out, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            if elapsed_ms >= SLOW_CHECKOUT_MS:
+                self.slow_checkouts += 1
+            self.wait_total_ms += elapsed_ms
+            self.wait_max_ms = max(self.wait_max_ms, elapsed_ms)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            self._recent.append(elapsed_ms)
+
+    def snapshot(self):
+        with self._lock:
+            recent = sorted(self._recent)
+            attempts = self.checkouts + self.timeouts
+            return {
+                'checkouts': self.checkouts,
+                'slowCheckouts': self.slow_checkouts,
+                'timeouts': self.timeouts,
+                'peakCheckedOut': self.peak_checked_out,
+                'waitAvgMs': round(self.wait_total_ms / attempts, 2) if attempts else 0.0,
+                'waitMaxMs': round(self.wait_max_ms, 2),
+                'waitP50Ms': round(_percentile(recent, 0.50), 2),
+                'waitP95Ms': round(_percentile(recent, 0.95), 2),
+            }
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool qui mesure le temps d'emprunt de chaque connexion"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.telemetry = PoolTelemetry()
+
+    def connect(self):
+        started_at = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.telemetry.record_checkout(
+                (time.perf_counter() - started_at) * 1000, self.checkedout(), timed_out=True
+            )
+            raise
+        self.telemetry.record_checkout((time.perf_counter() - started_at) * 1000, self.checkedout())
+        return connection
+
+
+def init_pool_monitoring(app):
+    """Active InstrumentedQueuePool pour les bases serveur (à appeler avant db.init_app)"""
+    if app.config.get('SQLALCHEMY_DATABASE_URI', '').startswith('sqlite'):
+        return
+    options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+    if 'poolclass' not in options:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(options, poolclass=InstrumentedQueuePool)
+
+
+def pool_status(engine):
+    """État du pool d'un moteur: occupation courante et télémétrie si disponible"""
+    pool = engine.pool
+    status = {'poolClass': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checkedOut': pool.checkedout(),
+            'checkedIn': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+            'maxOverflow': pool._max_overflow,
+            'timeoutSeconds': pool.timeout(),
+        })
+    else:
+        status['status'] = pool.status()
+    telemetry = getattr(pool, 'telemetry', None)
+    if telemetry is not None:
+        status['telemetry'] = telemetry.snapshot()
+    return status
+
+
+def engines_status(engines):
+    """État de tous les moteurs (clé de bind -> état), pour le worker courant"""
+    return {
+        'pid': os.getpid(),
+        'engines': {
+            (bind_key or 'default'): pool_status(engine)
+            for bind_key, engine in engines.items()
+        },
+    }
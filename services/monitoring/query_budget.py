@@ -0,0 +1,123 @@
+import logging
+import re
+from collections import Counter
+from functools import wraps
+
+from flask import current_app, g, has_app_context, jsonify, make_response, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+'''
+Détection des N+1 et budgets de requêtes SQL par ressource (développement et tests).
+
+Chaque requête SQL est réduite à sa "forme" (littéraux et listes IN remplacés par ?).
+Une même forme exécutée QUERY_REPEAT_THRESHOLD fois ou plus dans une requête HTTP
+signale un N+1 probable. Les ressources déclarent leur budget avec @query_budget :
+
+    @query_budget(max_queries=3)
+    def get(self): ...
+
+QUERY_BUDGET_MODE :
+- 'off'   : aucune mesure (production)
+- 'warn'  : journalise les dépassements et N+1, en-têtes X-Query-Count / X-Query-Repeats
+- 'raise' : comme 'warn', et un budget déclaré dépassé renvoie une erreur 500 (tests)
+'''
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement):
+    """Forme normalisée d'une requête SQL (sans littéraux ni taille des listes IN)"""
+    shape = _STRING_LITERAL.sub('?', statement)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = shape.replace('%s', '?')
+    shape = _IN_LIST.sub('(?)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+def _mode():
+    return current_app.config.get('QUERY_BUDGET_MODE', 'off')
+
+
+def query_budget(max_queries=None, max_repeats=None):
+    """Déclare le budget SQL d'une ressource (nombre total et répétitions d'une même forme)"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            g.query_budget = {'max_queries': max_queries, 'max_repeats': max_repeats}
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_app_context():
+        return
+    shapes = g.get('query_shapes')
+    if shapes is not None:
+        shapes[statement_shape(statement)] += 1
+
+
+def _start_tracking():
+    if _mode() != 'off':
+        g.query_shapes = Counter()
+
+
+def _check_budget(response):
+    shapes = g.pop('query_shapes', None)
+    if shapes is None:
+        return response
+
+    total = sum(shapes.values())
+    threshold = current_app.config.get('QUERY_REPEAT_THRESHOLD', 5)
+    repeated = [(shape, count) for shape, count in shapes.most_common() if count >= threshold]
+    top_repeat = shapes.most_common(1)[0][1] if shapes else 0
+    response.headers['X-Query-Count'] = str(total)
+    response.headers['X-Query-Repeats'] = str(top_repeat)
+
+    endpoint = f"{request.method} {request.url_rule.rule if request.url_rule else request.path}"
+    for shape, count in repeated:
+        logger.warning(f"N+1 probable sur {endpoint}: {count} x {shape[:200]}")
+
+    budget = g.pop('query_budget', None)
+    if budget is None:
+        return response
+
+    violations = []
+    if budget['max_queries'] is not None and total > budget['max_queries']:
+        violations.append(f"{total} requêtes SQL pour un budget de {budget['max_queries']}")
+    max_repeats = budget['max_repeats'] if budget['max_repeats'] is not None else threshold - 1
+    if top_repeat > max_repeats:
+        violations.append(f"une même requête exécutée {top_repeat} fois (maximum {max_repeats})")
+    if not violations:
+        return response
+
+    logger.error(f"Budget SQL dépassé sur {endpoint}: {'; '.join(violations)}")
+    if _mode() != 'raise':
+        return response
+    return make_response(jsonify({
+        'error': 'Budget de requêtes SQL dépassé',
+        'endpoint': endpoint,
+        'violations': violations,
+        'repeated': [{'statement': shape, 'count': count} for shape, count in repeated],
+    }), 500)
+
+
+_engine_listener_installed = False
+
+
+def init_query_budget(app):
+    """Active le suivi des requêtes SQL par requête HTTP si QUERY_BUDGET_MODE != 'off'"""
+    global _engine_listener_installed
+    if app.config.get('QUERY_BUDGET_MODE', 'off') == 'off':
+        return
+    if not _engine_listener_installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        _engine_listener_installed = True
+    app.before_request(_start_tracking)
+    app.after_request(_check_budget)
@@ -0,0 +1,303 @@
+import atexit
+import copy
+import json
+import logging
+import re
+import sys
+import threading
+import time
+import uuid
+# File C d'origine, volontairement importée depuis _queue : gevent remplace
+# queue.SimpleQueue par une file coopérative, inutilisable entre les greenlets qui
+# déposent les lignes et le thread système qui les écrit (voir _native_thread_api)
+from _queue import SimpleQueue
+
+from flask import g, has_app_context, request
+from flask.logging import default_handler
+
+'''
+Journalisation structurée et non bloquante.
+
+Les appels logger.info(...) des requêtes ne font que déposer l'enregistrement dans une
+file mémoire ; un thread d'écriture dédié (un vrai thread système, même sous gevent)
+l'écrit sur stdout. Une écriture lente sur le pipe de logs (Passenger, Docker) ne
+bloque donc plus les requêtes : au pire la file se remplit et les lignes en trop sont
+abandonnées et comptées.
+
+Chaque ligne porte l'identifiant de la requête (en-tête X-Request-ID, repris ou
+généré, renvoyé dans la réponse) et le contexte métier lié par bind_log_context
+(ex. session_id). Les messages identiques répétés en rafale sont limités.
+
+Configuration : LOG_LEVEL, LOG_FORMAT (json ou text), LOG_ASYNC, LOG_QUEUE_SIZE,
+LOG_RATE_LIMIT_BURST et LOG_RATE_LIMIT_WINDOW.
+'''
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+_REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+_DIGITS = re.compile(r'\d+')
+
+# Attributs standard d'un LogRecord, exclus des champs supplémentaires du JSON
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+def bind_log_context(**fields):
+    """Ajoute des champs (ex. session_id=...) à toutes les lignes de la requête en cours"""
+    if not has_app_context():
+        return
+    context = dict(g.get('log_context') or {})
+    context.update({key: value for key, value in fields.items() if value is not None})
+    g.log_context = context
+
+
+class RequestContextFilter(logging.Filter):
+    """Ajoute request_id et le contexte lié par bind_log_context à chaque enregistrement"""
+
+    def filter(self, record):
+        if has_app_context():
+            record.request_id = g.get('request_id')
+            for key, value in (g.get('log_context') or {}).items():
+                setattr(record, key, value)
+        else:
+            record.request_id = None
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """Laisse passer au plus `burst` messages identiques par fenêtre de `window` secondes.
+
+    Les messages sont comparés sans leurs nombres (tentatives, statuts, durées). Le
+    premier message d'une nouvelle fenêtre porte le nombre de lignes supprimées.
+    """
+
+    def __init__(self, burst=20, window=10.0):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def _key(self, record):
+        message = record.msg if isinstance(record.msg, str) else str(record.msg)
+        return record.name, record.levelno, _DIGITS.sub('#', message)
+
+    def filter(self, record):
+        if self.burst <= 0:
+            return True
+        key = self._key(record)
+        now = time.monotonic()
+        with self._lock:
+            started_at, count, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - started_at >= self.window:
+                if suppressed:
+                    record.suppressed = suppressed
+                started_at, count, suppressed = now, 0, 0
+            if count >= self.burst:
+                self._windows[key] = (started_at, count, suppressed + 1)
+                return False
+            if len(self._windows) > 10000:
+                self._windows.clear()
+            self._windows[key] = (started_at, count + 1, suppressed)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement (horodatage UTC, niveau, logger, message, contexte)"""
+
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_') and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Format lisible pour le développement, avec l'identifiant de requête"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s')
+
+    def format(self, record):
+        if getattr(record, 'request_id', None) is None:
+            record.request_id = '-'
+        line = super().format(record)
+        if getattr(record, 'suppressed', None):
+            line += f" ({record.suppressed} messages identiques supprimés)"
+        return line
+
+
+class NonBlockingQueueHandler(logging.Handler):
+    """Dépose les enregistrements dans une file bornée, sans jamais attendre"""
+
+    def __init__(self, log_queue, max_size):
+        super().__init__()
+        self.queue = log_queue
+        self.max_size = max_size
+        self.dropped = 0
+
+    def emit(self, record):
+        try:
+            if self.queue.qsize() >= self.max_size:
+                self.dropped += 1
+                return
+            # Message et exception mis en forme ici : le thread d'écriture ne touche
+            # plus aux arguments ni au contexte de la requête
+            record = copy.copy(record)
+            record.msg = record.getMessage()
+            record.args = None
+            if record.exc_info:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+                record.exc_info = None
+            if self.dropped:
+                record.dropped, self.dropped = self.dropped, 0
+            self.queue.put(record)
+        except Exception:
+            self.handleError(record)
+
+
+_STOP = object()
+
+
+def _native_thread_api():
+    """start_new_thread et allocate_lock d'origine, même si gevent a patché _thread"""
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched('_thread'):
+            return monkey.get_original('_thread', ['start_new_thread', 'allocate_lock'])
+    except ImportError:
+        pass
+    import _thread
+    return _thread.start_new_thread, _thread.allocate_lock
+
+
+class LogWriter:
+    """Thread système qui vide la file et écrit les lignes formatées sur le flux de sortie.
+
+    Le flux est écrit directement, sans StreamHandler : le verrou d'un handler est un
+    verrou gevent quand threading est patché, inutilisable depuis un thread système.
+    """
+
+    def __init__(self, log_queue, stream, formatter):
+        self.queue = log_queue
+        self.stream = stream
+        self.formatter = formatter
+        self._start_new_thread, allocate_lock = _native_thread_api()
+        self._done = allocate_lock()
+
+    def start(self):
+        self._done.acquire()
+        self._start_new_thread(self._run, ())
+
+    def _run(self):
+        try:
+            while True:
+                record = self.queue.get()
+                if record is _STOP:
+                    break
+                try:
+                    self.stream.write(self.formatter.format(record) + '\n')
+                    # Vider le tampon seulement quand la file est vide (rafales groupées)
+                    if self.queue.empty():
+                        self.stream.flush()
+                except (OSError, ValueError):
+                    pass
+        finally:
+            self._done.release()
+
+    def stop(self, timeout=2.0):
+        """Écrit les lignes restantes puis arrête le thread (appelé à la sortie du processus)"""
+        self.queue.put(_STOP)
+        if self._done.acquire(timeout=timeout):
+            self._done.release()
+        try:
+            self.stream.flush()
+        except (OSError, ValueError):
+            # Flux déjà fermé à la sortie du processus
+            pass
+
+
+def make_formatter(log_format):
+    return JsonFormatter() if log_format == 'json' else TextFormatter()
+
+
+def build_handler(log_format='text', asynchronous=True, queue_size=10000,
+                  rate_limit_burst=20, rate_limit_window=10.0, stream=None):
+    """Construit le handler racine : (handler, writer ou None)"""
+    stream = stream or sys.stdout
+    formatter = make_formatter(log_format)
+
+    if asynchronous:
+        log_queue = SimpleQueue()
+        handler = NonBlockingQueueHandler(log_queue, queue_size)
+        writer = LogWriter(log_queue, stream, formatter)
+    else:
+        handler, writer = logging.StreamHandler(stream), None
+        handler.setFormatter(formatter)
+
+    # Filtres exécutés dans le thread appelant, où le contexte de requête est disponible
+    handler.addFilter(RequestContextFilter())
+    handler.addFilter(RateLimitFilter(rate_limit_burst, rate_limit_window))
+    return handler, writer
+
+
+def _is_console_handler(handler):
+    return type(handler) is logging.StreamHandler and handler.stream in (sys.stdout, sys.stderr)
+
+
+_root_handler = None
+_writer = None
+
+
+def _install_root_handler(app):
+    global _root_handler, _writer
+    root = logging.getLogger()
+    root.setLevel(app.config.get('LOG_LEVEL', 'INFO'))
+    if _root_handler is not None:
+        return
+
+    handler, writer = build_handler(
+        log_format=app.config.get('LOG_FORMAT', 'text'),
+        asynchronous=app.config.get('LOG_ASYNC', True),
+        queue_size=app.config.get('LOG_QUEUE_SIZE', 10000),
+        rate_limit_burst=app.config.get('LOG_RATE_LIMIT_BURST', 20),
+        rate_limit_window=app.config.get('LOG_RATE_LIMIT_WINDOW', 10.0),
+    )
+    # Remplace les handlers console synchrones (basicConfig) ; ceux de pytest restent
+    for existing in list(root.handlers):
+        if _is_console_handler(existing):
+            root.removeHandler(existing)
+    root.addHandler(handler)
+    if writer is not None:
+        writer.start()
+        atexit.register(writer.stop)
+    _root_handler, _writer = handler, writer
+
+
+def _assign_request_id():
+    incoming = request.headers.get(REQUEST_ID_HEADER, '')
+    g.request_id = incoming if _REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+
+
+def _echo_request_id(response):
+    request_id = g.get('request_id')
+    if request_id:
+        response.headers[REQUEST_ID_HEADER] = request_id
+    return response
+
+
+def configure_logging(app):
+    """Installe le pipeline de logs du processus et la corrélation par requête de l'application"""
+    _install_root_handler(app)
+    # Les logs de app.logger passent par le handler racine plutôt que par stderr
+    app.logger.removeHandler(default_handler)
+    app.before_request(_assign_request_id)
+    app.after_request(_echo_request_id)
@@ -1,13 +1,20 @@
 from flask import request, jsonify
 from flask_restx import Resource, Namespace, fields
-import requests
-import traceback
+import logging
 import urllib.parse
 import time
-import urllib3
+from services.lazy_imports import lazy_import
+from services.proxy.upstream import n8n_webhook_urls, post_webhook
 
-# Désactiver les avertissements SSL pour éviter l'encombrement des logs
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+def _disable_insecure_warnings(requests_module):
+    # Désactiver les avertissements SSL pour éviter l'encombrement des logs
+    import urllib3
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+requests = lazy_import('requests', on_load=_disable_insecure_warnings)
+logger = logging.getLogger(__name__)
 
 proxy_ns = Namespace('proxy', description='Proxy services for external APIs')
 
@@ -35,19 +42,15 @@ class CorrectionProxy(Resource):
             data = request.get_json()
             
             # URLs de fallback avec HTTPS et HTTP
-            urls = [
-                'https://n8n.expressiontcf.com/webhook/agent-expression-ecrite',
-                'http://n8n.expressiontcf.com/webhook/agent-expression-ecrite',
-              
-            ]
+            urls = n8n_webhook_urls('agent-expression-ecrite', http_fallback=True)
             
             last_error = None
             
             # Essayer chaque URL une seule fois
             for url in urls:
                 try:
-                    print(f"Tentative de connexion a: {url}")
-                    response = requests.post(
+                    logger.info(f"Tentative de connexion a: {url}")
+                    response = post_webhook(
                         url,
                         json=data,
                         headers={
@@ -58,34 +61,34 @@ class CorrectionProxy(Resource):
                         verify=False
                     )
                     
-                    print(f"Reponse recue - Status: {response.status_code}")
+                    logger.info(f"Reponse recue - Status: {response.status_code}")
                     
                     # Si succès, retourner immédiatement sans essayer d'autres URLs
                     if response.status_code == 200:
-                        print(f"Succès avec {url} - Arrêt des tentatives")
+                        logger.info(f"Succès avec {url} - Arrêt des tentatives")
                         return response.json(), 200
                     else:
                         last_error = f"Status {response.status_code}: {response.text[:200]}"
-                        print(f"Échec avec {url}: {last_error}")
+                        logger.warning(f"Échec avec {url}: {last_error}")
                         # Continuer avec l'URL suivante
                         
                 except requests.exceptions.Timeout:
                     last_error = f"Timeout avec {url}"
-                    print(f"Timeout avec {url}")
+                    logger.warning(f"Timeout avec {url}")
                     continue
                 except requests.exceptions.ConnectionError as e:
                     error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
                     last_error = f"Erreur de connexion avec {url}: {error_msg}"
-                    print(f"Erreur de connexion avec {url}: {error_msg}")
+                    logger.warning(f"Erreur de connexion avec {url}: {error_msg}")
                     continue
                 except Exception as e:
                     error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
                     last_error = f"Erreur avec {url}: {error_msg}"
-                    print(f"Erreur avec {url}: {error_msg}")
+                    logger.warning(f"Erreur avec {url}: {error_msg}")
                     continue
             
             # Si toutes les tentatives ont échoué
-            print(f"Toutes les URLs ont échoué. Dernière erreur: {last_error}")
+            logger.error(f"Toutes les URLs ont échoué. Dernière erreur: {last_error}")
             return {
                 "error": "Impossible de se connecter a l'API de correction",
                 "message": f"Toutes les tentatives ont echoue avec {len(urls)} URLs",
@@ -96,8 +99,7 @@ class CorrectionProxy(Resource):
             
         except Exception as e:
             error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
-            print("Erreur dans le proxy de correction: " + error_msg)
-            print(traceback.format_exc())
+            logger.exception(f"Erreur dans le proxy de correction: {error_msg}")
             return {
                 'error': 'Erreur interne du serveur',
                 'message': error_msg
@@ -1,7 +1,12 @@
 from flask import request, jsonify
 from flask_restx import Resource, Namespace, fields
-import requests
-import traceback
+from services.lazy_imports import lazy_import
+from services.proxy.upstream import n8n_base_url, n8n_webhook_urls, post_webhook
+from services.monitoring.structured_logging import bind_log_context
+import logging
+
+requests = lazy_import('requests')
+logger = logging.getLogger(__name__)
 
 proxy_ns = Namespace('proxy-note-moyenne', description='Proxy services for note moyenne API')
 
@@ -31,23 +36,19 @@ class NoteMoyenneProxy(Resource):
             
             # Récupération de l'ID de session pour le logging
             session_id = data.get('sessionId', 'non_specifie')
-            print(f"Traitement de la session {session_id}")
+            bind_log_context(session_id=session_id)
+            logger.info(f"Traitement de la session {session_id}")
             
             try:
                 # URL du webhook pour la note moyenne
-                urls = [
-                    'https://n8n.expressiontcf.com/webhook/agent-note-moyenne',
-                ]
+                urls = n8n_webhook_urls('agent-note-moyenne')
                 
                 last_error = None
                 
                 for url in urls:
                     try:
-                        try:
-                            print("Tentative de connexion a: " + str(url))
-                        except UnicodeEncodeError:
-                            print("Tentative de connexion a: " + str(url))
-                        response = requests.post(
+                        logger.info(f"Tentative de connexion a: {url}")
+                        response = post_webhook(
                             url,
                             json=data,
                             headers={
@@ -58,10 +59,7 @@ class NoteMoyenneProxy(Resource):
                             verify=False
                         )
                         
-                        try:
-                            print("Reponse recue - Status: " + str(response.status_code))
-                        except UnicodeEncodeError:
-                            print("Reponse recue - Status: " + str(response.status_code))
+                        logger.info(f"Reponse recue - Status: {response.status_code}")
                         
                         if response.status_code == 200:
                             # Récupérer la réponse de l'API
@@ -83,61 +81,33 @@ class NoteMoyenneProxy(Resource):
                             
                     except requests.exceptions.Timeout:
                         last_error = "Timeout avec " + str(url)
-                        try:
-                            print("Timeout avec " + str(url))
-                        except UnicodeEncodeError:
-                            print("Timeout avec URL")
+                        logger.warning(f"Timeout avec {url}")
                         continue
                     except requests.exceptions.ConnectionError as e:
                         error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
                         last_error = "Erreur de connexion avec " + str(url) + ": " + error_msg
-                        try:
-                            print("Erreur de connexion avec " + str(url) + ": " + error_msg)
-                        except UnicodeEncodeError:
-                            print("Erreur de connexion avec URL")
+                        logger.warning(f"Erreur de connexion avec {url}: {error_msg}")
                         continue
                     except Exception as e:
                         error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
                         last_error = "Erreur avec " + str(url) + ": " + error_msg
-                        try:
-                            print("Erreur: " + last_error)
-                        except UnicodeEncodeError:
-                            print("Erreur lors du traitement")
+                        logger.warning(f"Erreur: {last_error}")
                         continue
                 
                 # Si toutes les tentatives ont echoue
                 return {
                     "error": "Impossible de se connecter a l'API de note moyenne",
                     "message": "Toutes les tentatives ont echoue. Derniere erreur: " + str(last_error),
-                    "api_endpoint": "https://n8n.expressiontcf.com"
+                    "api_endpoint": n8n_base_url()
                 }, 500
             finally:
                 # Session terminée
-                try:
-                    print(f"Session {session_id} terminee")
-                except UnicodeEncodeError:
-                    print(f"Session {session_id} terminee")
+                logger.info(f"Session {session_id} terminee")
                 
         except Exception as e:
             error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
-            try:
-                print("Erreur dans le proxy de note moyenne: " + error_msg)
-            except UnicodeEncodeError:
-                print("Erreur dans le proxy de note moyenne")
-            
-            # Gestion securisee de l'affichage du traceback avec encodage UTF-8
-            try:
-                traceback_str = traceback.format_exc()
-                print(traceback_str.encode('utf-8', errors='replace').decode('utf-8'))
-            except UnicodeEncodeError:
-                print("Erreur d'encodage lors de l'affichage du traceback")
-            
-            # Logging de l'erreur pour la session
-            if 'session_id' in locals():
-                try:
-                    print(f"Erreur lors du traitement de la session {session_id}")
-                except UnicodeEncodeError:
-                    print(f"Erreur lors du traitement de la session {session_id}")
+            # Le session_id éventuel est déjà lié au contexte de log de la requête
+            logger.exception(f"Erreur dans le proxy de note moyenne: {error_msg}")
             
             return {
                 'error': 'Erreur interne du serveur',
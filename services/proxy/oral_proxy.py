@@ -1,11 +1,15 @@
 from flask import request, jsonify
 from flask_restx import Resource, Namespace, fields
-import requests
-import traceback
+from services.lazy_imports import lazy_import
+from services.proxy.upstream import n8n_webhook_urls, post_webhook
+import logging
 import urllib.parse
 import time
 import json
 
+requests = lazy_import('requests')
+logger = logging.getLogger(__name__)
+
 proxy_ns = Namespace('proxy', description='Proxy services for external APIs')
 
 def validate_oral_json_format(response_data):
@@ -16,12 +20,12 @@ def validate_oral_json_format(response_data):
     try:
         # Vérifier que c'est une liste
         if not isinstance(response_data, list):
-            print("Erreur validation: La réponse n'est pas une liste")
+            logger.warning("Erreur validation: La réponse n'est pas une liste")
             return False
         
         # Vérifier qu'il y a exactement 3 éléments (tâches)
         if len(response_data) != 3:
-            print(f"Erreur validation: Nombre de tâches incorrect ({len(response_data)} au lieu de 3)")
+            logger.warning(f"Erreur validation: Nombre de tâches incorrect ({len(response_data)} au lieu de 3)")
             return False
         
         # Définir les tâches attendues
@@ -31,23 +35,23 @@ def validate_oral_json_format(response_data):
         for i, task_data in enumerate(response_data):
             # Vérifier la structure de base
             if not isinstance(task_data, dict) or 'output' not in task_data:
-                print(f"Erreur validation tâche {i+1}: Structure 'output' manquante")
+                logger.warning(f"Erreur validation tâche {i+1}: Structure 'output' manquante")
                 return False
             
             output = task_data['output']
             if not isinstance(output, dict):
-                print(f"Erreur validation tâche {i+1}: 'output' n'est pas un dictionnaire")
+                logger.warning(f"Erreur validation tâche {i+1}: 'output' n'est pas un dictionnaire")
                 return False
             
             # Vérifier que la tâche attendue existe
             task_name = expected_tasks[i]
             if task_name not in output:
-                print(f"Erreur validation tâche {i+1}: '{task_name}' manquante")
+                logger.warning(f"Erreur validation tâche {i+1}: '{task_name}' manquante")
                 return False
             
             task_content = output[task_name]
             if not isinstance(task_content, dict):
-                print(f"Erreur validation tâche {i+1}: Le contenu de '{task_name}' n'est pas un dictionnaire")
+                logger.warning(f"Erreur validation tâche {i+1}: Le contenu de '{task_name}' n'est pas un dictionnaire")
                 return False
             
             # Vérifier tous les champs requis
@@ -56,26 +60,26 @@ def validate_oral_json_format(response_data):
                     if field == 'NoteExamCorrection':
                         # Créer automatiquement le champ NoteExamCorrection avec la valeur par défaut 'B1'
                         task_content['NoteExamCorrection'] = 'C1'
-                        print(f"Champ 'NoteExamCorrection' manquant dans tâche {i+1} - ajouté automatiquement avec la valeur 'B1'")
+                        logger.info(f"Champ 'NoteExamCorrection' manquant dans tâche {i+1} - ajouté automatiquement avec la valeur 'B1'")
                     else:
-                        print(f"Erreur validation tâche {i+1}: Champ '{field}' manquant")
+                        logger.warning(f"Erreur validation tâche {i+1}: Champ '{field}' manquant")
                         return False
                 
                 # Vérifier les types des champs
                 if field in ['corrections_taches', 'pointsForts', 'pointsAmeliorer']:
                     if not isinstance(task_content[field], list):
-                        print(f"Erreur validation tâche {i+1}: '{field}' doit être une liste")
+                        logger.warning(f"Erreur validation tâche {i+1}: '{field}' doit être une liste")
                         return False
                 elif field in ['NoteExam', 'NoteExamCorrection']:
                     if not isinstance(task_content[field], str):
-                        print(f"Erreur validation tâche {i+1}: '{field}' doit être une chaîne")
+                        logger.warning(f"Erreur validation tâche {i+1}: '{field}' doit être une chaîne")
                         return False
         
-        print("Validation JSON réussie: Format correct")
+        logger.debug("Validation JSON réussie: Format correct")
         return True
         
     except Exception as e:
-        print(f"Erreur lors de la validation JSON: {str(e)}")
+        logger.warning(f"Erreur lors de la validation JSON: {str(e)}")
         return False
 
 # Modèle pour la requête de correction orale
@@ -102,10 +106,7 @@ class OralProxy(Resource):
             data = request.get_json()
             
             # Essayer d'abord HTTPS, puis HTTP
-            urls = [
-                'https://n8n.expressiontcf.com/webhook/agent-expression-oral',
-                'http://n8n.expressiontcf.com/webhook/agent-expression-oral',
-            ]
+            urls = n8n_webhook_urls('agent-expression-oral', http_fallback=True)
             
             last_error = None
             
@@ -114,8 +115,8 @@ class OralProxy(Resource):
                 max_retries = 3
                 for attempt in range(max_retries):
                     try:
-                        print(f"Tentative de connexion a: {url} (tentative {attempt + 1}/{max_retries})")
-                        response = requests.post(
+                        logger.info(f"Tentative de connexion a: {url} (tentative {attempt + 1}/{max_retries})")
+                        response = post_webhook(
                             url,
                             json=data,
                             headers={
@@ -126,17 +127,17 @@ class OralProxy(Resource):
                             verify=False
                         )
                         
-                        print("Reponse recue - Status: " + str(response.status_code))
+                        logger.info(f"Reponse recue - Status: {response.status_code}")
                         
                         if response.status_code == 200:
                             response_json = response.json()
                             
                             # Validation stricte du format JSON
                             if validate_oral_json_format(response_json):
-                                print("Format JSON validé avec succès")
+                                logger.info("Format JSON validé avec succès")
                                 return response_json, 200
                             else:
-                                print("Format JSON invalide - nouvelle tentative requise")
+                                logger.warning("Format JSON invalide - nouvelle tentative requise")
                                 # Si le format est invalide, on considère cela comme une erreur temporaire
                                 # et on continue avec les tentatives suivantes
                                 last_error = f"Format JSON invalide reçu de {url}"
@@ -146,7 +147,7 @@ class OralProxy(Resource):
                                 break
                         elif response.status_code == 504:
                             # Gateway timeout - retry
-                            print(f"Gateway timeout (504) - retrying attempt {attempt + 1}")
+                            logger.warning(f"Gateway timeout (504) - retrying attempt {attempt + 1}")
                             if attempt < max_retries - 1:
                                 time.sleep(2 ** attempt)  # Exponential backoff
                                 continue
@@ -156,7 +157,7 @@ class OralProxy(Resource):
                             
                     except requests.exceptions.Timeout:
                         last_error = "Timeout avec " + str(url)
-                        print(f"Timeout avec {url} - tentative {attempt + 1}")
+                        logger.warning(f"Timeout avec {url} - tentative {attempt + 1}")
                         if attempt < max_retries - 1:
                             time.sleep(2 ** attempt)  # Exponential backoff
                             continue
@@ -164,7 +165,7 @@ class OralProxy(Resource):
                     except requests.exceptions.ConnectionError as e:
                         error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
                         last_error = "Erreur de connexion avec " + str(url) + ": " + error_msg
-                        print(f"Erreur de connexion avec {url}: {error_msg} - tentative {attempt + 1}")
+                        logger.warning(f"Erreur de connexion avec {url}: {error_msg} - tentative {attempt + 1}")
                         if attempt < max_retries - 1:
                             time.sleep(2 ** attempt)  # Exponential backoff
                             continue
@@ -172,7 +173,7 @@ class OralProxy(Resource):
                     except Exception as e:
                         error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
                         last_error = "Erreur avec " + str(url) + ": " + error_msg
-                        print(f"Erreur avec {url}: {error_msg} - tentative {attempt + 1}")
+                        logger.warning(f"Erreur avec {url}: {error_msg} - tentative {attempt + 1}")
                         if attempt < max_retries - 1:
                             time.sleep(2 ** attempt)  # Exponential backoff
                             continue
@@ -187,8 +188,7 @@ class OralProxy(Resource):
             
         except Exception as e:
             error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
-            print("Erreur dans le proxy d'expression orale: " + error_msg)
-            print(traceback.format_exc())
+            logger.exception(f"Erreur dans le proxy d'expression orale: {error_msg}")
             return {
                 'error': 'Erreur interne du serveur',
                 'message': error_msg
@@ -1,19 +1,17 @@
 import os
-import sys
-import asyncio
 from flask import request, jsonify
 from flask_restx import Resource, Namespace, fields
-import requests
 import traceback
 import uuid
 import logging
+from services.lazy_imports import lazy_import
+from services.proxy.upstream import n8n_webhook_url, post_webhook
+from services.monitoring.structured_logging import bind_log_context
 
 # Importer les fonctions de synthèse directement
-backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-services_dir = os.path.join(backend_dir, "services", "exam")
-sys.path.insert(0, services_dir)
+from services.exam.synthesis import process_text_with_groq, synthesize_audio
 
-from synthesis import process_text_with_groq, synthesize_with_edgetts
+requests = lazy_import('requests')
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -61,6 +59,7 @@ class Task1Proxy(Resource):
             if not session_id:
                 session_id = str(uuid.uuid4().hex)
                 logger.info(f"Nouveau sessionId généré: {session_id}")
+            bind_log_context(session_id=session_id)
             
             # Préparer les données pour l'API externe
             payload = {
@@ -73,11 +72,11 @@ class Task1Proxy(Resource):
                 payload["objectif"] = objectif
             
             # URL de l'API externe
-            url = "https://n8n.expressiontcf.com/webhook/agent-vocal-tache1"
+            url = n8n_webhook_url('agent-vocal-tache1')
             
             try:
                 logger.info(f"Envoi de la requête à {url} avec sessionId: {session_id}")
-                response = requests.post(
+                response = post_webhook(
                     url,
                     json=payload,
                     headers={
@@ -107,10 +106,7 @@ class Task1Proxy(Resource):
                         processed_text = process_text_with_groq(output_text)
                         
                         # Synthétiser avec EdgeTTS via appel direct
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        audio_filename = loop.run_until_complete(synthesize_with_edgetts(processed_text, session_id=session_id))
-                        loop.close()
+                        audio_filename = synthesize_audio(processed_text, session_id=session_id)
                         
                         if audio_filename:
                             # Construire l'URL dynamiquement basée sur la requête
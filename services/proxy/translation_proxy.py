@@ -1,9 +1,14 @@
 from flask import request, jsonify
 from flask_restx import Resource, Namespace, fields
-import requests
-import traceback
+from services.lazy_imports import lazy_import
+from services.proxy.upstream import n8n_base_url, n8n_webhook_urls, post_webhook
+import logging
 import urllib.parse
 import time
+
+requests = lazy_import('requests')
+logger = logging.getLogger(__name__)
+
 proxy_ns = Namespace('proxy-translation', description='Proxy services for translation API')
 
 # Modèle pour la requête de traduction
@@ -30,10 +35,7 @@ class TranslationProxy(Resource):
             data = request.get_json()
             
             # Essayer d'abord HTTPS, puis HTTP
-            urls = [
-                'https://n8n.expressiontcf.com/webhook/agent-tradution',
-             
-            ]
+            urls = n8n_webhook_urls('agent-tradution')
             
             last_error = None
             
@@ -42,8 +44,8 @@ class TranslationProxy(Resource):
                 max_retries = 3
                 for attempt in range(max_retries):
                     try:
-                        print(f"Tentative de connexion a: {url} (tentative {attempt + 1}/{max_retries})")
-                        response = requests.post(
+                        logger.info(f"Tentative de connexion a: {url} (tentative {attempt + 1}/{max_retries})")
+                        response = post_webhook(
                             url,
                             json=data,
                             headers={
@@ -54,13 +56,13 @@ class TranslationProxy(Resource):
                             verify=False
                         )
                         
-                        print("Reponse recue - Status: " + str(response.status_code))
+                        logger.info(f"Reponse recue - Status: {response.status_code}")
                         
                         if response.status_code == 200:
                             return response.json(), 200
                         elif response.status_code == 504:
                             # Gateway timeout - retry
-                            print(f"Gateway timeout (504) - retrying attempt {attempt + 1}")
+                            logger.warning(f"Gateway timeout (504) - retrying attempt {attempt + 1}")
                             if attempt < max_retries - 1:
                                 time.sleep(2 ** attempt)  # Exponential backoff
                                 continue
@@ -70,7 +72,7 @@ class TranslationProxy(Resource):
                             
                     except requests.exceptions.Timeout:
                         last_error = "Timeout avec " + str(url)
-                        print(f"Timeout avec {url} - tentative {attempt + 1}")
+                        logger.warning(f"Timeout avec {url} - tentative {attempt + 1}")
                         if attempt < max_retries - 1:
                             time.sleep(2 ** attempt)  # Exponential backoff
                             continue
@@ -78,7 +80,7 @@ class TranslationProxy(Resource):
                     except requests.exceptions.ConnectionError as e:
                         error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
                         last_error = "Erreur de connexion avec " + str(url) + ": " + error_msg
-                        print(f"Erreur de connexion avec {url}: {error_msg} - tentative {attempt + 1}")
+                        logger.warning(f"Erreur de connexion avec {url}: {error_msg} - tentative {attempt + 1}")
                         if attempt < max_retries - 1:
                             time.sleep(2 ** attempt)  # Exponential backoff
                             continue
@@ -86,7 +88,7 @@ class TranslationProxy(Resource):
                     except Exception as e:
                         error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
                         last_error = "Erreur avec " + str(url) + ": " + error_msg
-                        print(f"Erreur avec {url}: {error_msg} - tentative {attempt + 1}")
+                        logger.warning(f"Erreur avec {url}: {error_msg} - tentative {attempt + 1}")
                         if attempt < max_retries - 1:
                             time.sleep(2 ** attempt)  # Exponential backoff
                             continue
@@ -96,13 +98,12 @@ class TranslationProxy(Resource):
             return {
                 "error": "Impossible de se connecter a l'API de traduction",
                 "message": "Toutes les tentatives ont echoue. Derniere erreur: " + str(last_error),
-                "api_endpoint": "https://n8n.expressiontcf.com"
+                "api_endpoint": n8n_base_url()
             }, 500
             
         except Exception as e:
             error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
-            print("Erreur dans le proxy de traduction: " + error_msg)
-            print(traceback.format_exc())
+            logger.exception(f"Erreur dans le proxy de traduction: {error_msg}")
             return {
                 'error': 'Erreur interne du serveur',
                 'message': error_msg
@@ -0,0 +1,36 @@
+from flask import current_app
+from services.lazy_imports import lazy_import
+from services.monitoring.metrics import upstream_call
+
+requests = lazy_import('requests')
+
+# Agents IA (workflows n8n) appelés par les proxies
+DEFAULT_N8N_BASE_URL = 'https://n8n.expressiontcf.com'
+
+
+def n8n_base_url():
+    """URL de base des webhooks n8n (configurable via N8N_BASE_URL)"""
+    return current_app.config.get('N8N_BASE_URL', DEFAULT_N8N_BASE_URL).rstrip('/')
+
+
+def n8n_webhook_url(name):
+    """URL du webhook n8n `name` (ex. 'agent-vocal-tache1')"""
+    return f"{n8n_base_url()}/webhook/{name}"
+
+
+def n8n_webhook_urls(name, http_fallback=False):
+    """URLs à essayer dans l'ordre pour le webhook `name`.
+
+    Avec `http_fallback`, l'URL HTTPS est suivie de son équivalent HTTP.
+    """
+    url = n8n_webhook_url(name)
+    urls = [url]
+    if http_fallback and url.startswith('https://'):
+        urls.append('http://' + url[len('https://'):])
+    return urls
+
+
+def post_webhook(url, **kwargs):
+    """requests.post vers un webhook n8n, chronométré dans les métriques de la requête"""
+    with upstream_call('n8n'):
+        return requests.post(url, **kwargs)
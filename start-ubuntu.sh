@@ -43,8 +43,8 @@ else:
 
 # Fonction pour initialiser les tables
 init_tables() {
-    echo "Initialisation des tables..."
-    python3 init_db.py
+    echo "Initialisation des tables et des données par défaut..."
+    python3 -m flask bootstrap
     if [ $? -eq 0 ]; then
         echo "✓ Tables initialisées avec succès"
     else
@@ -0,0 +1,64 @@
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from config import TestConfig
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Application de test sur une base SQLite temporaire, schéma et données par défaut créés"""
+    from app import create_app
+    from commands.bootstrap import bootstrap_database
+
+    class Config(TestConfig):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + str(tmp_path / "test.db")
+
+    app = create_app(Config)
+    with app.app_context():
+        bootstrap_database()
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_user(username, role='client', **fields):
+    """Crée un utilisateur en base et retourne l'en-tête Authorization associé"""
+    from models.exts import db
+    from models.model import User
+    from services.auth.principal import create_user_access_token
+
+    user = User(
+        username=username,
+        email=fields.pop('email', f"{username}@example.com"),
+        password=fields.pop('password', 'x'),
+        role=role,
+        **fields,
+    )
+    db.session.add(user)
+    db.session.commit()
+    return user, {'Authorization': f"Bearer {create_user_access_token(user)}"}
+
+
+def make_exam(user, score='B2', days_ago=0, **fields):
+    """Examen (non enregistré) de `user` sur la première tâche, passé il y a `days_ago` jours"""
+    from datetime import datetime, timedelta
+    from models.tcf_exam_model import TCFExam
+    from models.tcf_model import TCFTask
+
+    task = TCFTask.query.first()
+    return TCFExam(id_user=user.id, id_subject=task.subject_id, id_task=task.id, score=score,
+                   date_passage=datetime.utcnow() - timedelta(days=days_ago), **fields)
+
+
+@pytest.fixture
+def admin_headers(app):
+    return make_user('admin_test', role='admin')[1]
@@ -0,0 +1,61 @@
+import os
+
+from sqlalchemy import event, inspect
+
+from config import TestConfig
+from models.exts import db
+
+
+def test_create_app_does_not_touch_database(tmp_path):
+    from app import create_app
+
+    db_path = tmp_path / "untouched.db"
+
+    class Config(TestConfig):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + str(db_path)
+
+    app = create_app(Config)
+
+    assert not os.path.exists(db_path), "La factory ne doit pas ouvrir la base"
+    assert app.config['STARTUP_TIME_MS'] >= 0
+
+
+def test_bootstrap_command_creates_schema_and_defaults(tmp_path):
+    from app import create_app
+    from models.tcf_model import TCFSubject
+    from models.subscription_pack_model import SubscriptionPack
+
+    class Config(TestConfig):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + str(tmp_path / "bootstrap.db")
+
+    app = create_app(Config)
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['bootstrap'])
+    assert result.exit_code == 0, result.output
+    assert 'créés' in result.output
+
+    # Deuxième exécution: idempotente
+    result = runner.invoke(args=['bootstrap'])
+    assert result.exit_code == 0, result.output
+    assert 'déjà présents' in result.output
+
+    with app.app_context():
+        assert 'user' in inspect(db.engine).get_table_names()
+        assert TCFSubject.query.count() == 3
+        assert SubscriptionPack.query.count() == 3
+
+
+def test_first_request_runs_no_seed_queries(app, client):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        client.get('/docs')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert statements == []
@@ -0,0 +1,50 @@
+from models.exts import db
+from models.tcf_attempt_model import TCFAttempt, reserve_attempt
+from models.tcf_model import TCFSubject
+from tests.conftest import make_user
+
+
+def _add_subject():
+    subject = TCFSubject(name='Sujet tentatives', date='2024-09-01', status='Actif', duration=60,
+                         subject_type='Écrit')
+    db.session.add(subject)
+    db.session.commit()
+    return subject.id
+
+
+def test_reserve_attempt_stops_at_maximum(app):
+    user, _ = make_user('attempt_model')
+    user_id, subject_id = user.id, _add_subject()
+    connection = db.session.connection()
+
+    assert [reserve_attempt(connection, user_id, subject_id, max_attempts=2) for _ in range(3)] == [True, True, False]
+    db.session.commit()
+    assert TCFAttempt.query.filter_by(id_user=user_id, id_subject=subject_id).one().attempt_count == 2
+
+
+def test_check_and_reserve_endpoints(client):
+    user, headers = make_user('attempt_client')
+    subject_id = _add_subject()
+
+    response = client.get(f'/attempt/attempts/check/{subject_id}', headers=headers)
+    assert response.get_json() == {'can_attempt': True, 'current_attempts': 0,
+                                    'remaining_attempts': 1, 'max_attempts': 1}
+    # Utilisateur, puis sujet et compteur en une requête ; aucune ligne créée
+    assert response.headers['X-Query-Count'] == '2'
+    assert TCFAttempt.query.count() == 0
+
+    response = client.post(f'/attempt/attempts/subject/{subject_id}', headers=headers)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['attempt_count'], body['remaining_attempts'], body['max_attempts']) == (1, 0, 1)
+    # Utilisateur connecté déjà en cache (principal)
+    assert response.headers['X-Query-Count'] == '3'
+
+    response = client.post(f'/attempt/attempts/subject/{subject_id}', headers=headers)
+    assert response.status_code == 409
+    assert response.get_json()['current_attempts'] == 1
+
+    response = client.get(f'/attempt/attempts/check/{subject_id}', headers=headers)
+    assert response.get_json()['can_attempt'] is False
+    assert client.get('/attempt/attempts/check/999999', headers=headers).status_code == 404
+    assert client.post('/attempt/attempts/subject/999999', headers=headers).status_code == 404
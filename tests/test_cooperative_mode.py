@@ -0,0 +1,43 @@
+import asyncio
+import threading
+
+from services.concurrency import is_cooperative, run_coroutine
+from services.proxy.upstream import n8n_webhook_url, n8n_webhook_urls
+
+
+async def _double(value, delay=0):
+    await asyncio.sleep(delay)
+    return value * 2
+
+
+def test_run_coroutine_without_gevent_uses_private_loop():
+    assert not is_cooperative()
+    assert run_coroutine(_double, 21, delay=0.01) == 42
+
+
+def test_run_coroutine_is_safe_from_concurrent_threads():
+    results = []
+    threads = [
+        threading.Thread(target=lambda i=i: results.append(run_coroutine(_double, i, delay=0.05)))
+        for i in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == [i * 2 for i in range(8)]
+
+
+def test_n8n_webhook_urls_follow_configuration(app):
+    with app.app_context():
+        app.config['N8N_BASE_URL'] = 'https://n8n.example.test/'
+        assert n8n_webhook_url('agent-tradution') == 'https://n8n.example.test/webhook/agent-tradution'
+        assert n8n_webhook_urls('agent-expression-oral', http_fallback=True) == [
+            'https://n8n.example.test/webhook/agent-expression-oral',
+            'http://n8n.example.test/webhook/agent-expression-oral',
+        ]
+
+        app.config['N8N_BASE_URL'] = 'http://127.0.0.1:5678'
+        assert n8n_webhook_urls('agent-expression-oral', http_fallback=True) == [
+            'http://127.0.0.1:5678/webhook/agent-expression-oral',
+        ]
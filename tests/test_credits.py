@@ -0,0 +1,66 @@
+from models.credit_model import CreditLedger
+from models.exts import db
+from models.model import User
+from tests.conftest import make_user
+
+
+def _ledger(user_id):
+    return [(row.delta, row.balance, row.reason, row.reference)
+            for row in CreditLedger.query.filter_by(user_id=user_id).order_by(CreditLedger.id)]
+
+
+def test_consume_is_conditional_and_recorded(client):
+    user, headers = make_user('credit_client', sold=2.0, total_sold=5.0)
+
+    response = client.post('/credits/consume', json={'amount': 1, 'reference': 'tache-1'}, headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['sold'] == 1.0
+    # Principal (cache vide), mise à jour conditionnelle par id, lecture du solde, ligne du registre
+    assert response.headers['X-Query-Count'] == '4'
+
+    response = client.post('/credits/consume', json={'amount': 2}, headers=headers)
+    assert response.status_code == 402
+    assert response.get_json()['sold'] == 1.0
+
+    assert client.post('/credits/consume', json={}, headers=headers).get_json()['sold'] == 0.0
+    assert client.post('/credits/consume', json={'amount': -1}, headers=headers).status_code == 400
+
+    assert db.session.get(User, user.id).sold == 0.0
+    assert _ledger(user.id) == [(-1.0, 1.0, 'consume', 'tache-1'), (-1.0, 0.0, 'consume', None)]
+
+
+def test_stripe_purchase_grants_through_ledger(app, monkeypatch):
+    from services.auth.stripe import create_order_and_update_user
+    from services.email.email_service import email_service
+
+    monkeypatch.setattr(email_service, 'send_welcome_email', lambda *args, **kwargs: True)
+    user, _ = make_user('credit_buyer', sold=1.0, total_sold=1.0)
+    session = {'id': 'cs_test_credits', 'payment_intent': 'pi_test', 'amount_total': 2999, 'currency': 'usd'}
+
+    assert create_order_and_update_user(session, user.id, 'standard', 'prod_test')
+    # Session Stripe rejouée : aucun crédit supplémentaire
+    assert create_order_and_update_user(session, user.id, 'standard', 'prod_test')
+
+    user = db.session.get(User, user.id)
+    assert (user.sold, user.total_sold, user.subscription_plan) == (6.0, 6.0, 'standard')
+    assert _ledger(user.id) == [(5.0, 6.0, 'purchase', 'cs_test_credits')]
+
+
+def test_payment_confirmations_grant_through_ledger(client):
+    from models.order_model import Order
+    from services.auth.stripe import update_user_subscription
+
+    user, headers = make_user('credit_confirmed', sold=1.0, total_sold=1.0)
+    user_id = user.id
+    db.session.add(Order(order_number=Order.generate_order_number(), user_id=user_id, subscription_plan='standard',
+                         amount=29.99, customer_email='client@example.com', stripe_session_id='cs_test_pending'))
+    db.session.commit()
+
+    response = client.post('/orders/update-status', json={'stripeSessionId': 'cs_test_pending'}, headers=headers)
+    assert response.status_code == 200
+    assert update_user_subscription(user_id, 'standard')
+
+    db.session.expunge_all()
+    user = db.session.get(User, user_id)
+    assert (user.sold, user.total_sold) == (11.0, 11.0)
+    assert _ledger(user_id) == [(5.0, 6.0, 'purchase', 'cs_test_pending'), (5.0, 11.0, 'purchase', None)]
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+from commands.rebuild_daily_activity import rebuild_daily_activity_command
+from models.activity_model import DailyActivity, UserDailyActivity
+from models.exts import db
+from models.tcf_exam_model import TCFExam
+from tests.conftest import make_exam, make_user
+
+
+def _snapshot():
+    db.session.expire_all()
+    daily = {(row.day, row.exams, row.new_users) for row in DailyActivity.query if row.exams or row.new_users}
+    per_user = {(row.user_id, row.day, row.exams) for row in UserDailyActivity.query if row.exams}
+    return daily, per_user
+
+
+def test_rollups_follow_writes_and_match_rebuild(app):
+    today = datetime.utcnow().date()
+    user, _ = make_user('activity_writer')
+    other, _ = make_user('activity_other')
+    for owner, days_ago in ((user, 0), (user, 0), (user, 3), (other, 3)):
+        make_exam(owner, days_ago=days_ago).save()
+
+    daily, per_user = _snapshot()
+    assert (today, 2, 2) in daily
+    assert (today - timedelta(days=3), 2, 0) in daily
+    assert per_user == {(user.id, today, 2), (user.id, today - timedelta(days=3), 1),
+                        (other.id, today - timedelta(days=3), 1)}
+
+    # Déplacement, suppression unitaire et suppression en masse
+    moved = TCFExam.query.filter_by(id_user=other.id).one()
+    moved.update({'date_passage': datetime.utcnow() - timedelta(days=1)})
+    TCFExam.query.filter_by(id_user=user.id).order_by(TCFExam.id).first().delete()
+    TCFExam.query.filter(TCFExam.id_user == user.id, TCFExam.date_passage < datetime.utcnow() - timedelta(days=2)).delete()
+    db.session.commit()
+    incremental = _snapshot()
+    assert incremental[1] == {(user.id, today, 1), (other.id, today - timedelta(days=1), 1)}
+
+    result = app.test_cli_runner().invoke(rebuild_daily_activity_command, ['--batch-size', '1'])
+    assert result.exit_code == 0, result.output
+    assert _snapshot() == incremental
+
+
+def test_charts_read_daily_rollups(app, client, admin_headers):
+    user, headers = make_user('activity_client')
+    for days_ago in (0, 1, 8):
+        make_exam(user, days_ago=days_ago).save()
+
+    response = client.get('/dashboard/chart/monthly', headers=headers)
+    assert sum(month['exams'] for month in response.get_json()) == 3
+    assert response.headers['X-Query-Count'] == '2'
+
+    weeks = client.get('/dashboard/chart/weekly', headers=headers).get_json()
+    assert len(weeks) == 12 and sum(week['exams'] for week in weeks) == 3
+    assert weeks[-1]['week'] == (datetime.utcnow().date() - timedelta(days=datetime.utcnow().weekday())).isoformat()
+
+    months = client.get('/dashboard/chart/monthly', headers=admin_headers).get_json()
+    assert len(months) == 12
+    assert sum(month['exams'] for month in months) == 3
+    # activity_client et admin_test créés aujourd'hui
+    assert sum(month['users'] for month in months) == 2
+
+
+def test_charts_ignore_future_dated_exams(client, admin_headers):
+    user, headers = make_user('future_client')
+    make_exam(user, days_ago=0).save()
+    make_exam(user, days_ago=-10).save()
+
+    for request_headers in (headers, admin_headers):
+        response = client.get('/dashboard/chart/weekly', headers=request_headers)
+        assert response.status_code == 200
+        assert sum(week['exams'] for week in response.get_json()) == 1
+
+
+def test_recent_activity_is_scoped_to_client(client, admin_headers):
+    user, headers = make_user('recent_client')
+    other, _ = make_user('recent_other')
+    mine = make_exam(user, days_ago=1)
+    mine.save()
+    theirs = make_exam(other, days_ago=0)
+    theirs.save()
+
+    response = client.get('/dashboard/activity/recent', headers=headers)
+    assert [item['id'] for item in response.get_json()] == [mine.id]
+
+    response = client.get('/dashboard/activity/recent', headers=admin_headers)
+    assert [item['id'] for item in response.get_json()][:2] == [theirs.id, mine.id]
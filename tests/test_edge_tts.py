@@ -2,14 +2,10 @@ import os
 import asyncio
 import time
 
-# Ajuster le chemin pour importer synthesis
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 BACKEND_DIR = os.path.dirname(CURRENT_DIR)
-SERVICES_DIR = os.path.join(BACKEND_DIR, 'services', 'exam')
-import sys
-sys.path.insert(0, SERVICES_DIR)
 
-from synthesis import synthesize_with_edgetts
+from services.exam.synthesis import synthesize_with_edgetts
 import edge_tts
 
 
@@ -0,0 +1,69 @@
+from sqlalchemy import event
+
+from models.exam_submission_model import ExamSubmission
+from models.exts import db
+from models.tcf_exam_model import TCFExam
+from models.tcf_model import TCFTask
+from models.user_stats_model import UserStats
+from tests.conftest import make_user
+
+
+def _payload(subject_id, task_ids):
+    return {'id_subject': subject_id, 'type_exam': 'écrit', 'exams': [
+        {'id_task': task_id, 'score': 'B2', 'reponse_utilisateur': 'Réponse', 'reponse_ia': 'Correction'}
+        for task_id in task_ids
+    ]}
+
+
+def test_batch_is_one_transaction_and_replays(client):
+    user, headers = make_user('batch_client')
+    user_id = user.id
+    task = TCFTask.query.first()
+    subject_id = task.subject_id
+    payload = _payload(subject_id, [task.id] * 3)
+    exams_before = TCFExam.query.filter_by(id_user=user_id).count()
+    commits = []
+
+    def count_commit(connection):
+        commits.append(connection)
+
+    event.listen(db.engine, 'commit', count_commit)
+    try:
+        response = client.post('/exam/exams/batch', json=payload, headers={**headers, 'Idempotency-Key': 'essai-1'})
+    finally:
+        event.remove(db.engine, 'commit', count_commit)
+    assert response.status_code == 201
+    exam_ids = response.get_json()['exam_ids']
+    assert len(exam_ids) == 3
+    # Soumission, examens et statistiques dérivées validés ensemble
+    assert len(commits) == 1
+    db.session.expunge_all()
+    assert db.session.get(UserStats, user_id).total_exams == exams_before + 3
+    assert TCFExam.query.get(exam_ids[0]).reponse_ia == 'Correction'
+
+    # Nouvel essai du client après un délai : mêmes examens, aucune ligne ajoutée
+    response = client.post('/exam/exams/batch', json={**payload, 'idempotency_key': 'essai-1'}, headers=headers)
+    assert response.status_code == 200
+    assert response.get_json() == {'message': 'Examens déjà enregistrés', 'exam_ids': exam_ids, 'replayed': True}
+    assert TCFExam.query.filter_by(id_user=user_id).count() == exams_before + 3
+    assert ExamSubmission.query.count() == 1
+
+    other_task = TCFTask.query.filter(TCFTask.subject_id != subject_id).first()
+    other_subject = _payload(other_task.subject_id, [other_task.id])
+    response = client.post('/exam/exams/batch', json=other_subject, headers={**headers, 'Idempotency-Key': 'essai-1'})
+    assert response.status_code == 409
+
+
+def test_batch_validates_payload(client):
+    _, headers = make_user('batch_invalid')
+    task = TCFTask.query.first()
+    assert client.post('/exam/exams/batch', json=_payload(task.subject_id, [task.id]), headers=headers).status_code == 400
+    keyed = {**headers, 'Idempotency-Key': 'essai-2'}
+    assert client.post('/exam/exams/batch', json=_payload(task.subject_id, []), headers=keyed).status_code == 400
+    assert client.post('/exam/exams/batch', json={'exams': [{'id_task': task.id}]}, headers=keyed).status_code == 400
+    # Sujet inconnu, ou tâche d'un autre sujet : refusés avant toute écriture
+    assert client.post('/exam/exams/batch', json=_payload(9999, [task.id]), headers=keyed).status_code == 404
+    other_task = TCFTask.query.filter(TCFTask.subject_id != task.subject_id).first()
+    response = client.post('/exam/exams/batch', json=_payload(task.subject_id, [task.id, other_task.id]), headers=keyed)
+    assert response.status_code == 400
+    assert ExamSubmission.query.count() == 0
@@ -0,0 +1,81 @@
+import sqlalchemy as sa
+
+from commands.compress_exam_texts import compress_exam_texts, compress_exam_texts_command, decompress_batch
+from models.exts import db
+from models.tcf_exam_model import COMPRESSED_TEXT_FIELDS, TCFExam
+from models.tcf_model import TCFTask
+from tests.conftest import make_user
+
+FEEDBACK = "### Correction\n\nVotre texte respecte la consigne. Attention aux accords du participe passé. " * 40
+
+
+def _row(exam_id):
+    columns = ', '.join(f'{name}, {name}_z' for name in COMPRESSED_TEXT_FIELDS)
+    return db.session.execute(sa.text(f'SELECT {columns} FROM tcf_exam WHERE id = :id'), {'id': exam_id}).one()
+
+
+def test_feedback_stored_compressed_with_same_api_and_json(client):
+    user, headers = make_user('exam_compressed')
+    task = TCFTask.query.first()
+    exam = TCFExam(id_user=user.id, id_subject=task.subject_id, id_task=task.id, score='C1',
+                   reponse_ia=FEEDBACK, points_fort='Lexique varié', point_faible=None)
+    exam.save()
+    exam_id = exam.id
+
+    reponse_ia, reponse_ia_z, *_ = _row(exam_id)
+    assert reponse_ia is None
+    assert len(reponse_ia_z) < len(FEEDBACK) / 10
+
+    detail = client.get(f'/exam/exams/{exam_id}', headers=headers).get_json()
+    assert detail['reponse_ia'] == FEEDBACK
+    assert detail['points_fort'] == 'Lexique varié'
+    assert detail['point_faible'] is None
+    assert detail['traduction_reponse_ia'] is None
+
+    TCFExam.query.get(exam_id).update({'traduction_reponse_ia': 'Translation'})
+    db.session.expunge_all()
+    assert TCFExam.query.get(exam_id).traduction_reponse_ia == 'Translation'
+
+
+def test_plain_rows_readable_then_compressed_in_batches(app):
+    user, _ = make_user('exam_plain')
+    task = TCFTask.query.first()
+    for _ in range(3):
+        # Ligne antérieure à la compression, écrite en clair hors ORM
+        db.session.execute(TCFExam.__table__.insert().values(
+            id_user=user.id, id_subject=task.subject_id, id_task=task.id, type_exam='écrit',
+            reponse_ia=FEEDBACK, points_fort='Plan clair'))
+    db.session.commit()
+    exam = TCFExam.query.filter_by(id_user=user.id).first()
+    assert exam.reponse_ia == FEEDBACK
+
+    result = app.test_cli_runner().invoke(compress_exam_texts_command, ['--batch-size', '2'])
+    assert result.exit_code == 0, result.output
+    assert '3 examens compressés' in result.output
+
+    reponse_ia, reponse_ia_z, *_ = _row(exam.id)
+    assert reponse_ia is None and reponse_ia_z is not None
+    db.session.expunge_all()
+    exam = TCFExam.query.get(exam.id)
+    assert (exam.reponse_ia, exam.points_fort) == (FEEDBACK, 'Plan clair')
+
+
+def test_mixed_plain_and_compressed_row_keeps_both(app):
+    user, _ = make_user('exam_mixed')
+    task = TCFTask.query.first()
+    exam = TCFExam(id_user=user.id, id_subject=task.subject_id, id_task=task.id, score='B2', reponse_ia=FEEDBACK)
+    exam.save()
+    exam_id = exam.id
+    # Champ modifié en clair par un ancien worker pendant le déploiement
+    db.session.execute(sa.text("UPDATE tcf_exam SET point_faible = 'Accords' WHERE id = :id"), {'id': exam_id})
+    db.session.commit()
+
+    compress_exam_texts(db.engine)
+    db.session.expunge_all()
+    exam = TCFExam.query.get(exam_id)
+    assert (exam.reponse_ia, exam.point_faible) == (FEEDBACK, 'Accords')
+
+    with db.engine.begin() as connection:
+        decompress_batch(connection, 0, 100)
+    reponse_ia, reponse_ia_z, *_ = _row(exam_id)
+    assert (reponse_ia, reponse_ia_z) == (FEEDBACK, None)
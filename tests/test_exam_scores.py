@@ -0,0 +1,73 @@
+from sqlalchemy import text
+
+from commands.backfill_scores import backfill_exam_scores
+from models.exts import db
+from models.tcf_exam_model import TCFExam, normalized_score
+from models.tcf_model import TCFTask
+from tests.conftest import make_exam, make_user
+
+
+def test_score_is_normalized_on_insert_and_update(app):
+    assert normalized_score('Niveau C1') == (85, 'C1')
+    assert normalized_score('14') == (14.0, None)
+    assert normalized_score('') == (None, None)
+
+    user, _ = make_user('scores_client')
+    exam = make_exam(user, 'niveau b2')
+    exam.save()
+    assert (exam.score_numeric, exam.cefr_level) == (75, 'B2')
+
+    exam.update({'score': 'Non évalué'})
+    row = db.session.execute(text("SELECT score_numeric, cefr_level FROM tcf_exam WHERE id = :id"), {'id': exam.id}).one()
+    assert tuple(row) == (50, None)
+
+
+def test_numeric_json_scores_are_accepted(client):
+    _, headers = make_user('numeric_client')
+    task = TCFTask.query.first()
+    exam = {'id_subject': task.subject_id, 'id_task': task.id, 'score': 14}
+
+    response = client.post('/exam/exams/user', json={**exam, 'id_user': 'numeric_client'}, headers=headers)
+    assert response.status_code == 201
+    saved = TCFExam.query.order_by(TCFExam.id.desc()).first()
+    assert (saved.score, saved.score_numeric) == ('14', 14.0)
+
+    response = client.post('/exam/exams/batch', headers={**headers, 'Idempotency-Key': 'numerique'},
+                           json={'id_subject': task.subject_id, 'type_exam': 'écrit',
+                                 'exams': [{'id_task': task.id, 'score': 12.5}]})
+    assert response.status_code == 201
+    saved = TCFExam.query.get(response.get_json()['exam_ids'][0])
+    assert (saved.score, saved.score_numeric, saved.cefr_level) == ('12.5', 12.5, None)
+
+def test_backfill_normalizes_legacy_rows_in_batches(app):
+    user, _ = make_user('legacy_client')
+    db.session.add_all([make_exam(user, score) for score in ('C2', 'B1', '12.5', None)])
+    db.session.commit()
+    # Lignes écrites avant les colonnes normalisées
+    db.session.execute(text("UPDATE tcf_exam SET score_numeric = NULL, cefr_level = NULL"))
+    db.session.commit()
+
+    assert backfill_exam_scores(db.engine, batch_size=2) == 3
+    rows = db.session.execute(text("SELECT score, score_numeric, cefr_level FROM tcf_exam ORDER BY id")).all()
+    assert [tuple(row) for row in rows] == [('C2', 95, 'C2'), ('B1', 65, 'B1'), ('12.5', 12.5, None), (None, None, None)]
+    assert backfill_exam_scores(db.engine) == 0
+
+
+def test_client_stats_are_aggregated_in_sql(app, client):
+    user, headers = make_user('stats_client')
+    db.session.add_all([
+        make_exam(user, 'Niveau C1'), make_exam(user, 'A2', days_ago=3),
+        make_exam(user, None, days_ago=20), make_exam(user, 'B2', days_ago=45),
+    ])
+    db.session.commit()
+
+    stats = client.get('/dashboard/stats', headers=headers).get_json()
+    assert stats['total_exams'] == 4
+    assert stats['average_score'] == round((85 + 55 + 75) / 3, 1)
+    assert stats['best_score'] == 85
+    assert stats['weekly_exams'] == 2
+    assert stats['monthly_progress'] == 3 - 1
+
+    _, empty_headers = make_user('new_client')
+    stats = client.get('/dashboard/stats', headers=empty_headers).get_json()
+    assert (stats['total_exams'], stats['average_score'], stats['best_score'], stats['monthly_progress']) == (0, 0, 0, 0)
@@ -0,0 +1,49 @@
+from sqlalchemy import inspect
+
+from models.exts import db
+from models.tcf_exam_model import TCFExam
+from tests.conftest import make_exam, make_user
+
+
+def _saved_exam(user):
+    exam = make_exam(user, reponse_utilisateur='Ma réponse ' * 500, reponse_ia='Correction ' * 500,
+                     points_fort='Structure', point_faible='Accords')
+    exam.save()
+    return exam
+
+
+def test_exam_lists_skip_texts_unless_included(client):
+    user, headers = make_user('exam_texts')
+    exam_id = _saved_exam(user).id
+    db.session.expunge_all()
+
+    listed = client.get('/exam/exams/user', headers=headers).get_json()
+    assert listed[0]['id'] == exam_id
+    assert listed[0]['score'] == 'B2'
+    assert not set(TCFExam.TEXT_FIELDS) & set(listed[0])
+
+    response = client.get('/exam/exams/user?include=texts', headers=headers)
+    assert response.get_json()[0]['points_fort'] == 'Structure'
+    # Textes lus dans la requête de la liste, pas un chargement par examen (utilisateur en cache)
+    assert response.headers['X-Query-Count'] == '1'
+    assert client.get('/exam/exams/user?include=score', headers=headers).status_code == 400
+
+    detail = client.get(f'/exam/exams/{exam_id}', headers=headers).get_json()
+    assert detail['reponse_ia'].startswith('Correction')
+
+
+def test_text_columns_are_deferred(app):
+    user, _ = make_user('exam_deferred')
+    exam_id = _saved_exam(user).id
+    db.session.expunge_all()
+    text_keys = {prop.key for prop in inspect(TCFExam).column_attrs if prop.group == 'texts'}
+    assert len(text_keys) == 9
+
+    exam = TCFExam.query.get(exam_id)
+    assert text_keys <= inspect(exam).unloaded
+    assert exam.point_faible == 'Accords'
+    # Le groupe entier est chargé au premier accès
+    assert not text_keys & inspect(exam).unloaded
+
+    exam = TCFExam.query.options(TCFExam.with_texts()).filter_by(id=exam_id).one()
+    assert not text_keys & inspect(exam).unloaded
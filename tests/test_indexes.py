@@ -0,0 +1,85 @@
+import importlib.util
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import and_, or_, text
+
+from models.exts import db
+from models.model import User
+from models.order_model import Order
+from models.tcf_exam_model import TCFExam
+
+VERSIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations', 'versions')
+# Migrations qui créent les index déclarés dans les __table_args__ des modèles
+INDEX_MIGRATIONS = ('3f2a9c1d8e47_add_hot_lookup_indexes.py', '5c1e7a9b2d30_add_exam_normalized_scores.py',
+                    'd3a7e1c9f508_add_user_date_create_index.py')
+
+
+def query_plan(query):
+    """Plan SQLite (EXPLAIN QUERY PLAN) d'une requête ORM"""
+    sql = query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    return ' | '.join(row[-1] for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+
+MONTH_AGO = datetime(2024, 8, 1)
+
+
+@pytest.mark.parametrize('name, build_query, index', [
+    # Dashboard client: examens et crédits du mois
+    # Sans tri ni filtre de date, les deux index commençant par id_user conviennent
+    ('client_exams', lambda: TCFExam.query.filter_by(id_user=1), ('ix_tcf_exam_user_date', 'ix_tcf_exam_user_score')),
+    ('monthly_credits', lambda: TCFExam.query.filter(
+        TCFExam.id_user == 1, TCFExam.date_passage >= MONTH_AGO), 'ix_tcf_exam_user_date'),
+    ('exams_by_subject', lambda: TCFExam.query.filter_by(id_subject=1), 'ix_tcf_exam_subject_date'),
+    ('admin_chart', lambda: TCFExam.query.filter(TCFExam.date_passage >= MONTH_AGO), 'ix_tcf_exam_date_passage'),
+    ('client_scores', lambda: db.session.query(
+        db.func.avg(TCFExam.score_numeric), db.func.max(TCFExam.score_numeric)).filter(TCFExam.id_user == 1),
+        'ix_tcf_exam_user_score'),
+    # Connexion par email et réinitialisation du mot de passe
+    ('login_email', lambda: User.query.filter_by(email='a@example.com'), 'ix_user_email'),
+    ('reset_token', lambda: User.query.filter_by(reset_token='abc'), 'ix_user_reset_token'),
+    ('active_users', lambda: User.query.filter_by(payment_status='active'), 'ix_user_payment_status'),
+    ('moderator_users', lambda: User.query.filter(or_(
+        User.username == 'mod', and_(User.role == 'client', User.created_by == 'mod'))), 'ix_user_created_by_role'),
+    # Webhook Stripe et administration des commandes
+    ('stripe_webhook', lambda: Order.query.filter_by(stripe_session_id='cs_test'), 'ix_orders_stripe_session_id'),
+    ('order_stats', lambda: Order.query.filter(
+        Order.status == 'paid', Order.created_at >= MONTH_AGO), 'ix_orders_status_created'),
+    ('client_orders', lambda: Order.query.filter_by(user_id=1).order_by(Order.created_at.desc()), 'ix_orders_user_created'),
+    ('admin_orders', lambda: Order.query.order_by(Order.created_at.desc()), 'ix_orders_created_at'),
+    # Pages suivantes des listes paginées par curseur (date, id)
+    ('users_page', lambda: User.query.filter(or_(
+        and_(User.date_create <= MONTH_AGO, or_(User.date_create < MONTH_AGO, User.id < 100)),
+        User.date_create.is_(None),
+    )).order_by(User.date_create.desc(), User.id.desc()), 'ix_user_date_create'),
+    ('exams_page', lambda: TCFExam.query.filter(
+        TCFExam.date_passage <= MONTH_AGO, or_(TCFExam.date_passage < MONTH_AGO, TCFExam.id < 100),
+    ).order_by(TCFExam.date_passage.desc(), TCFExam.id.desc()), 'ix_tcf_exam_date_passage'),
+])
+def test_hot_queries_use_indexes(app, name, build_query, index):
+    plan = query_plan(build_query())
+    accepted = index if isinstance(index, tuple) else (index,)
+    assert any(candidate in plan for candidate in accepted), f"{name}: {plan}"
+
+
+def _migration_indexes(filename):
+    spec = importlib.util.spec_from_file_location(filename[:-3], os.path.join(VERSIONS, filename))
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    return migration.INDEXES
+
+
+def test_migration_matches_model_indexes(app):
+    migrated = {
+        (table, name, tuple(columns))
+        for filename in INDEX_MIGRATIONS
+        for table, name, columns in _migration_indexes(filename)
+    }
+
+    declared = {
+        (table.name, index.name, tuple(column.name for column in index.columns))
+        for table in (User.__table__, Order.__table__, TCFExam.__table__)
+        for index in table.indexes
+    }
+    assert migrated == declared
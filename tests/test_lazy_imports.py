@@ -0,0 +1,47 @@
+import subprocess
+import sys
+
+from services.lazy_imports import LazyModule, lazy_import
+from commands.import_report import parse_importtime
+
+
+def test_lazy_module_loads_on_first_attribute_access():
+    loaded = []
+    module = LazyModule('colorsys')
+    module._add_on_load(loaded.append)
+
+    assert not module.is_loaded
+    assert module.rgb_to_hsv(0, 0, 0) == (0.0, 0.0, 0.0)
+    assert module.is_loaded
+    assert [m.__name__ for m in loaded] == ['colorsys']
+
+
+def test_lazy_import_returns_shared_proxy():
+    assert lazy_import('stripe') is lazy_import('stripe')
+
+
+def test_app_import_does_not_load_heavy_modules(app):
+    code = (
+        "import sys, app\n"
+        "heavy = ('edge_tts', 'aiohttp', 'stripe', 'bs4', 'markdown')\n"
+        "print('heavy=' + ','.join(name for name in heavy if name in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=app.root_path,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # stdout contient aussi les logs de démarrage de l'application
+    assert 'heavy=' in result.stdout.splitlines()
+
+
+def test_parse_importtime_aggregates_by_top_level_package():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       500 |        500 |   stripe._api",
+        "import time:      1500 |       2000 | stripe",
+        "import time:       250 |        250 | json",
+    ])
+    assert parse_importtime(stderr) == {'stripe': 2.0, 'json': 0.25}
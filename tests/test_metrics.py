@@ -0,0 +1,53 @@
+from services.monitoring import metrics
+from services.monitoring.metrics import DB_QUERIES, REQUEST_DURATION, UPSTREAM_DURATION, Histogram
+
+
+def test_histogram_renders_prometheus_text():
+    histogram = Histogram('demo_seconds', "Démo", ('route',), (0.1, 1))
+    histogram.observe(0.05, route='a"b')
+    histogram.observe(0.5, route='a"b')
+
+    text = histogram.render()
+    assert '# TYPE demo_seconds histogram' in text
+    assert 'demo_seconds_bucket{route="a\\"b",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{route="a\\"b",le="1"} 2' in text
+    assert 'demo_seconds_bucket{route="a\\"b",le="+Inf"} 2' in text
+    assert 'demo_seconds_count{route="a\\"b"} 2' in text
+
+
+def test_requests_are_recorded_by_namespace_and_route(client):
+    labels = {'namespace': 'tcf', 'route': 'subjects', 'method': 'GET'}
+    before = (REQUEST_DURATION.series(**labels) or {'count': 0})['count']
+
+    assert client.get('/tcf/subjects').status_code == 200
+
+    assert REQUEST_DURATION.series(**labels)['count'] == before + 1
+    db_queries = DB_QUERIES.series(**labels)
+    assert db_queries['sum'] >= 1
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert 'tcf_request_duration_seconds_count{namespace="tcf",route="subjects",method="GET"}' in response.get_data(as_text=True)
+
+
+def test_upstream_time_is_attributed_to_the_request(app, client, monkeypatch):
+    class FakeResponse:
+        status_code = 200
+
+        def json(self):
+            return {'translated': True}
+
+    monkeypatch.setattr('services.proxy.upstream.requests.post', lambda url, **kwargs: FakeResponse())
+
+    response = client.post('/proxy-translation/translation', json={'targetLanguage': 'en'})
+    assert response.status_code == 200
+
+    series = UPSTREAM_DURATION.series(namespace='proxy-translation', route='translation', method='POST', upstream='n8n')
+    assert series['count'] >= 1
+
+
+def test_metrics_token(app, client):
+    app.config['METRICS_TOKEN'] = 'secret'
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
+    assert metrics.render_metrics().startswith('# HELP')
@@ -0,0 +1,55 @@
+import threading
+
+from models.exts import db
+from models.order_model import Order, OrderNumberAllocator, OrderNumberCounter
+from tests.conftest import make_user
+
+
+def _order(user_id, **fields):
+    return Order(user_id=user_id, subscription_plan='standard', amount=10.0,
+                 customer_email='client@example.com', **fields)
+
+
+def test_counter_starts_after_existing_orders(app):
+    user, _ = make_user('client_orders')
+    db.session.add(_order(user.id, order_number='Ordre#0004999'))
+    db.session.commit()
+
+    assert Order.generate_order_number() == 'Ordre#0005000'
+    assert Order.generate_order_number() == 'Ordre#0005001'
+
+
+def test_blocks_are_reserved_once_per_worker(app):
+    allocator = OrderNumberAllocator(db.engine, block_size=10)
+    numbers = [allocator.allocate() for _ in range(25)]
+    assert numbers == list(range(1000, 1025))
+    # 3 blocs réservés : le compteur est au début du bloc suivant
+    assert db.session.get(OrderNumberCounter, 'orders').next_value == 1030
+
+    # Un second worker reçoit le bloc suivant, sans chevauchement
+    other = OrderNumberAllocator(db.engine, block_size=10)
+    assert other.allocate() == 1030
+    # Une réservation en lot est consécutive et ne consomme pas le bloc courant
+    assert allocator.allocate(100) == 1040
+    assert allocator.allocate() == 1025
+
+
+def test_concurrent_allocations_are_unique(app):
+    workers = [OrderNumberAllocator(db.engine, block_size=block) for block in (1, 1, 5, 7)]
+    allocated, errors = [], []
+
+    def checkout(allocator):
+        try:
+            for _ in range(50):
+                allocated.append(allocator.allocate())
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=checkout, args=(worker,)) for worker in workers for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(allocated) == len(set(allocated)) == 400
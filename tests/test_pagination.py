@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+from models.exts import db
+from models.model import User
+from models.order_model import Order
+from models.tcf_exam_model import TCFExam
+from models.tcf_model import TCFTask
+from services.listing import decode_cursor, encode_cursor
+from tests.conftest import make_user
+
+DAY = datetime(2024, 9, 1, 12, 0)
+
+
+def _walk(client, url, headers):
+    """Ids de toutes les pages de `url`, en suivant X-Next-Cursor"""
+    ids, cursor = [], ''
+    while True:
+        response = client.get(f'{url}&cursor={cursor}', headers=headers)
+        assert response.status_code == 200
+        ids.extend(item['id'] for item in response.get_json())
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return ids
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(DAY, 42)) == (DAY, 42)
+    assert decode_cursor(encode_cursor('2024-09-01', 7)) == ('2024-09-01', 7)
+    assert decode_cursor(encode_cursor(None, 3)) == (None, 3)
+
+
+def test_exam_pages_follow_date_then_id(client):
+    user, headers = make_user('exam_pages')
+    task = TCFTask.query.first()
+    # Dates identiques : l'id départage les examens d'une page à l'autre
+    exams = [TCFExam(id_user=user.id, id_subject=task.subject_id, id_task=task.id, score='B1',
+                     date_passage=DAY - timedelta(days=index // 3)) for index in range(7)]
+    db.session.add_all(exams)
+    db.session.commit()
+    expected = [exam.id for exam in sorted(exams, key=lambda exam: (exam.date_passage, exam.id), reverse=True)]
+
+    assert _walk(client, '/exam/exams/user?limit=2', headers) == expected
+    assert client.get('/exam/exams/user', headers=headers).headers.get('X-Next-Cursor') is None
+
+    response = client.get('/exam/exams/user?limit=3&total=1', headers=headers)
+    assert len(response.get_json()) == 3
+    assert (response.headers['X-Total-Count'], response.headers['X-Total-Exact']) == ('7', 'true')
+    assert client.get('/exam/exams/user?cursor=abc', headers=headers).status_code == 400
+    assert client.get('/exam/exams/user?limit=0', headers=headers).status_code == 400
+
+
+def test_user_pages_include_missing_dates(client, admin_headers):
+    created = [make_user(username, date_create=date_create)[0].id for username, date_create in (
+        ('page_recent', DAY + timedelta(days=30)), ('page_old', DAY), ('page_unknown', DAY))]
+    # Comptes importés sans date de création
+    User.query.filter_by(id=created[-1]).update({'date_create': None})
+    db.session.commit()
+    db.session.expunge_all()
+
+    ids = _walk(client, '/auth/users?limit=1', admin_headers)
+    assert sorted(ids) == sorted(user['id'] for user in client.get('/auth/users', headers=admin_headers).get_json())
+    # Dates NULL après les autres, sans doublon ni oubli d'une page à l'autre
+    assert [user_id for user_id in ids if user_id in created] == created
+
+
+def test_order_pages_skip_offset_and_count(client, admin_headers):
+    user, headers = make_user('order_pages')
+    for days_ago in range(5):
+        db.session.add(Order(order_number=Order.generate_order_number(), user_id=user.id,
+                             subscription_plan='standard', amount=10, customer_email='client@example.com',
+                             created_at=DAY - timedelta(days=days_ago)))
+    db.session.commit()
+
+    response = client.get('/orders/my-orders?limit=2&cursor=', headers=headers)
+    body = response.get_json()
+    assert [order['createdAt'][:10] for order in body['orders']] == ['2024-09-01', '2024-08-31']
+    assert body['pagination']['nextCursor'] == response.headers['X-Next-Cursor']
+
+    response = client.get(f"/order-admin/orders?limit=4&cursor={body['pagination']['nextCursor']}",
+                          headers=admin_headers)
+    assert [order['createdAt'][:10] for order in response.get_json()['orders']] == ['2024-08-30', '2024-08-29',
+                                                                                    '2024-08-28']
+    assert response.get_json()['pagination']['nextCursor'] is None
+    # Pagination par page conservée
+    assert client.get('/orders/my-orders?page=1', headers=headers).get_json()['pagination']['total'] == 5
@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import exc
+
+from config import TestConfig, database_engine_options
+from services.monitoring.pool import InstrumentedQueuePool, pool_status
+
+
+def test_engine_options_only_tune_server_databases(monkeypatch):
+    assert database_engine_options('sqlite:///dev.db') == {}
+
+    monkeypatch.setenv('DB_POOL_SIZE', '3')
+    monkeypatch.setenv('DB_STATEMENT_TIMEOUT', '12.5')
+    options = database_engine_options('mysql+pymysql://u:p@db/tcf')
+    assert options['pool_size'] == 3
+    assert options['pool_pre_ping'] is True
+    assert options['pool_recycle'] == 280
+    assert options['connect_args'] == {'init_command': 'SET SESSION max_statement_time=12.5'}
+
+
+def test_instrumented_pool_records_waits_and_timeouts(tmp_path):
+    from app import create_app
+    from models.exts import db
+
+    class Config(TestConfig):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + str(tmp_path / "pool.db")
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            'poolclass': InstrumentedQueuePool,
+            'pool_size': 1,
+            'max_overflow': 0,
+            'pool_timeout': 1,
+        }
+
+    app = create_app(Config)
+    with app.app_context():
+        engine = db.engine
+        held = engine.connect()
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        held.close()
+        engine.connect().close()
+
+        status = pool_status(engine)
+
+    assert status['poolClass'] == 'InstrumentedQueuePool'
+    assert status['checkedOut'] == 0
+    assert status['telemetry']['checkouts'] == 2
+    assert status['telemetry']['timeouts'] == 1
+    assert status['telemetry']['waitMaxMs'] >= 1000
+
+
+def test_pool_endpoint_requires_admin(client, admin_headers):
+    from tests.conftest import make_user
+
+    _, client_headers = make_user('client_test')
+    assert client.get('/monitoring/pool', headers=client_headers).status_code == 403
+
+    response = client.get('/monitoring/pool', headers=admin_headers)
+    assert response.status_code == 200
+    assert 'default' in response.get_json()['engines']
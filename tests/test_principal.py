@@ -0,0 +1,53 @@
+from flask_jwt_extended import decode_token
+from werkzeug.security import generate_password_hash
+
+from models.exts import db
+from models.model import User
+from tests.conftest import make_user
+
+
+def test_login_token_carries_principal_claims(client):
+    user, _ = make_user('claims_client', password=generate_password_hash('secret'), created_by='moderateur')
+    user_id = user.id
+    response = client.post('/auth/login', json={'username': 'claims_client', 'password': 'secret'})
+    claims = decode_token(response.get_json()['access_token'])
+    assert (claims['sub'], claims['uid'], claims['role'], claims['created_by']) == (
+        'claims_client', user_id, 'client', 'moderateur')
+
+
+def test_cached_principal_needs_no_user_query(client):
+    _, headers = make_user('cached_client', subscription_plan='standard')
+    response = client.get('/auth/MyPlan', headers=headers)
+    assert response.get_json() == {'subscription_plan': 'standard'}
+    assert response.headers['X-Query-Count'] == '1'
+
+    response = client.get('/auth/MyPlan', headers=headers)
+    assert response.get_json() == {'subscription_plan': 'standard'}
+    assert response.headers['X-Query-Count'] == '0'
+
+
+def test_role_and_plan_changes_invalidate_cache(client):
+    user, headers = make_user('promoted_client', subscription_plan='standard')
+    assert client.get('/order-admin/orders', headers=headers).status_code == 403
+
+    # Modification par l'ORM : entrée du cache invalidée après le commit
+    user.role = 'admin'
+    db.session.commit()
+    assert client.get('/order-admin/orders', headers=headers).status_code == 200
+
+    response = client.put('/auth/signup', json={'username': 'promoted_client', 'plan': 'pro'})
+    assert response.status_code == 200
+    assert client.get('/auth/MyPlan', headers=headers).get_json() == {'subscription_plan': 'pro'}
+
+
+def test_deleted_then_recreated_username_rejects_old_token(client):
+    user, headers = make_user('recreated_client')
+    make_user('other_client')
+    assert client.get('/auth/MyPlan', headers=headers).status_code == 200
+    db.session.delete(user)
+    db.session.commit()
+    make_user('recreated_client')
+
+    # Ancien jeton : même username, mais l'id du jeton ne correspond plus
+    assert client.get('/auth/MyPlan', headers=headers).status_code == 404
+    assert db.session.query(User).filter_by(username='recreated_client').count() == 1
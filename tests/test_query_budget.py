@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+from services.monitoring.query_budget import query_budget, statement_shape
+
+
+def test_statement_shape_ignores_literals_and_in_list_size():
+    a = statement_shape("SELECT * FROM user WHERE id = 12 AND name = 'bob'")
+    b = statement_shape("SELECT *  FROM user\nWHERE id = 7 AND name = 'alice'")
+    assert a == b == "SELECT * FROM user WHERE id = ? AND name = ?"
+    assert statement_shape("SELECT 1 FROM t WHERE id IN (?, ?, ?)") == statement_shape("SELECT 1 FROM t WHERE id IN (?)")
+
+
+def _register_probe_routes(app):
+    from models.tcf_model import TCFSubject
+
+    @query_budget(max_queries=2)
+    def with_budget():
+        for subject_id in range(6):
+            TCFSubject.query.get(subject_id)
+        return 'ok'
+
+    def without_budget():
+        for subject_id in range(6):
+            TCFSubject.query.get(subject_id)
+        return 'ok'
+
+    app.add_url_rule('/_probe/budget', 'probe_budget', with_budget)
+    app.add_url_rule('/_probe/no-budget', 'probe_no_budget', without_budget)
+
+
+def test_declared_budget_fails_request_in_raise_mode(app, client):
+    _register_probe_routes(app)
+
+    response = client.get('/_probe/budget')
+    assert response.status_code == 500
+    body = response.get_json()
+    assert body['error'] == 'Budget de requêtes SQL dépassé'
+    assert body['repeated'][0]['count'] == 6
+
+
+def test_undeclared_n_plus_one_is_only_reported(app, client):
+    _register_probe_routes(app)
+
+    response = client.get('/_probe/no-budget')
+    assert response.status_code == 200
+    assert response.headers['X-Query-Repeats'] == '6'
+
+
+def test_active_packs_load_features_in_batch(client):
+    response = client.get('/subscription-packs/packs/active')
+    assert response.status_code == 200
+    assert len(response.get_json()) == 3
+    assert response.headers['X-Query-Count'] == '2'
+
+
+def test_exam_listings_stay_within_budget(app, client, admin_headers):
+    from models.exts import db
+    from models.model import User
+    from models.tcf_exam_model import TCFExam
+    from models.tcf_model import TCFTask
+
+    admin = User.query.filter_by(username='admin_test').first()
+    task = TCFTask.query.first()
+    now = datetime.utcnow()
+    for day in range(8):
+        db.session.add(TCFExam(
+            id_user=admin.id, id_subject=task.subject_id, id_task=task.id,
+            score='B2', date_passage=now - timedelta(days=day),
+        ))
+    db.session.commit()
+
+    response = client.get('/dashboard/activity/recent', headers=admin_headers)
+    assert response.status_code == 200
+    assert len(response.get_json()) == 5
+
+    response = client.get(f'/exam/exams/subject/{task.subject_id}', headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers['X-Query-Count'] == '1'
@@ -0,0 +1,87 @@
+import pytest
+
+from config import TestConfig
+from models.routing import LAST_WRITE_COOKIE
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    """Application avec un réplica SQLite séparé (non répliqué: simule un réplica en retard)"""
+    from app import create_app
+    from commands.bootstrap import bootstrap_database
+    from models.exts import db
+    from models.tcf_model import TCFSubject
+
+    class Config(TestConfig):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + str(tmp_path / "primary.db")
+        DATABASE_REPLICA_URLS = "sqlite:///" + str(tmp_path / "replica.db")
+
+    app = create_app(Config)
+    with app.app_context():
+        bootstrap_database()
+        replica = db.engines['replica_0']
+        db.metadatas[None].create_all(bind=replica)
+        with replica.begin() as connection:
+            connection.execute(TCFSubject.__table__.insert().values(
+                name='Sujet du réplica', date='2024-01-01', duration=60, subject_type='Écrit'
+            ))
+    # Chaque requête de test a ainsi son propre contexte (g, session), comme en production
+    yield app
+
+
+def _subject(name):
+    return {'name': name, 'date': '2024-01-02', 'duration': 60, 'subject_type': 'Écrit'}
+
+
+def _subject_names(response):
+    assert response.status_code == 200
+    return {subject['name'] for subject in response.get_json()}
+
+
+def test_read_only_resources_use_replica(replica_app):
+    client = replica_app.test_client()
+    assert _subject_names(client.get('/tcf/subjects')) == {'Sujet du réplica'}
+
+
+def test_writes_and_unmarked_reads_stay_on_primary(replica_app):
+    from models.tcf_model import TCFSubject
+
+    client = replica_app.test_client()
+    response = client.post('/tcf/subjects', json=_subject('Nouveau sujet'))
+    assert response.status_code == 201
+    with replica_app.app_context():
+        assert TCFSubject.query.filter_by(name='Nouveau sujet').count() == 1
+
+
+def test_read_your_writes_with_cookie(replica_app):
+    client = replica_app.test_client()
+    client.post('/tcf/subjects', json=_subject('Sujet écrit'))
+
+    # Le cookie posé après l'écriture renvoie les lectures sur la principale
+    assert 'Sujet écrit' in _subject_names(client.get('/tcf/subjects'))
+    # Un autre client continue de lire le réplica
+    assert 'Sujet écrit' not in _subject_names(replica_app.test_client().get('/tcf/subjects'))
+
+
+def test_read_your_writes_by_identity(replica_app):
+    from tests.conftest import make_user
+
+    with replica_app.app_context():
+        _, writer_headers = make_user('replica_writer')
+        _, reader_headers = make_user('replica_reader')
+    client = replica_app.test_client(use_cookies=False)
+
+    client.post('/tcf/subjects', json=_subject('Sujet du rédacteur'), headers=writer_headers)
+
+    assert 'Sujet du rédacteur' in _subject_names(client.get('/tcf/subjects', headers=writer_headers))
+    assert _subject_names(client.get('/tcf/subjects', headers=reader_headers)) == {'Sujet du réplica'}
+
+
+def test_without_replica_reads_use_primary(client):
+    assert 'Sujet du réplica' not in _subject_names(client.get('/tcf/subjects'))
+
+
+def test_without_replica_writes_set_no_cookie(client):
+    response = client.post('/tcf/subjects', json=_subject('Sujet sans réplica'))
+    assert response.status_code == 201
+    assert LAST_WRITE_COOKIE not in response.headers.get('Set-Cookie', '')
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+from commands.rebuild_revenue import rebuild_revenue_command
+from models.exts import db
+from models.order_model import Order
+from models.revenue_model import RevenueDaily
+from tests.conftest import make_user
+
+
+def _order(user, plan, amount, status='pending', days_ago=0):
+    return Order(order_number=Order.generate_order_number(), user_id=user.id, subscription_plan=plan,
+                 amount=amount, status=status, customer_email='client@example.com',
+                 created_at=datetime.utcnow() - timedelta(days=days_ago))
+
+
+def _snapshot():
+    db.session.expire_all()
+    return {(row.day, row.subscription_plan, row.status, row.currency, row.orders, round(row.amount, 2))
+            for row in RevenueDaily.query if row.orders}
+
+
+def test_rollup_follows_status_changes_and_matches_rebuild(app):
+    today = datetime.utcnow().date()
+    user, _ = make_user('revenue_client')
+    pending = _order(user, 'pro', 79.99)
+    paid = _order(user, 'standard', 29.99, status='paid', days_ago=2)
+    cancelled = _order(user, 'standard', 29.99, status='paid', days_ago=2)
+    for order in (pending, paid, cancelled):
+        order.save()
+
+    pending.update_status('paid')
+    success, _ = cancelled.cancel_order(user.id)
+    assert success
+    doomed = _order(user, 'pro', 10.0)
+    doomed.save()
+    db.session.delete(doomed)
+    db.session.commit()
+
+    incremental = _snapshot()
+    assert incremental == {
+        (today, 'pro', 'paid', 'USD', 1, 79.99),
+        (today - timedelta(days=2), 'standard', 'paid', 'USD', 1, 29.99),
+        (today - timedelta(days=2), 'standard', 'cancelled', 'USD', 1, 29.99),
+    }
+
+    result = app.test_cli_runner().invoke(rebuild_revenue_command)
+    assert result.exit_code == 0, result.output
+    assert _snapshot() == incremental
+
+
+def test_stats_endpoint_reads_rollup(client, admin_headers):
+    user, _ = make_user('revenue_stats')
+    for plan, amount, status, days_ago in (('pro', 79.99, 'paid', 0), ('standard', 29.99, 'paid', 1),
+                                           ('standard', 29.99, 'refunded', 1), ('pro', 79.99, 'pending', 40)):
+        _order(user, plan, amount, status, days_ago).save()
+
+    response = client.get('/order-admin/stats', headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers['X-Query-Count'] == '2'
+    stats = response.get_json()
+    assert stats['totalRevenue'] == 109.98
+    assert stats['totalOrders'] == 2
+    assert stats['planStats'] == {'pro': {'count': 1, 'revenue': 79.99},
+                                  'standard': {'count': 1, 'revenue': 29.99}}
+    assert stats['statusStats'] == {'pending': 1, 'paid': 2, 'failed': 0, 'cancelled': 0, 'refunded': 1}
+    assert len(stats['monthlyStats']) == 12
+    assert stats['monthlyStats'][-1]['month'] == datetime.utcnow().strftime('%Y-%m')
+    assert sum(month['orders'] for month in stats['monthlyStats']) == 2
+
+    # Bornes au jour près
+    today = datetime.utcnow().date().isoformat()
+    stats = client.get(f'/order-admin/stats?startDate={today}&endDate={today}', headers=admin_headers).get_json()
+    assert stats['totalOrders'] == 1
+    assert stats['statusStats']['refunded'] == 0
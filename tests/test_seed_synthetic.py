@@ -0,0 +1,52 @@
+from sqlalchemy import func, text
+
+from commands.seed_synthetic import SyntheticSeeder, seed_synthetic_command
+from models.exts import db
+from models.model import User
+from models.order_model import Order
+from models.tcf_attempt_model import TCFAttempt
+from models.tcf_exam_model import TCFExam
+from models.tcf_model import TCFTask
+
+
+def test_seeder_inserts_consistent_rows(app):
+    users_before = User.query.count()
+    counts = SyntheticSeeder(seed=1, batch_size=50).run(users=30, subjects=5, exams=400, orders=60)
+
+    assert counts['user'] == 30 and counts['tcf_exam'] == 400 and counts['orders'] == 60
+    assert User.query.count() == users_before + 30
+    # Les tentatives résument exactement les examens générés
+    assert db.session.query(func.sum(TCFAttempt.attempt_count)).scalar() == 400
+    # Chaque examen référence une tâche de son sujet
+    mismatched = TCFExam.query.join(TCFTask, TCFExam.id_task == TCFTask.id).filter(
+        TCFTask.subject_id != TCFExam.id_subject).count()
+    assert mismatched == 0
+    # Activité asymétrique: l'utilisateur le plus actif dépasse largement la moyenne
+    top = db.session.query(func.count(TCFExam.id)).group_by(TCFExam.id_user).order_by(func.count(TCFExam.id).desc()).first()[0]
+    assert top > 400 / 30 * 2
+    assert db.session.query(func.count(func.distinct(Order.order_number))).scalar() == Order.query.count()
+
+
+def test_seed_synthetic_command_can_run_twice(app):
+    runner = app.test_cli_runner()
+    for _ in range(2):
+        result = runner.invoke(seed_synthetic_command, ['--users', '5', '--subjects', '2', '--exams', '20', '--orders', '5'])
+        assert result.exit_code == 0, result.output
+    assert 'lignes insérées' in result.output
+    assert Order.query.count() == 10
+
+
+def test_load_tuning_applies_to_every_batch(app, monkeypatch):
+    synchronous = []
+    flush = SyntheticSeeder._flush
+
+    def recording_flush(self, table, batch):
+        synchronous.append(db.session.execute(text('PRAGMA synchronous')).scalar())
+        flush(self, table, batch)
+
+    monkeypatch.setattr(SyntheticSeeder, '_flush', recording_flush)
+    SyntheticSeeder(seed=2, batch_size=10).run(users=30, subjects=2, exams=50, orders=20)
+
+    # Un commit par lot : chaque lot a sa propre connexion, toutes réglées
+    assert len(synchronous) > 10 and set(synchronous) == {0}
+    assert db.session.execute(text('PRAGMA synchronous')).scalar() == 2
@@ -0,0 +1,34 @@
+from datetime import date, datetime, timedelta
+
+from models.order_model import Order
+from services.crud.order_admin import ORDER_CSV_HEADER, write_orders_csv
+from models.tcf_exam_model import score_points
+from models.user_stats_model import study_streak
+
+
+def test_score_points_handles_numbers_and_cefr_levels():
+    assert score_points('72.5') == 72.5
+    assert score_points('Niveau C1') == 85
+    assert score_points('niveau b2') == 75
+    assert score_points('A1') == 45
+    assert score_points('Non évalué') == 50
+
+
+def test_study_streak_stops_at_first_gap():
+    today = date(2024, 9, 1)
+    assert study_streak([], today) == 0
+    assert study_streak([today], today) == 1
+    assert study_streak([today - timedelta(days=5)], today) == 0
+    consecutive = [today - timedelta(days=d) for d in (0, 1, 2, 4)]
+    assert study_streak(consecutive, today) == 3
+
+
+def test_orders_csv_export():
+    order = Order(
+        order_number='Ordre#0001000', user_id=1, subscription_plan='pro', amount=79.99,
+        currency='USD', status='paid', payment_status='completed', customer_email='a@example.com',
+        created_at=datetime(2024, 9, 1, 10, 30),
+    )
+    lines = write_orders_csv([order]).splitlines()
+    assert lines[0] == ','.join(ORDER_CSV_HEADER)
+    assert lines[1] == 'Ordre#0001000,2024-09-01 10:30:00,,a@example.com,pro,79.99,USD,paid,completed,'
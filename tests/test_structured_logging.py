@@ -0,0 +1,85 @@
+import io
+import json
+import logging
+from _queue import SimpleQueue
+
+from services.monitoring import structured_logging
+from services.monitoring.structured_logging import (
+    NonBlockingQueueHandler, RateLimitFilter, bind_log_context, build_handler,
+)
+
+
+def _logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def test_async_json_lines_carry_request_and_session_ids(app):
+    stream = io.StringIO()
+    handler, writer = build_handler(log_format='json', asynchronous=True, stream=stream)
+    writer.start()
+    logger = _logger('tests.structured.async', handler)
+
+    with app.test_request_context('/proxy-note-moyenne/note-moyenne', headers={'X-Request-ID': 'req-42'}):
+        structured_logging._assign_request_id()
+        bind_log_context(session_id='abc')
+        logger.info("Tentative de connexion a: %s", 'https://n8n/webhook')
+    writer.stop()
+
+    entry = json.loads(stream.getvalue().splitlines()[0])
+    assert entry['message'] == "Tentative de connexion a: https://n8n/webhook"
+    assert entry['level'] == 'INFO'
+    assert entry['request_id'] == 'req-42'
+    assert entry['session_id'] == 'abc'
+
+
+def test_repeated_messages_are_rate_limited(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(structured_logging.time, 'monotonic', lambda: now[0])
+    stream = io.StringIO()
+    handler, _ = build_handler(asynchronous=False, rate_limit_burst=3, rate_limit_window=10, stream=stream)
+    logger = _logger('tests.structured.ratelimit', handler)
+
+    for attempt in range(10):
+        logger.warning(f"Timeout avec https://n8n - tentative {attempt + 1}")
+    logger.warning("Autre message")
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 4
+
+    now[0] += 10
+    logger.warning("Timeout avec https://n8n - tentative 1")
+    assert "(7 messages identiques supprimés)" in stream.getvalue().splitlines()[-1]
+
+
+def test_full_queue_drops_without_blocking():
+    log_queue = SimpleQueue()
+    handler = NonBlockingQueueHandler(log_queue, max_size=1)
+    logger = _logger('tests.structured.drop', handler)
+
+    logger.info("premier")
+    logger.info("abandonné")
+    assert handler.dropped == 1
+
+    assert log_queue.get().getMessage() == "premier"
+    logger.info("suivant")
+    record = log_queue.get()
+    assert record.getMessage() == "suivant"
+    assert record.dropped == 1
+
+
+def test_request_id_header_is_generated_or_echoed(client):
+    generated = client.get('/tcf/subjects').headers['X-Request-ID']
+    assert len(generated) == 32
+
+    assert client.get('/tcf/subjects', headers={'X-Request-ID': 'abc-123'}).headers['X-Request-ID'] == 'abc-123'
+    # Valeur invalide (trop longue, caractères non autorisés) : remplacée
+    assert client.get('/tcf/subjects', headers={'X-Request-ID': 'a b; c'}).headers['X-Request-ID'] != 'a b; c'
+
+
+def test_rate_limit_filter_can_be_disabled():
+    record = logging.LogRecord('x', logging.INFO, __file__, 1, "même message", None, None)
+    unlimited = RateLimitFilter(burst=0)
+    assert all(unlimited.filter(record) for _ in range(100))
@@ -0,0 +1,58 @@
+from models.tcf_model import TCFDocument, TCFSubject, TCFTask
+from models.tcf_model_oral import TCFOralSubject, TCFOralTask
+from models.exts import db
+
+
+def _add_subjects(count):
+    for index in range(count):
+        subject = TCFSubject(name=f'Sujet {index}', date='2024-09-01', status='Actif', duration=60,
+                             subject_type='Écrit')
+        for task_index in range(2):
+            task = TCFTask(title=f'Tâche {task_index}', duration=20)
+            task.documents = [TCFDocument(content='Document ' * 50) for _ in range(2)]
+            subject.tasks.append(task)
+        db.session.add(subject)
+    db.session.commit()
+
+
+def test_subjects_load_tasks_and_documents_in_batches(client):
+    _add_subjects(5)
+    response = client.get('/tcf/subjects')
+    subjects = response.get_json()
+    assert len(subjects) == TCFSubject.query.count()
+    assert set(subjects[0]) == set(TCFSubject.LIST_FIELDS) | {'tasks'}
+    assert subjects[-1]['tasks'][0]['documents'][0]['content'].startswith('Document')
+    # Sujets, tâches, documents : une requête chacun quel que soit le nombre de sujets
+    assert response.headers['X-Query-Count'] == '3'
+
+    response = client.get('/tcf/subjects?include=tasks')
+    assert 'documents' not in response.get_json()[-1]['tasks'][0]
+    assert response.headers['X-Query-Count'] == '2'
+
+
+def test_subject_picker_fields_in_one_query(client):
+    _add_subjects(2)
+    response = client.get('/tcf/subjects?fields=id,name,status,subject_type&type=Écrit')
+    assert response.status_code == 200
+    assert response.headers['X-Query-Count'] == '1'
+    assert all(set(subject) == {'id', 'name', 'status', 'subject_type'} for subject in response.get_json())
+
+    response = client.get('/tcf/subjects?fields=id,password')
+    assert response.status_code == 400
+    assert 'password' in response.get_json()['message']
+
+
+def test_oral_subjects_accept_fields_and_include(client):
+    subject = TCFOralSubject(name='Oral', date='2024-09-01')
+    subject.oral_tasks = [TCFOralTask(title='Entretien', task_type='entretien') for _ in range(3)]
+    db.session.add(subject)
+    db.session.commit()
+
+    response = client.get('/tcf-oral/oral-subjects')
+    assert len(response.get_json()['subjects'][0]['tasks']) == 3
+    assert response.headers['X-Query-Count'] == '2'
+
+    response = client.get('/tcf-oral/oral-subjects?fields=id,name')
+    assert response.get_json()['subjects'] == [{'id': subject.id, 'name': 'Oral'}]
+    assert response.headers['X-Query-Count'] == '1'
+    assert client.get('/tcf-oral/oral-subjects?include=documents').status_code == 400
@@ -0,0 +1,125 @@
+import pytest
+from sqlalchemy import event
+
+from models.exts import db
+from models.model import User
+from models.tcf_model import TCFDocument, TCFSubject, TCFTask
+from models.unit_of_work import after_commit, transactional, unit_of_work
+
+
+def _subject(name):
+    return TCFSubject(name=name, date='2024-09-01', duration=60, subject_type='Écrit')
+
+
+SUBJECT = {'name': 'Sujet transactionnel', 'date': '2024-09-01', 'status': 'Actif', 'duration': 60,
+           'subject_type': 'Écrit', 'tasks': [
+               {'title': f'Tâche {index}', 'duration': 20, 'documents': [{'content': 'Document'}] * 2}
+               for index in range(3)]}
+
+
+@pytest.fixture
+def commits(app):
+    counted = []
+
+    def count_commit(connection):
+        counted.append(connection)
+
+    event.listen(db.engine, 'commit', count_commit)
+    yield counted
+    event.remove(db.engine, 'commit', count_commit)
+
+
+def test_subject_writes_commit_once(client, commits):
+    response = client.post('/tcf/subjects', json=SUBJECT)
+    assert response.status_code == 201
+    subject_id = response.get_json()['id']
+    assert len(commits) == 1
+    assert TCFTask.query.filter_by(subject_id=subject_id).count() == 3
+
+    commits.clear()
+    tasks = response.get_json()['tasks']
+    update = {**SUBJECT, 'name': 'Sujet modifié', 'tasks': [
+        {**tasks[0], 'documents': [{'content': 'Nouveau document'}]},
+        {'title': 'Tâche ajoutée', 'duration': 10, 'documents': []},
+    ]}
+    response = client.put(f'/tcf/subjects/{subject_id}', json=update)
+    assert response.status_code == 200
+    assert len(commits) == 1
+    # Réponse conforme à l'état validé : tâches supprimées absentes, documents remplacés
+    body = response.get_json()
+    assert [task['title'] for task in body['tasks']] == ['Tâche 0', 'Tâche ajoutée']
+    assert [document['content'] for document in body['tasks'][0]['documents']] == ['Nouveau document']
+    assert TCFDocument.query.filter_by(task_id=tasks[0]['id']).count() == 1
+
+
+def test_helpers_commit_outside_unit_of_work(app, commits):
+    _subject('Sujet CLI').save()
+    assert len(commits) == 1
+
+
+def test_unit_of_work_rolls_back_on_error(app, commits):
+    sent = []
+    with pytest.raises(ValueError):
+        with unit_of_work():
+            _subject('Sujet annulé').save()
+            after_commit(lambda: sent.append('email'))
+            raise ValueError
+    assert not commits and not sent
+    assert TCFSubject.query.filter_by(name='Sujet annulé').count() == 0
+
+    @transactional
+    def failing_resource():
+        _subject('Sujet en erreur').save()
+        after_commit(lambda: sent.append('email'))
+        return {'message': 'Erreur'}, 500
+
+    assert failing_resource() == ({'message': 'Erreur'}, 500)
+    assert not commits and not sent
+    assert TCFSubject.query.filter_by(name='Sujet en erreur').count() == 0
+
+    with unit_of_work():
+        with unit_of_work():
+            _subject('Sujet imbriqué').save()
+            after_commit(lambda: sent.append('email'))
+        assert not commits
+    assert len(commits) == 1 and sent == ['email']
+
+
+def test_rollback_inside_unit_of_work_discards_it(app, commits):
+    sent = []
+    with unit_of_work():
+        _subject('Sujet avant rollback').save()
+        after_commit(lambda: sent.append('email'))
+        db.session.rollback()
+        # Écritures suivantes : annulées avec le reste de l'unité
+        _subject('Sujet après rollback').save()
+    assert not commits and not sent
+    assert TCFSubject.query.filter(TCFSubject.name.like('Sujet %rollback')).count() == 0
+
+
+def test_failed_webhook_commits_nothing(client, monkeypatch):
+    import services.auth.stripe as stripe_service
+    from models.order_model import Order
+    from services.email.email_service import email_service
+    from tests.conftest import make_user
+
+    user, _ = make_user('webhook_client')
+    user_id = user.id
+    sent = []
+    monkeypatch.setattr(email_service, 'send_welcome_email', lambda *args, **kwargs: sent.append(args))
+    monkeypatch.setattr(stripe_service, 'init_stripe', lambda: 'whsec_test')
+    monkeypatch.setattr(stripe_service.stripe.Webhook, 'construct_event', lambda payload, signature, secret: {
+        'type': 'checkout.session.completed', 'data': {'object': {
+            'id': 'cs_test_echec', 'metadata': {'user_id': str(user_id), 'plan_name': 'standard'},
+            'payment_status': 'paid', 'amount_total': 2999, 'currency': 'usd'}}})
+
+    def failing_grant(*args, **kwargs):
+        raise RuntimeError('Base indisponible')
+
+    monkeypatch.setattr(stripe_service, 'grant_credits', failing_grant)
+    response = client.post('/stripe/webhook', data=b'{}')
+    # Erreur renvoyée à Stripe (nouvel envoi), aucune écriture partielle validée
+    assert response.status_code == 400
+    assert Order.query.filter_by(stripe_session_id='cs_test_echec').count() == 0
+    assert db.session.get(User, user_id).subscription_plan is None
+    assert not sent
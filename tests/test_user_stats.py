@@ -0,0 +1,106 @@
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from commands.rebuild_user_stats import rebuild_user_stats_command
+from models.exts import db
+from models.tcf_exam_model import TCFExam
+from models.user_stats_model import UserStats, compute_user_stats
+from tests.conftest import make_exam, make_user
+
+
+def _stats(user):
+    db.session.expire_all()
+    stats = db.session.get(UserStats, user.id)
+    return stats and (stats.total_exams, stats.scored_exams, stats.score_sum, stats.best_score, stats.current_streak)
+
+
+def _recomputed(user):
+    values = compute_user_stats(db.session, [user.id]).get(user.id)
+    return values and tuple(values[key] for key in ('total_exams', 'scored_exams', 'score_sum', 'best_score', 'current_streak'))
+
+
+def test_stats_follow_inserts_updates_and_deletes(app):
+    user, _ = make_user('stats_writer')
+    for score, days_ago in (('B1', 2), ('C1', 1), (None, 1), ('A2', 0)):
+        make_exam(user, score, days_ago).save()
+    assert _stats(user) == (4, 3, 65 + 85 + 55, 85, 3) == _recomputed(user)
+
+    best = TCFExam.query.filter_by(id_user=user.id, score='C1').one()
+    best.update({'score': 'A1'})
+    assert _stats(user) == (4, 3, 65 + 45 + 55, 65, 3) == _recomputed(user)
+
+    TCFExam.query.filter_by(id_user=user.id, score='A2').one().delete()
+    assert _stats(user) == (3, 2, 65 + 45, 65, 2) == _recomputed(user)
+
+    # Suppression en masse (Query.delete), comme à la suppression d'un sujet
+    TCFExam.query.filter_by(id_user=user.id).delete()
+    db.session.commit()
+    assert _stats(user) is None
+
+
+def test_backdated_exam_recomputes_streak(app):
+    user, _ = make_user('stats_backdated')
+    make_exam(user, 'B2', 0).save()
+    make_exam(user, 'B2', 2).save()
+    assert _stats(user)[-1] == 1
+    make_exam(user, 'B2', 1).save()
+    assert _stats(user)[-1] == 3
+
+
+def test_first_exams_from_two_sessions(app):
+    user, _ = make_user('stats_concurrent')
+    exams = [make_exam(user, 'B2'), make_exam(user, 'C1')]
+    statements, errors = [], []
+    ready = threading.Barrier(len(exams))
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if 'user_stats' in statement:
+            statements.append((threading.get_ident(), statement.lstrip().split()[0]))
+
+    def submit(exam):
+        try:
+            with app.app_context(), Session(db.engine) as session:
+                session.add(exam)
+                ready.wait()
+                session.commit()
+        except Exception as error:
+            errors.append(error)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        threads = [threading.Thread(target=submit, args=(exam,)) for exam in exams]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert errors == []
+    assert _stats(user) == (2, 2, 75 + 85, 85, 1) == _recomputed(user)
+    # Chaque transaction crée ou verrouille la ligne avant de la lire (SELECT ... FOR UPDATE)
+    for ident in {ident for ident, _ in statements}:
+        assert [verb for thread, verb in statements if thread == ident][0] == 'INSERT'
+
+
+def test_rebuild_command_repairs_drift(app):
+    user, _ = make_user('stats_drift')
+    make_exam(user, 'C2').save()
+    db.session.query(UserStats).filter_by(user_id=user.id).update({'total_exams': 42})
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(rebuild_user_stats_command, ['--batch-size', '1'])
+    assert result.exit_code == 0, result.output
+    assert _stats(user) == (1, 1, 95, 95, 1)
+
+
+def test_client_dashboard_reads_stats_row(app, client):
+    user, headers = make_user('stats_reader')
+    make_exam(user, 'Niveau B2').save()
+    response = client.get('/dashboard/stats', headers=headers)
+    stats = response.get_json()
+    assert (stats['total_exams'], stats['best_score'], stats['study_streak']) == (1, 75, 1)
+    # Utilisateur, ligne user_stats, compteurs des 60 derniers jours
+    assert response.headers['X-Query-Count'] == '3'